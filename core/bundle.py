@@ -0,0 +1,274 @@
+"""
+排程組合包
+將排程與引用的音訊匯出為組合包（資料夾或 .zip），清單檔記錄每個音訊的 SHA-256；
+匯入時只讀取並寫入本機音訊庫沒有的內容，匯出到既有的組合包資料夾時也只寫入新內容，
+排程小幅修改後重新部署到多台電腦只需傳輸有變化的檔案
+
+組合包結構：
+    manifest.json          版本、排程（檔案以內容ID引用）與內容清單（最後寫入）
+    objects/ab/<雜湊><副檔名>  音訊內容
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import zipfile
+
+from core.library import CHUNK_SIZE, LIBRARY_PREFIX, is_content_ref
+from core.log import get_logger
+from core.playlist import expand_playlists, is_playlist_file
+from core.schedule import decode_schedules, encode_schedules
+
+log = get_logger('bundle')
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+OBJECTS_DIR = 'objects'
+
+# 內容鍵格式（雜湊 + 副檔名），防止清單中的路徑跳出目錄
+_CONTENT_KEY = re.compile(r'^[0-9a-f]{64}(\.[0-9a-z]{1,8})?$')
+
+
+class BundleError(Exception):
+    """組合包格式錯誤或內容損毀"""
+
+
+def _object_name(content_key):
+    return f"{OBJECTS_DIR}/{content_key[:2]}/{content_key}"
+
+
+class HashCache:
+    """
+    檔案雜湊快取：大小與修改時間未變的檔案不重新計算
+    重新匯出大型音訊庫時只需要 stat
+    """
+
+    def __init__(self, cache_file=None):
+        """
+        :param cache_file: 快取檔路徑（None表示只保存在記憶體）
+        """
+        self.cache_file = cache_file
+        self._entries = {}
+        self._dirty = False
+        if cache_file:
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (IOError, OSError, ValueError):
+                self._entries = {}
+
+    def content_key(self, path):
+        """
+        檔案的內容鍵（雜湊 + 副檔名）
+        :raises OSError: 檔案無法讀取
+        """
+        st = os.stat(path)
+        cached = self._entries.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        key = digest.hexdigest() + os.path.splitext(path)[1].lower()
+        self._entries[path] = [st.st_size, st.st_mtime_ns, key]
+        self._dirty = True
+        return key
+
+    def save(self):
+        """寫回快取檔"""
+        if not self.cache_file or not self._dirty:
+            return
+        temp_file = self.cache_file + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_file, self.cache_file)
+            self._dirty = False
+        except (IOError, OSError) as e:
+            log.error("保存雜湊快取失敗", error=str(e))
+
+
+def export_bundle(schedules, library, target, hash_cache=None, prune=True):
+    """
+    匯出排程與引用的音訊
+    :param schedules: 要匯出的排程
+    :param library: 本機音訊庫（解析內容ID）
+    :param target: 組合包路徑，以 .zip 結尾時輸出單一檔案，否則為資料夾（可重複匯出，只寫入新內容）
+    :param hash_cache: HashCache（None表示不快取）
+    :param prune: 資料夾組合包是否刪除不再引用的內容
+    :return: 統計 {'schedules', 'objects', 'written', 'skipped', 'bytes_written', 'removed', 'missing'}
+    """
+    hash_cache = hash_cache or HashCache()
+    objects = {}  # 內容鍵 -> (實際路徑, 顯示名稱)
+    missing = []
+    key_for = {}
+
+    def content_ref(ref):
+        if ref in key_for:
+            return key_for[ref]
+        path = library.path_for(ref)
+        try:
+            key = ref[len(LIBRARY_PREFIX):] if is_content_ref(ref) else hash_cache.content_key(path)
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+        except OSError:
+            missing.append(ref)
+            key_for[ref] = None
+            return None
+        objects.setdefault(key, (path, library.display_name(ref)))
+        key_for[ref] = LIBRARY_PREFIX + key
+        return key_for[ref]
+
+    exported = []
+    for schedule in schedules:
+        files = []
+        for ref in schedule.files:
+            # 播放清單中的路徑在其他電腦上不存在，展開為其中的檔案
+            for item in (expand_playlists([ref]) if is_playlist_file(ref) else [ref]):
+                files.append(content_ref(item) or item)
+        exported.append(schedule.copy(files=files))
+    hash_cache.save()
+
+    manifest = {
+        'format': BUNDLE_FORMAT_VERSION,
+        'created_at': time.time(),
+        'schedules': encode_schedules(exported),
+        'objects': {
+            key: {'name': name, 'size': os.path.getsize(path)}
+            for key, (path, name) in objects.items()
+        },
+    }
+    stats = {'schedules': len(exported), 'objects': len(objects), 'written': 0, 'skipped': 0,
+             'bytes_written': 0, 'removed': 0, 'missing': missing}
+    if str(target).lower().endswith('.zip'):
+        _export_zip(manifest, objects, str(target), stats)
+    else:
+        _export_directory(manifest, objects, str(target), stats, prune)
+    return stats
+
+
+def _export_zip(manifest, objects, target, stats):
+    temp_file = target + '.tmp'
+    # 音訊已是壓縮格式，不再壓縮
+    with zipfile.ZipFile(temp_file, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as bundle:
+        for key, (path, _name) in objects.items():
+            bundle.write(path, _object_name(key))
+            stats['written'] += 1
+            stats['bytes_written'] += manifest['objects'][key]['size']
+        bundle.writestr(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2))
+    os.replace(temp_file, target)
+
+
+def _export_directory(manifest, objects, target, stats, prune):
+    for key, (path, _name) in objects.items():
+        object_path = os.path.join(target, *_object_name(key).split('/'))
+        size = manifest['objects'][key]['size']
+        # 內容鍵即雜湊：同名且大小相同的檔案內容必定相同
+        if os.path.exists(object_path) and os.path.getsize(object_path) == size:
+            stats['skipped'] += 1
+            continue
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        temp_path = object_path + '.part'
+        shutil.copyfile(path, temp_path)
+        os.replace(temp_path, object_path)
+        stats['written'] += 1
+        stats['bytes_written'] += size
+    # 清單最後寫入，讀取端不會看到引用尚未複製完成的內容
+    temp_file = os.path.join(target, MANIFEST_FILE + '.tmp')
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_file, os.path.join(target, MANIFEST_FILE))
+    if prune:
+        objects_root = os.path.join(target, OBJECTS_DIR)
+        for directory, _dirs, names in os.walk(objects_root):
+            for name in names:
+                if name not in manifest['objects']:
+                    os.remove(os.path.join(directory, name))
+                    stats['removed'] += 1
+
+
+class _BundleReader:
+    """讀取資料夾或 .zip 組合包"""
+
+    def __init__(self, source):
+        self.source = str(source)
+        self._zip = None
+        if os.path.isfile(self.source):
+            try:
+                self._zip = zipfile.ZipFile(self.source)
+            except zipfile.BadZipFile as e:
+                raise BundleError(f"組合包格式錯誤: {e}")
+
+    def open(self, name):
+        if self._zip is not None:
+            try:
+                return self._zip.open(name)
+            except KeyError:
+                raise BundleError(f"組合包缺少檔案: {name}")
+        try:
+            return open(os.path.join(self.source, *name.split('/')), 'rb')
+        except FileNotFoundError:
+            raise BundleError(f"組合包缺少檔案: {name}")
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def read_manifest(source):
+    """
+    讀取組合包清單
+    :return: 清單字典
+    :raises BundleError: 格式錯誤
+    """
+    reader = _BundleReader(source)
+    try:
+        with reader.open(MANIFEST_FILE) as f:
+            manifest = json.loads(f.read().decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise BundleError(f"組合包清單格式錯誤: {e}")
+    finally:
+        reader.close()
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('objects'), dict):
+        raise BundleError("組合包清單格式錯誤")
+    if manifest.get('format', 0) > BUNDLE_FORMAT_VERSION:
+        raise BundleError(f"組合包格式版本 {manifest.get('format')} 較新，請更新程式")
+    for key in manifest['objects']:
+        if not _CONTENT_KEY.match(key):
+            raise BundleError(f"組合包內容鍵格式錯誤: {key}")
+    return manifest
+
+
+def import_bundle(source, library):
+    """
+    匯入組合包的音訊到本機音訊庫：只讀取並寫入本機沒有的內容，寫入時驗證雜湊
+    :param source: 組合包路徑（資料夾或 .zip）
+    :param library: 本機音訊庫
+    :return: (排程列表, 統計 {'objects', 'written', 'skipped', 'bytes_written'})
+    :raises BundleError: 格式錯誤或內容損毀
+    """
+    manifest = read_manifest(source)
+    stats = {'objects': len(manifest['objects']), 'written': 0, 'skipped': 0, 'bytes_written': 0}
+    reader = _BundleReader(source)
+    try:
+        for key, info in manifest['objects'].items():
+            if library.has_object(key):
+                stats['skipped'] += 1
+                continue
+            with reader.open(_object_name(key)) as stream:
+                try:
+                    size = library.add_object(key, stream, str(info.get('name') or key), save_index=False)
+                except ValueError as e:
+                    raise BundleError(str(e))
+            stats['written'] += 1
+            stats['bytes_written'] += size
+    finally:
+        reader.close()
+        if stats['written']:
+            library.save_index()
+    return decode_schedules(manifest.get('schedules') or {}), stats
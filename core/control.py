@@ -0,0 +1,208 @@
+"""
+本機控制通道
+以 127.0.0.1 上的 TCP 連線接收一行一個指令、回傳一行 JSON；
+監聽的埠號寫入埠號檔，讓同一台電腦上的其他程式找到執行中的實例；
+同一埠號也接受 HTTP GET /metrics，以 Prometheus 文字格式回傳效能指標；
+其他 HTTP 請求（例如網頁送出的 POST）一律關閉連線，請求內容不會被當成指令執行
+"""
+
+import json
+import os
+import re
+import socket
+import socketserver
+import threading
+
+from core.log import get_logger
+from core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+
+log = get_logger('control')
+
+# 單一指令的最大長度（位元組）
+MAX_COMMAND_SIZE = 64 * 1024
+
+# 控制通道埠號檔名稱（位於資料目錄）
+CONTROL_PORT_FILE = 'control.json'
+
+# HTTP 請求行（任何方法、任何版本）與標頭行
+_HTTP_REQUEST_LINE = re.compile(r'^[A-Z]+ \S+ HTTP/\d(\.\d)?$')
+_HTTP_HEADER_LINE = re.compile(r'^[A-Za-z0-9-]+:')
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """處理一條連線：逐行讀取指令並回應"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_COMMAND_SIZE)
+            if not line:
+                return
+            line = line.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            if _HTTP_REQUEST_LINE.match(line):
+                method, path, _ = line.split(' ')
+                self._handle_http(method, path)
+                return
+            if _HTTP_HEADER_LINE.match(line):
+                # 不是請求行開頭的 HTTP 標頭：不回應，直接關閉連線
+                log.warning("控制通道收到 HTTP 標頭，關閉連線")
+                return
+            command, _, argument = line.partition(' ')
+            try:
+                response = self.server.command_handler(command.lower(), argument.strip())
+            except Exception as e:
+                log.exception("處理控制指令失敗", command=line, error=str(e))
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+    def _handle_http(self, method, path):
+        """回應 HTTP 請求（只提供 GET /metrics），回應後關閉連線；請求主體不讀取"""
+        # 略過標頭
+        while self.rfile.readline(MAX_COMMAND_SIZE).strip():
+            pass
+        if method != 'GET':
+            status, content_type, body = '405 Method Not Allowed', 'text/plain; charset=utf-8', b'method not allowed\n'
+        elif path.split('?')[0].rstrip('/') == '/metrics':
+            status, content_type, body = '200 OK', PROMETHEUS_CONTENT_TYPE, REGISTRY.render().encode('utf-8')
+        else:
+            status, content_type, body = '404 Not Found', 'text/plain; charset=utf-8', b'not found\n'
+        self.wfile.write((f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                          f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('ascii') + body)
+        self.wfile.flush()
+
+
+class _ControlTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # Windows 的 SO_REUSEADDR 允許其他程式搶用同一埠號
+    allow_reuse_address = os.name != 'nt'
+
+
+class ControlServer:
+    """本機控制伺服器"""
+
+    def __init__(self, command_handler, port_file=None, host='127.0.0.1', port=0):
+        """
+        初始化控制伺服器
+        :param command_handler: 處理指令的函數(command, argument) -> 可轉為JSON的字典，於連線執行緒呼叫
+        :param port_file: 寫入監聽埠號的檔案（None表示不寫入）
+        :param host: 監聽位址（預設只接受本機連線）
+        :param port: 監聽埠號，0表示由系統指定
+        """
+        self.command_handler = command_handler
+        self.port_file = port_file
+        self.host = host
+        self.requested_port = port
+        self.server = None
+        self.server_thread = None
+
+    @property
+    def port(self):
+        """實際監聽的埠號（尚未啟動時為None）"""
+        return self.server.server_address[1] if self.server else None
+
+    def start(self):
+        """開始監聽並寫入埠號檔"""
+        if self.server is not None:
+            return
+        self.server = _ControlTCPServer((self.host, self.requested_port), _ControlHandler)
+        self.server.command_handler = self.command_handler
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        if self.port_file:
+            _write_port_file(self.port_file, self.port)
+
+    def stop(self):
+        """停止監聽並移除埠號檔"""
+        if self.server is None:
+            return
+        port = self.port
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        # 埠號檔已被其他實例改寫時保留
+        if self.port_file and read_port_file(self.port_file) == {'port': port, 'pid': os.getpid()}:
+            try:
+                os.remove(self.port_file)
+            except OSError:
+                pass
+
+
+def _write_port_file(port_file, port):
+    """寫入埠號檔（暫存檔取代，避免讀到寫到一半的內容）"""
+    temp_file = port_file + '.tmp'
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'port': port, 'pid': os.getpid()}, f)
+        os.replace(temp_file, port_file)
+    except (IOError, OSError) as e:
+        log.error("寫入控制埠號檔失敗", file=port_file, error=str(e))
+
+
+def read_port_file(port_file):
+    """
+    讀取埠號檔
+    :return: {'port', 'pid'}，檔案不存在或損毀時為None
+    """
+    try:
+        with open(port_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get('port'), int):
+        return None
+    return data
+
+
+def resolve_output_path(argument, output_dir):
+    """
+    控制指令（metrics、dump-log）要寫入的檔案路徑
+    相對路徑以 output_dir 為準；不可指向 output_dir 以外，避免透過控制通道寫入任意位置
+    :param argument: 指令參數（空字串表示未指定）
+    :param output_dir: 允許寫入的目錄（資料目錄）
+    :return: 絕對路徑，未指定時為None
+    :raises ValueError: 路徑位於 output_dir 以外
+    """
+    argument = argument.strip()
+    if not argument:
+        return None
+    base = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(base, argument))
+    try:
+        inside = os.path.commonpath([os.path.normcase(base), os.path.normcase(path)]) == os.path.normcase(base)
+    except ValueError:
+        # Windows 上不同磁碟機
+        inside = False
+    if not inside or path == base:
+        raise ValueError(f'只能寫入資料目錄內的檔案: {base}')
+    return path
+
+
+def send_command(port_file, command, argument='', timeout=2.0, host='127.0.0.1'):
+    """
+    傳送指令給執行中的實例
+    :param port_file: 埠號檔
+    :param command: 指令名稱
+    :param argument: 指令參數
+    :param timeout: 連線與等待回應的逾時秒數
+    :return: 回應字典，沒有執行中的實例時為None
+    """
+    record = read_port_file(port_file)
+    if record is None:
+        return None
+    line = f"{command} {argument}".strip() + '\n'
+    try:
+        with socket.create_connection((host, record['port']), timeout=timeout) as sock:
+            sock.sendall(line.encode('utf-8'))
+            with sock.makefile('rb') as reader:
+                response = reader.readline(MAX_COMMAND_SIZE)
+    except OSError:
+        # 埠號檔殘留（實例已結束）或連線逾時
+        return None
+    if not response:
+        return None
+    try:
+        return json.loads(response.decode('utf-8'))
+    except ValueError:
+        return None
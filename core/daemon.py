@@ -0,0 +1,514 @@
+"""
+無介面常駐模式
+只組合 Storage、Scheduler、AudioPlayer 與背景檔案快取，不載入任何 GUI 模組；
+適合只需要定時播放鐘聲的電腦以背景服務執行，透過本機控制通道操作
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from core.audio_utils import get_total_duration
+from core.control import CONTROL_PORT_FILE, ControlServer, resolve_output_path
+from core.events import EventBus
+from core.library import AudioLibrary, is_content_ref
+from core.log import dump_log_command, get_logger
+from core.metrics import metrics_command
+from core.mirror import MirrorCache
+from core.player import AudioPlayer
+from core.playlist import expand_playlists
+from core.schedule import decode_schedules, encode_schedules, schedule_from_request
+from core.scheduler import Scheduler
+from core.storage import Storage
+from core.sync import fleet_status
+from core.transcoder import TranscodeCache
+from core.verifier import FileVerifier
+from core.watcher import ScheduleFileWatcher
+
+log = get_logger('daemon')
+
+
+def redirect_output(log_file):
+    """
+    將標準輸出與錯誤輸出附加到記錄檔（背景服務沒有主控台）
+    :param log_file: 記錄檔路徑
+    """
+    log_dir = os.path.dirname(os.path.abspath(log_file))
+    os.makedirs(log_dir, exist_ok=True)
+    stream = open(log_file, 'a', encoding='utf-8', buffering=1)
+    sys.stdout = stream
+    sys.stderr = stream
+
+
+class HeadlessDaemon:
+    """無介面的排程播放服務"""
+
+    def __init__(self, storage=None, control_port=0, control_host='127.0.0.1',
+                 http_port=None, http_host='127.0.0.1', http_token=None, sync=None):
+        """
+        初始化服務
+        :param storage: 資料存儲（預設使用程式目錄下的 data）
+        :param control_port: 控制通道埠號，0表示由系統指定，None表示不開啟控制通道
+        :param control_host: 控制通道監聽位址
+        :param http_port: HTTP 管理介面埠號，None表示不開啟
+        :param http_host: HTTP 管理介面監聽位址（0.0.0.0 開放區域網路）
+        :param http_token: HTTP 管理介面的存取權杖（None表示不驗證）
+        :param sync: 多台電腦排程同步節點（SyncNode，None表示不同步）
+        """
+        self.storage = storage or Storage()
+        data_dir = self.storage.data_dir
+        self.library = AudioLibrary(os.path.join(data_dir, 'library'))
+        self.file_verifier = FileVerifier()
+        self.mirror = MirrorCache(
+            os.path.join(data_dir, 'cache', 'mirror'),
+            status_lookup=self.file_verifier.status
+        )
+        self.transcoder = TranscodeCache(
+            os.path.join(data_dir, 'cache', 'transcode'),
+            status_lookup=self.file_verifier.status
+        )
+        # 排程與播放事件（HTTP 管理介面的事件串流訂閱）
+        self.events = EventBus()
+        self.player = AudioPlayer(
+            on_playback_start=self._on_playback_start,
+            on_playback_end=self._on_playback_end,
+            file_checker=self._is_file_playable,
+            path_resolver=self._resolve_playback_path,
+            on_playback_error=self._on_playback_error
+        )
+        self.scheduler = Scheduler(on_schedule_trigger=self._on_schedule_trigger)
+        # 排程檔被同步工具或命令列工具修改時自動重新載入
+        self.schedule_watcher = ScheduleFileWatcher(
+            self.storage.schedule_file,
+            on_change=self._on_schedule_file_changed
+        )
+
+        self.schedules = []
+        self.pending_schedules = deque()
+        self.current_schedule = None
+        self.started_at = None
+        self.state_version = 0  # 狀態每次變化時遞增，供管理介面判斷快照是否過期
+        self._lock = threading.RLock()  # 保護排程與待播佇列（排程器、播放、控制執行緒共用）
+        self._stop_event = threading.Event()
+
+        self.control = None
+        if control_port is not None:
+            self.control = ControlServer(
+                self.handle_command,
+                port_file=os.path.join(data_dir, CONTROL_PORT_FILE),
+                host=control_host,
+                port=control_port
+            )
+        # 同步節點取得的新版本經由服務的鎖寫入，不與管理介面的保存交錯
+        self.sync = sync
+        if sync is not None and sync.writer is None:
+            sync.writer = self._apply_synced_schedules
+        self.http = None
+        if http_port is not None:
+            from core.http_api import HttpControlServer
+            self.http = HttpControlServer(self, host=http_host, port=http_port, token=http_token)
+
+    # ------------------------------------------------------------------ #
+    # 生命週期
+    # ------------------------------------------------------------------ #
+    def start(self):
+        """載入排程並啟動背景服務"""
+        self.started_at = time.time()
+        self.reload()
+        self.file_verifier.start()
+        self.mirror.start()
+        self.transcoder.start()
+        self.schedule_watcher.start()
+        self.scheduler.start()
+        if self.sync:
+            self.sync.start()
+            log.info("✓ 排程同步已啟動", shared_dir=self.sync.shared_dir, node=self.sync.node_id)
+        if self.control:
+            self.control.start()
+            log.info("✓ 控制通道已啟動", address=f"127.0.0.1:{self.control.port}")
+        if self.http:
+            self.http.start()
+            log.info("✓ HTTP 管理介面已啟動", address=f"{self.http.host}:{self.http.port}")
+        log.info("✓ 無介面模式已啟動", schedules=len(self.schedules))
+
+    def run(self):
+        """啟動並等待結束指令（Ctrl+C 或控制通道的 quit）"""
+        self.start()
+        try:
+            # 分段等待，讓 Windows 上的 Ctrl+C 能即時中斷
+            while not self._stop_event.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def request_stop(self):
+        """要求結束服務（可由任何執行緒呼叫）"""
+        self._stop_event.set()
+
+    def shutdown(self):
+        """停止所有背景服務"""
+        self._stop_event.set()
+        if self.http:
+            self.http.stop()
+        if self.control:
+            self.control.stop()
+        if self.sync:
+            self.sync.stop()
+        self.scheduler.stop()
+        self.player.cleanup()
+        self.file_verifier.stop()
+        self.mirror.stop()
+        self.transcoder.stop()
+        self.schedule_watcher.stop()
+        log.info("✓ 無介面模式已結束")
+
+    # ------------------------------------------------------------------ #
+    # 排程
+    # ------------------------------------------------------------------ #
+    def reload(self):
+        """
+        重新讀取排程檔，排程器只套用有變化的排程
+        :return: (新增ID列表, 變更ID列表, 移除ID列表)
+        """
+        with self._lock:
+            # 持有鎖讀取，避免與管理介面的保存交錯而載入舊內容
+            self.schedule_watcher.mark_current()
+            schedules = decode_schedules(self.storage.load_schedules())
+            self.schedules = schedules
+            result = self.scheduler.apply_schedules(schedules)
+            self._touch()
+        self._update_tracked_files(schedules)
+        return result
+
+    def _on_schedule_file_changed(self):
+        """排程檔被外部修改（監看執行緒）"""
+        added, changed, removed = self.reload()
+        log.info("✓ 已套用排程檔的外部修改", added=len(added), changed=len(changed), removed=len(removed))
+
+    def _apply_synced_schedules(self, schedules):
+        """
+        寫入同步節點取得的新版本並套用（同步執行緒）
+        :return: 是否保存成功
+        """
+        with self._lock:
+            saved = self._commit_schedules(schedules, publish=False)
+        if saved:
+            self._update_tracked_files(schedules)
+        return saved
+
+    def _sync_schedule_file(self):
+        """排程檔在上次同步後被外部修改時先重新載入（呼叫端持有鎖），避免保存時覆蓋外部的變更"""
+        if self.schedule_watcher.has_changed():
+            self.reload()
+
+    def _touch(self):
+        """標記狀態已變化"""
+        self.state_version += 1
+
+    def _commit_schedules(self, schedules, publish=True):
+        """
+        保存排程並套用到排程器（呼叫端持有鎖）
+        :param publish: 是否要求同步節點發布（套用同步版本時不需要）
+        :return: 是否保存成功
+        """
+        with self.schedule_watcher.writing():
+            if not self.storage.save_schedules(encode_schedules(schedules)):
+                return False
+        self.schedules = schedules
+        self.scheduler.apply_schedules(schedules)
+        self._touch()
+        if self.sync and publish:
+            if not schedules:
+                # 經由管理介面刪除了全部排程，是明確的清空
+                self.sync.allow_empty_publish()
+            # 主節點盡快發布修改
+            self.sync.sync_now()
+        return True
+
+    def _build_schedule(self, data):
+        """
+        由請求資料建立排程（ID稍後指定；會讀取檔案計算時長，不可持有鎖呼叫）
+        :param data: {'name', 'time', 'days', 'files'}
+        :raises ValueError: 資料不完整或格式錯誤
+        """
+        schedule = schedule_from_request(data)
+        total = get_total_duration(self._expand_files(schedule.files))
+        schedule.duration_seconds = int(total) if total else None
+        return schedule
+
+    def add_schedule(self, data):
+        """
+        新增排程並保存
+        :param data: {'name', 'time', 'days', 'files'}
+        :return: 新增的排程
+        :raises ValueError: 資料錯誤
+        :raises IOError: 保存失敗
+        """
+        schedule = self._build_schedule(data)
+        with self._lock:
+            self._sync_schedule_file()
+            next_id = max((s.id or 0 for s in self.schedules), default=0) + 1
+            schedule = schedule.copy(id=next_id)
+            if not self._commit_schedules(self.schedules + [schedule]):
+                raise IOError("保存播放計劃失敗")
+        self._update_tracked_files(self.schedules)
+        return schedule
+
+    def update_schedule(self, schedule_id, data):
+        """
+        以新資料取代排程並保存
+        :return: 更新後的排程，排程不存在時為None
+        :raises ValueError: 資料錯誤
+        :raises IOError: 保存失敗
+        """
+        schedule = self._build_schedule(data)
+        with self._lock:
+            self._sync_schedule_file()
+            schedules = list(self.schedules)
+            for index, existing in enumerate(schedules):
+                if existing.id == schedule_id:
+                    break
+            else:
+                return None
+            schedules[index] = schedule.copy(id=schedule_id)
+            if not self._commit_schedules(schedules):
+                raise IOError("保存播放計劃失敗")
+        self._update_tracked_files(self.schedules)
+        return schedules[index]
+
+    def delete_schedule(self, schedule_id):
+        """
+        刪除排程並保存
+        :return: 是否找到並刪除
+        :raises IOError: 保存失敗
+        """
+        with self._lock:
+            self._sync_schedule_file()
+            schedules = [s for s in self.schedules if s.id != schedule_id]
+            if len(schedules) == len(self.schedules):
+                return False
+            if not self._commit_schedules(schedules):
+                raise IOError("保存播放計劃失敗")
+        self._update_tracked_files(self.schedules)
+        return True
+
+    def _update_tracked_files(self, schedules):
+        referenced = [f for s in schedules for f in s.files]
+        resolved = self._expand_files(referenced)
+        self.file_verifier.set_paths(resolved)
+        self.transcoder.set_paths(resolved)
+        # 音訊庫內的檔案已在本機，不需要鏡像
+        self.mirror.set_paths(f for f in expand_playlists(referenced) if not is_content_ref(f))
+
+    def find_schedule(self, schedule_id):
+        """依ID取得排程，不存在時為None"""
+        with self._lock:
+            for schedule in self.schedules:
+                if schedule.id == schedule_id:
+                    return schedule
+        return None
+
+    # ------------------------------------------------------------------ #
+    # 播放
+    # ------------------------------------------------------------------ #
+    def _is_file_playable(self, file_path):
+        """檔案可播放：來源可用、已有轉檔結果，或已有本機鏡像副本"""
+        return (self.file_verifier.is_available(file_path)
+                or self.transcoder.has_rendition(file_path)
+                or self.mirror.has_copy(file_path))
+
+    def _resolve_playback_path(self, file_path):
+        """取得實際播放路徑：優先使用轉檔結果，其次為本機鏡像副本"""
+        rendition = self.transcoder.resolve(file_path)
+        if rendition != file_path:
+            return rendition
+        return self.mirror.resolve(file_path)
+
+    def _expand_files(self, files):
+        """將排程檔案轉為實際路徑：內容ID轉為音訊庫路徑，播放清單展開為其中的檔案"""
+        return expand_playlists(self.library.resolve_paths(files))
+
+    def _on_schedule_trigger(self, schedule):
+        """排程觸發（排程器執行緒）"""
+        self.events.publish('trigger', schedule=schedule.id, name=schedule.name, time=schedule.time)
+        if not self.play_schedule(schedule):
+            log.warning("播放失敗：沒有可播放的檔案", schedule=schedule.id, name=schedule.name)
+            self.events.publish('error', schedule=schedule.id, message='沒有可播放的檔案')
+
+    def play_schedule(self, schedule):
+        """
+        播放排程：目前正在播放時排入待播佇列
+        :return: 是否有可播放的檔案
+        """
+        files = [f for f in self._expand_files(schedule.files) if self._is_file_playable(f)]
+        if not files:
+            return False
+        with self._lock:
+            if self.player.is_playing or self.player.get_queue_size() > 0:
+                self.pending_schedules.append((schedule, files))
+                log.info("等待播放", schedule=schedule.id, name=schedule.name, pending=len(self.pending_schedules))
+                self._queue_changed()
+                return True
+            self.current_schedule = schedule
+            log.info("正在播放", schedule=schedule.id, name=schedule.name)
+            self.player.enqueue_files(files)
+            self._queue_changed()
+        return True
+
+    def _queue_changed(self):
+        """播放佇列或待播排程變化（呼叫端持有鎖）"""
+        self._touch()
+        current = self.current_schedule
+        self.events.publish(
+            'queue',
+            current_schedule=current.id if current else None,
+            queue_size=self.player.get_queue_size(),
+            pending=[schedule.id for schedule, _ in self.pending_schedules]
+        )
+
+    def stop_playback(self):
+        """停止播放並清空待播佇列"""
+        with self._lock:
+            self.pending_schedules.clear()
+            self.current_schedule = None
+            self.player.stop()
+            self._queue_changed()
+
+    def _on_playback_start(self, file_path):
+        log.info("播放中", file=self.library.display_name(file_path))
+        self._touch()
+        current = self.current_schedule
+        self.events.publish('start', file=file_path, schedule=current.id if current else None)
+
+    def _on_playback_error(self, file_path, message):
+        self.events.publish('error', file=file_path, message=message)
+
+    def _on_playback_end(self):
+        """播放結束（播放執行緒）：佇列播完後開始下一個待播排程"""
+        # 回調時播放器仍標示為播放中，只依佇列判斷
+        self._touch()
+        self.events.publish('end', file=self.player.current_file)
+        if self.player.get_queue_size():
+            return
+        with self._lock:
+            if not self.pending_schedules:
+                if self.current_schedule is not None:
+                    self.current_schedule = None
+                    self._queue_changed()
+                return
+            schedule, files = self.pending_schedules.popleft()
+            self.current_schedule = schedule
+            log.info("正在播放", schedule=schedule.id, name=schedule.name)
+            self.player.enqueue_files(files)
+            self._queue_changed()
+
+    # ------------------------------------------------------------------ #
+    # 控制通道
+    # ------------------------------------------------------------------ #
+    def status(self):
+        """目前狀態摘要"""
+        with self._lock:
+            current = self.current_schedule
+            pending = [schedule.id for schedule, _ in self.pending_schedules]
+            count = len(self.schedules)
+        next_info = self.scheduler.get_next_play_time()
+        return {
+            'schedules': count,
+            'playing': self.player.is_playing,
+            'current_file': self.player.current_file,
+            'current_schedule': current.id if current else None,
+            'queue_size': self.player.get_queue_size(),
+            'pending_schedules': pending,
+            'next_play': {
+                'time': next_info['time'],
+                'schedule': next_info['schedule'].id,
+                'days': next_info.get('days', 0),
+            } if next_info else None,
+            'uptime': round(time.time() - self.started_at, 1) if self.started_at else 0,
+            'sync': self.sync.status() if self.sync else None,
+        }
+
+    def sync_status(self):
+        """
+        本節點與所有節點的同步狀態（會讀取共用資料夾）
+        :return: {'node', 'fleet'}，未啟用同步時為None
+        """
+        if self.sync is None:
+            return None
+        return {'node': self.sync.status(), 'fleet': fleet_status(self.sync.shared_dir)}
+
+    def health(self):
+        """健康檢查：背景服務是否運作中"""
+        return {
+            'scheduler': self.scheduler.running,
+            'file_verifier': self.file_verifier.running,
+            'uptime': round(time.time() - self.started_at, 1) if self.started_at else 0,
+        }
+
+    def queue_snapshot(self):
+        """播放佇列與待播排程"""
+        with self._lock:
+            current = self.current_schedule
+            pending = [
+                {'schedule': schedule.id, 'name': schedule.name, 'files': len(files)}
+                for schedule, files in self.pending_schedules
+            ]
+        return {
+            'current_schedule': current.id if current else None,
+            'current_file': self.player.current_file,
+            'playing': self.player.is_playing,
+            'queue_size': self.player.get_queue_size(),
+            'pending': pending,
+        }
+
+    def schedule_list(self):
+        """全部排程（可寫入JSON的字典）"""
+        with self._lock:
+            schedules = list(self.schedules)
+        return [schedule.to_dict() for schedule in schedules]
+
+    def handle_command(self, command, argument):
+        """
+        處理控制指令（控制通道執行緒）
+        支援：ping、status、reload、play <排程ID>、stop、quit、metrics [檔案路徑]、dump-log [檔案路徑]（路徑限資料目錄內）
+        :return: 回應字典
+        """
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'show':
+            return {'ok': False, 'error': '無介面模式沒有視窗'}
+        if command == 'status':
+            return {'ok': True, 'status': self.status()}
+        if command == 'reload':
+            added, changed, removed = self.reload()
+            return {'ok': True, 'added': added, 'changed': changed, 'removed': removed}
+        if command == 'play':
+            try:
+                schedule_id = int(argument)
+            except ValueError:
+                return {'ok': False, 'error': '需要排程ID'}
+            schedule = self.find_schedule(schedule_id)
+            if schedule is None:
+                return {'ok': False, 'error': f'找不到排程 {schedule_id}'}
+            if not self.play_schedule(schedule):
+                return {'ok': False, 'error': '沒有可播放的檔案'}
+            return {'ok': True}
+        if command == 'stop':
+            self.stop_playback()
+            return {'ok': True}
+        if command == 'quit':
+            self.request_stop()
+            return {'ok': True}
+        if command in ('metrics', 'dump-log'):
+            try:
+                path = resolve_output_path(argument, self.storage.data_dir)
+            except ValueError as e:
+                return {'ok': False, 'error': str(e)}
+            if command == 'metrics':
+                return metrics_command(path or '')
+            return dump_log_command(path or '')
+        return {'ok': False, 'error': f'未知的指令: {command}'}
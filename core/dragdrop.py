@@ -3,6 +3,17 @@
 """
 
 import os
+import stat
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.log import get_logger
+from core.playlist import is_playlist_file, iter_playlist_files
+from core.probe import probe_audio_file, describe_format
+from core.transcoder import can_transcode
+
+log = get_logger('dragdrop')
 
 # Windows支援的檔案格式
 SUPPORTED_AUDIO_FORMATS = {
@@ -12,6 +23,10 @@ SUPPORTED_AUDIO_FORMATS = {
 # 檔案大小限制（100MB）
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB in bytes
 
+# 超過此數量時改用執行緒池並行驗證
+PARALLEL_THRESHOLD = 32
+MAX_VALIDATION_WORKERS = 8
+
 def is_audio_file(file_path):
     """檢查檔案是否為支援的音訊格式"""
     ext = os.path.splitext(file_path)[1].lower()
@@ -35,6 +50,179 @@ def format_file_size(size_bytes):
     else:
         return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
 
+def iter_audio_files(root_dir, cancel_event=None):
+    """
+    遞迴列舉資料夾中的音訊檔案（依副檔名過濾）
+    以 os.scandir 逐層讀取並用堆疊取代遞迴，只保留待處理的資料夾，
+    數萬個檔案的資料夾樹也不會一次載入記憶體
+    :param root_dir: 資料夾路徑
+    :param cancel_event: threading.Event，設定後停止列舉
+    :return: 產生音訊檔案路徑的產生器
+    """
+    pending_dirs = [root_dir]
+    while pending_dirs:
+        current = pending_dirs.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif is_audio_file(entry.name):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError as e:
+            log.warning("無法讀取資料夾", folder=current, error=str(e))
+            continue
+        # 反向加入以維持名稱順序
+        subdirs.sort(reverse=True)
+        pending_dirs.extend(subdirs)
+
+def expand_dropped_paths(paths, cancel_event=None):
+    """
+    展開拖放的路徑：資料夾改為其中的音訊檔案，其餘原樣產生
+    :param paths: 拖放的路徑列表
+    :return: 產生檔案路徑的產生器
+    """
+    for path in paths:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if os.path.isdir(path):
+            yield from iter_audio_files(path, cancel_event)
+        else:
+            yield path
+
+def validate_file(file_path):
+    """
+    驗證單一檔案（只呼叫一次 os.stat，並讀取檔頭辨識格式）
+    :param file_path: 檔案路徑
+    :return: (abs_path, None) 表示有效，否則 (abs_path, 原因)
+    """
+    # 轉換為絕對路徑
+    abs_path = os.path.abspath(file_path)
+    
+    try:
+        st = os.stat(abs_path)
+    except (OSError, ValueError):
+        return abs_path, "檔案不存在"
+    
+    if not stat.S_ISREG(st.st_mode):
+        return abs_path, "不是檔案"
+    if is_playlist_file(abs_path):
+        # 播放清單以路徑引用，其中的檔案由 validate_playlist 檢查
+        return abs_path, None
+    if not is_audio_file(abs_path):
+        return abs_path, "不支援的音訊格式"
+    
+    # 檢查檔案大小
+    if st.st_size > MAX_FILE_SIZE:
+        size_str = format_file_size(st.st_size)
+        max_str = format_file_size(MAX_FILE_SIZE)
+        return abs_path, f"檔案過大 ({size_str})，建議小於 {max_str}"
+    
+    # 依檔頭辨識實際格式，播放器無法解碼且無法轉檔的檔案於匯入時即排除
+    audio_format, playable = probe_audio_file(abs_path, st.st_size, st.st_mtime)
+    if audio_format is None:
+        return abs_path, "無法辨識的音訊內容"
+    if not playable and not can_transcode(audio_format):
+        return abs_path, f"播放器不支援此格式 ({describe_format(audio_format)})"
+    return abs_path, None
+
+def iter_validated_files(file_paths, max_workers=MAX_VALIDATION_WORKERS, cancel_event=None):
+    """
+    逐一產生驗證結果（保持輸入順序）
+    數量少時直接依序驗證；數量多或為產生器時交由執行緒池並行 stat，
+    最多同時進行 max_workers * 4 個，記憶體用量不隨輸入大小增長
+    :param file_paths: 檔案路徑列表或產生器
+    :param max_workers: 執行緒數
+    :param cancel_event: threading.Event，設定後停止驗證
+    :return: 產生 (abs_path, reason) 的產生器，reason 為 None 表示有效
+    """
+    if hasattr(file_paths, '__len__') and len(file_paths) <= PARALLEL_THRESHOLD:
+        for file_path in file_paths:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield validate_file(file_path)
+        return
+    
+    window = max_workers * 4
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for file_path in file_paths:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            pending.append(executor.submit(validate_file, file_path))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+def iter_validation_batches(file_paths, batch_size=100, interval=0.1, cancel_event=None):
+    """
+    將驗證結果分批產生，供介面逐步更新
+    :param batch_size: 每批最多筆數
+    :param interval: 距上一批超過此秒數時即使未滿也先送出
+    :return: 產生 (valid_files, invalid_files) 的產生器
+    """
+    valid_files = []
+    invalid_files = []
+    last_flush = time.monotonic()
+    for abs_path, reason in iter_validated_files(file_paths, cancel_event=cancel_event):
+        if reason is None:
+            valid_files.append(abs_path)
+        else:
+            invalid_files.append((abs_path, reason))
+        now = time.monotonic()
+        if len(valid_files) + len(invalid_files) >= batch_size or now - last_flush >= interval:
+            yield valid_files, invalid_files
+            valid_files, invalid_files = [], []
+            last_flush = now
+    if valid_files or invalid_files:
+        yield valid_files, invalid_files
+
+def validate_playlist(playlist_path, cancel_event=None):
+    """
+    驗證播放清單中的檔案（逐行解析並展開內層播放清單，並行批次 stat）
+    :param playlist_path: 播放清單路徑
+    :param cancel_event: threading.Event，設定後停止驗證
+    :return: (有效檔案數, invalid_files)
+    """
+    valid_count = 0
+    invalid_files = []
+    try:
+        for abs_path, reason in iter_validated_files(iter_playlist_files(playlist_path), cancel_event=cancel_event):
+            if reason is None:
+                valid_count += 1
+            else:
+                invalid_files.append((abs_path, reason))
+    except (IOError, OSError, LookupError) as e:
+        invalid_files.append((playlist_path, f"無法讀取播放清單: {e}"))
+    return valid_count, invalid_files
+
+def check_playlist_batch(valid_files, invalid_files, cancel_event=None):
+    """
+    檢查一批驗證結果中的播放清單（背景執行緒）：清單中的無效項目列入 invalid_files，
+    沒有任何可用檔案的播放清單改列為無效；播放清單本身只以路徑保留在 valid_files
+    """
+    for playlist_path in [f for f in valid_files if is_playlist_file(f)]:
+        valid_count, invalid_entries = validate_playlist(playlist_path, cancel_event)
+        invalid_files.extend(invalid_entries)
+        if not valid_count:
+            valid_files.remove(playlist_path)
+            invalid_files.append((playlist_path, "播放清單沒有可用的檔案"))
+
+
 def validate_dropped_files(file_paths):
     """
     驗證拖放的檔案
@@ -44,24 +232,10 @@ def validate_dropped_files(file_paths):
     valid_files = []
     invalid_files = []
     
-    for file_path in file_paths:
-        # 轉換為絕對路徑
-        abs_path = os.path.abspath(file_path)
-        
-        if not os.path.exists(abs_path):
-            invalid_files.append((abs_path, "檔案不存在"))
-        elif not os.path.isfile(abs_path):
-            invalid_files.append((abs_path, "不是檔案"))
-        elif not is_audio_file(abs_path):
-            invalid_files.append((abs_path, "不支援的音訊格式"))
+    for abs_path, reason in iter_validated_files(file_paths):
+        if reason is None:
+            valid_files.append(abs_path)
         else:
-            # 檢查檔案大小
-            file_size = get_file_size(abs_path)
-            if file_size > MAX_FILE_SIZE:
-                size_str = format_file_size(file_size)
-                max_str = format_file_size(MAX_FILE_SIZE)
-                invalid_files.append((abs_path, f"檔案過大 ({size_str})，建議小於 {max_str}"))
-            else:
-                valid_files.append(abs_path)
+            invalid_files.append((abs_path, reason))
     
     return valid_files, invalid_files
@@ -0,0 +1,129 @@
+"""
+事件廣播
+排程觸發、播放開始與結束、播放錯誤、佇列變化等事件發布給所有訂閱者；
+每個訂閱者有固定上限的緩衝區，緩衝區滿時直接斷開該訂閱者，
+發布端（排程器、播放執行緒）永遠不會等待
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from core.log import get_logger
+
+log = get_logger('events')
+
+# 每個訂閱者預設可累積的事件數
+DEFAULT_BUFFER_SIZE = 256
+
+
+class Subscription:
+    """單一訂閱者的事件緩衝區"""
+
+    def __init__(self, bus, max_buffer, notify=None):
+        """
+        :param bus: 所屬的事件廣播
+        :param max_buffer: 緩衝區上限，超過時斷開訂閱
+        :param notify: 有新事件或訂閱被斷開時的回調函數()，於發布端執行緒呼叫，不可阻塞
+        """
+        self._bus = bus
+        self._buffer = deque()
+        self._max_buffer = max_buffer
+        self._notify = notify
+        self._ready = threading.Event()
+        self.closed = False
+        self.dropped = False  # 因處理太慢被斷開
+
+    def _offer(self, event):
+        """加入事件（呼叫端持有廣播的鎖）；緩衝區已滿時回傳False"""
+        if len(self._buffer) >= self._max_buffer:
+            return False
+        self._buffer.append(event)
+        self._ready.set()
+        if self._notify:
+            self._notify()
+        return True
+
+    def _close(self, dropped=False):
+        self.closed = True
+        self.dropped = dropped
+        self._ready.set()
+        if self._notify:
+            self._notify()
+
+    def drain(self):
+        """取出目前累積的全部事件"""
+        events = []
+        while self._buffer:
+            events.append(self._buffer.popleft())
+        if not self.closed:
+            self._ready.clear()
+            # 清除旗標與新事件同時發生時重新標記
+            if self._buffer:
+                self._ready.set()
+        return events
+
+    def wait(self, timeout=None):
+        """
+        等待事件（阻塞，供一般執行緒使用）
+        :return: 事件列表，逾時為空列表
+        """
+        self._ready.wait(timeout)
+        return self.drain()
+
+    def close(self):
+        """取消訂閱"""
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """事件廣播"""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, max_buffer=DEFAULT_BUFFER_SIZE, notify=None):
+        """
+        新增訂閱者
+        :param max_buffer: 緩衝區上限
+        :param notify: 有新事件時的回調函數()，於發布端執行緒呼叫，不可阻塞
+        :return: Subscription
+        """
+        subscription = Subscription(self, max_buffer, notify)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """移除訂閱者"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+        subscription._close()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event_type, **data):
+        """
+        發布事件（不阻塞）
+        :param event_type: 事件類型，例如 trigger、start、end、error、queue
+        :param data: 事件內容（可轉為JSON的值）
+        """
+        if not self._subscribers:
+            return
+        event = {'id': next(self._ids), 'type': event_type, 'time': time.time(), 'data': data}
+        dropped = []
+        with self._lock:
+            for subscription in self._subscribers:
+                if not subscription._offer(event):
+                    dropped.append(subscription)
+            for subscription in dropped:
+                self._subscribers.remove(subscription)
+        for subscription in dropped:
+            log.warning("事件訂閱者處理過慢，已斷開", max_buffer=subscription._max_buffer)
+            subscription._close(dropped=True)
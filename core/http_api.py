@@ -0,0 +1,396 @@
+"""
+HTTP 管理介面
+在獨立執行緒的 asyncio 事件迴圈上提供排程增刪改、立即播放、停止、佇列查詢與健康檢查；
+狀態查詢回傳依狀態版本快取的 JSON 快照，大量輪詢不會重複計算，也不會阻塞排程器與播放器；
+/events 以 Server-Sent Events 推送排程與播放事件；/metrics 以 Prometheus 文字格式回傳效能指標
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from core.log import get_logger
+from core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+
+log = get_logger('http_api')
+
+# 請求主體上限（位元組）
+MAX_BODY_SIZE = 1024 * 1024
+# 請求行與標頭上限（位元組）
+MAX_HEADER_SIZE = 16 * 1024
+# 快照在狀態未變化時的最長沿用時間（秒；下次播放時間、運作時間會隨時間改變）
+SNAPSHOT_MAX_AGE = 1.0
+# 閒置連線逾時（秒）
+IDLE_TIMEOUT = 30.0
+# 事件串流沒有事件時送出心跳的間隔（秒）
+HEARTBEAT_INTERVAL = 15.0
+# 每個事件串流用戶端可累積的事件數，超過時斷開該用戶端
+EVENT_BUFFER_SIZE = 256
+
+_REASONS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+def is_loopback_host(host):
+    """監聽位址是否只接受本機連線"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class HttpError(Exception):
+    """回應錯誤狀態碼"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HttpControlServer:
+    """HTTP 管理介面伺服器"""
+
+    def __init__(self, controller, host='127.0.0.1', port=8765, token=None):
+        """
+        初始化伺服器
+        :param controller: 提供 health / status / queue_snapshot / schedule_list / add_schedule / update_schedule /
+            delete_schedule / find_schedule / play_schedule / stop_playback、state_version 與 events（EventBus）的服務物件
+        :param host: 監聽位址（預設只接受本機連線，0.0.0.0 開放區域網路）
+        :param port: 監聽埠號，0表示由系統指定
+        :param token: 存取權杖，設定時請求需帶 Authorization: Bearer <權杖>；非本機位址必須設定
+        :raises ValueError: 監聽非本機位址但未設定權杖
+        """
+        if not token and not is_loopback_host(host):
+            raise ValueError(f"HTTP 管理介面監聽 {host} 時必須設定存取權杖")
+        self.controller = controller
+        self.host = host
+        self.requested_port = port
+        self.token = token
+        self.port = None
+        self.loop = None
+        self.server = None
+        self.server_thread = None
+        self._started = threading.Event()
+        self._start_error = None
+        self._snapshots = {}  # 名稱 -> (狀態版本, 建立時間, JSON位元組)
+        self._building = {}  # 名稱 -> 建立中的 Future（同時間的查詢共用）
+
+    # ------------------------------------------------------------------ #
+    # 生命週期
+    # ------------------------------------------------------------------ #
+    def start(self):
+        """在背景執行緒啟動事件迴圈並開始監聽"""
+        if self.server_thread is not None:
+            return
+        self._started.clear()
+        self.server_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.server_thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self.server_thread = None
+            raise self._start_error
+
+    def stop(self):
+        """停止監聽並結束事件迴圈"""
+        if self.server_thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.server_thread.join(timeout=5)
+        self.server_thread = None
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(
+                self._handle_connection, self.host, self.requested_port
+            ))
+        except OSError as e:
+            log.error("HTTP 管理介面啟動失敗", host=self.host, port=self.requested_port, error=str(e))
+            self._start_error = e
+            self._started.set()
+            self.loop.close()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            # 結束仍在等待請求的連線
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    # ------------------------------------------------------------------ #
+    # 連線
+    # ------------------------------------------------------------------ #
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except HttpError as e:
+                    await self._respond(writer, e.status, {'ok': False, 'error': e.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    self._check_token(headers)
+                    if method == 'GET' and path.rstrip('/') in ('/events', '/api/events'):
+                        # 事件串流佔用整條連線直到用戶端斷線
+                        await self._stream_events(writer)
+                        return
+                    status, payload = await self._dispatch(method, path, body)
+                except HttpError as e:
+                    status, payload = e.status, {'ok': False, 'error': e.message}
+                except Exception as e:
+                    log.exception("HTTP 管理介面錯誤", method=method, path=path, error=str(e))
+                    status, payload = 500, {'ok': False, 'error': str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # 逾時、用戶端斷線或伺服器停止
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        讀取一個請求
+        :return: (方法, 路徑, 標頭, 主體)，連線關閉時為None
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(400, '標頭過長')
+        if len(head) > MAX_HEADER_SIZE:
+            raise HttpError(400, '標頭過長')
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HttpError(400, '請求格式錯誤')
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'Content-Length 格式錯誤')
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, '請求主體過大')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), urlsplit(target).path, headers, body
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        content_type = 'application/json; charset=utf-8'
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), PROMETHEUS_CONTENT_TYPE
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Cache-Control: no-store\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _stream_events(self, writer):
+        """
+        以 Server-Sent Events 推送事件
+        發布端只把事件放進此用戶端的緩衝區；用戶端接收太慢、緩衝區滿時由事件廣播斷開
+        """
+        loop = self.loop
+        ready = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # 事件迴圈已結束
+                pass
+
+        subscription = self.controller.events.subscribe(max_buffer=EVENT_BUFFER_SIZE, notify=notify)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                b"Cache-Control: no-store\r\n"
+                b"Connection: close\r\n\r\n"
+                b"retry: 3000\n\n"
+            )
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(ready.wait(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                ready.clear()
+                chunks = []
+                for event in subscription.drain():
+                    data = json.dumps(
+                        {'type': event['type'], 'time': event['time'], **event['data']}, ensure_ascii=False
+                    )
+                    chunks.append(f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n")
+                if chunks:
+                    writer.write(''.join(chunks).encode('utf-8'))
+                    await writer.drain()
+                if subscription.closed:
+                    return
+        finally:
+            subscription.close()
+
+    def _check_token(self, headers):
+        if not self.token:
+            return
+        scheme, _, supplied = headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(
+                supplied.strip().encode('utf-8'), self.token.encode('utf-8')):
+            raise HttpError(401, '需要有效的存取權杖')
+
+    # ------------------------------------------------------------------ #
+    # 路由
+    # ------------------------------------------------------------------ #
+    async def _dispatch(self, method, path, body):
+        """
+        依路徑處理請求
+        :return: (狀態碼, 回應字典、JSON位元組或 Prometheus 文字)
+        """
+        parts = [part for part in path.split('/') if part]
+        if parts and parts[0] == 'api':
+            parts = parts[1:]
+        controller = self.controller
+
+        if parts == ['health']:
+            self._require(method, 'GET')
+            return 200, {'ok': True, 'health': controller.health()}
+        if parts == ['status']:
+            self._require(method, 'GET')
+            return 200, await self._snapshot('status', lambda: {'ok': True, 'status': controller.status()})
+        if parts == ['queue']:
+            self._require(method, 'GET')
+            return 200, await self._snapshot('queue', lambda: {'ok': True, 'queue': controller.queue_snapshot()})
+        if parts == ['metrics']:
+            self._require(method, 'GET')
+            return 200, REGISTRY.render()
+        if parts == ['sync']:
+            self._require(method, 'GET')
+            status = await self._call(controller.sync_status)
+            if status is None:
+                raise HttpError(404, '未啟用排程同步')
+            return 200, dict(status, ok=True)
+        if parts == ['stop']:
+            self._require(method, 'POST')
+            await self._call(controller.stop_playback)
+            return 200, {'ok': True}
+        if parts == ['schedules']:
+            if method == 'GET':
+                return 200, await self._snapshot(
+                    'schedules', lambda: {'ok': True, 'schedules': controller.schedule_list()}
+                )
+            self._require(method, 'POST')
+            schedule = await self._call(controller.add_schedule, self._parse_json(body))
+            return 201, {'ok': True, 'schedule': schedule.to_dict()}
+        if len(parts) in (2, 3) and parts[0] == 'schedules':
+            try:
+                schedule_id = int(parts[1])
+            except ValueError:
+                raise HttpError(404, '排程ID格式錯誤')
+            if len(parts) == 3:
+                if parts[2] != 'play':
+                    raise HttpError(404, '找不到路徑')
+                self._require(method, 'POST')
+                schedule = await self._find(schedule_id)
+                if not await self._call(controller.play_schedule, schedule):
+                    raise HttpError(400, '沒有可播放的檔案')
+                return 200, {'ok': True}
+            if method == 'GET':
+                schedule = await self._find(schedule_id)
+                return 200, {'ok': True, 'schedule': schedule.to_dict()}
+            if method == 'PUT':
+                schedule = await self._call(controller.update_schedule, schedule_id, self._parse_json(body))
+                if schedule is None:
+                    raise HttpError(404, f'找不到排程 {schedule_id}')
+                return 200, {'ok': True, 'schedule': schedule.to_dict()}
+            if method == 'DELETE':
+                if not await self._call(controller.delete_schedule, schedule_id):
+                    raise HttpError(404, f'找不到排程 {schedule_id}')
+                return 200, {'ok': True}
+            raise HttpError(405, f'不支援的方法: {method}')
+        raise HttpError(404, '找不到路徑')
+
+    @staticmethod
+    def _require(method, expected):
+        if method != expected:
+            raise HttpError(405, f'不支援的方法: {method}')
+
+    @staticmethod
+    def _parse_json(body):
+        try:
+            return json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(400, '請求主體必須是JSON')
+
+    async def _find(self, schedule_id):
+        """查詢排程（在執行緒池執行，服務端等待鎖或主執行緒時不阻塞事件迴圈）"""
+        schedule = await self._call(self.controller.find_schedule, schedule_id)
+        if schedule is None:
+            raise HttpError(404, f'找不到排程 {schedule_id}')
+        return schedule
+
+    async def _call(self, func, *args):
+        """在執行緒池執行服務方法（可能讀寫檔案），資料錯誤轉為400"""
+        try:
+            return await self.loop.run_in_executor(None, func, *args)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        except (IOError, OSError) as e:
+            raise HttpError(500, str(e))
+
+    async def _snapshot(self, name, builder):
+        """
+        取得快取的JSON快照：狀態版本未變且未過期時直接沿用，
+        同時到達的查詢共用同一次建立
+        """
+        version = self.controller.state_version
+        cached = self._snapshots.get(name)
+        if cached is not None and cached[0] == version and time.monotonic() - cached[1] < SNAPSHOT_MAX_AGE:
+            return cached[2]
+        building = self._building.get(name)
+        if building is None:
+            building = self.loop.run_in_executor(
+                None, lambda: json.dumps(builder(), ensure_ascii=False).encode('utf-8')
+            )
+            self._building[name] = building
+            try:
+                body = await building
+            finally:
+                del self._building[name]
+            self._snapshots[name] = (version, time.monotonic(), body)
+            return body
+        return await asyncio.shield(building)
@@ -0,0 +1,195 @@
+"""
+內容定址音訊庫
+匯入的音訊以 SHA-256 雜湊儲存於 data/library，相同內容只保存一份；
+排程以內容ID（lib:<雜湊><副檔名>）引用檔案，不受原始路徑影響
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from core.log import get_logger
+from core.playlist import is_playlist_file
+from core.storage import write_json_file
+
+log = get_logger('library')
+
+# 內容ID前綴
+LIBRARY_PREFIX = 'lib:'
+
+# 串流雜湊的區塊大小
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_content_ref(path):
+    """是否為音訊庫內容ID"""
+    return isinstance(path, str) and path.startswith(LIBRARY_PREFIX)
+
+
+class AudioLibrary:
+    """內容定址音訊庫"""
+
+    def __init__(self, root_dir):
+        """
+        初始化音訊庫
+        :param root_dir: 音訊庫目錄（通常為 data/library）
+        """
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, 'objects')
+        self.index_file = os.path.join(root_dir, 'index.json')
+        self._index = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._index = json.load(f).get('objects', {})
+        except (IOError, ValueError):
+            self._index = {}
+
+    def _save_index(self):
+        """寫入索引（持有鎖直到取代完成，同時匯入時不會以較舊的內容覆蓋）"""
+        with self._lock:
+            try:
+                write_json_file(self.index_file, {'objects': self._index}, indent=2)
+            except (IOError, OSError) as e:
+                log.error("保存音訊庫索引失敗", error=str(e))
+
+    def _object_path(self, content_key):
+        """內容鍵（雜湊 + 副檔名）對應的存放路徑，以前兩碼分目錄"""
+        return os.path.join(self.objects_dir, content_key[:2], content_key)
+
+    def import_file(self, source, save_index=True):
+        """
+        匯入檔案：串流計算雜湊，內容已存在時不再複製
+        :param source: 原始檔案路徑
+        :param save_index: 是否立即保存索引（批次匯入時最後再保存一次）
+        :return: 內容ID
+        """
+        if is_content_ref(source) or is_playlist_file(source):
+            # 播放清單以路徑引用（其中的相對路徑依清單所在位置解析），不匯入
+            return source
+
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_key = digest.hexdigest() + os.path.splitext(source)[1].lower()
+        object_path = self._object_path(content_key)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_path = object_path + '.part'
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, object_path)
+
+        with self._lock:
+            entry = self._index.setdefault(content_key, {
+                'name': os.path.basename(source),
+                'size': os.path.getsize(object_path),
+            })
+            entry.setdefault('sources', [])
+            if source not in entry['sources']:
+                entry['sources'].append(source)
+        if save_index:
+            self._save_index()
+        return LIBRARY_PREFIX + content_key
+
+    def import_files(self, sources):
+        """
+        批次匯入，失敗的檔案保留原路徑
+        :return: 與輸入順序對應的內容ID或原路徑列表
+        """
+        results = []
+        for source in sources:
+            try:
+                results.append(self.import_file(source, save_index=False))
+            except (IOError, OSError) as e:
+                log.warning("匯入音訊庫失敗", file=source, error=str(e))
+                results.append(source)
+        self._save_index()
+        return results
+
+    def has_object(self, content_key):
+        """音訊庫中是否已有此內容"""
+        return os.path.exists(self._object_path(content_key))
+
+    def add_object(self, content_key, stream, name, save_index=True):
+        """
+        由串流寫入內容（例如組合包中的檔案），寫入時驗證雜湊
+        :param content_key: 內容鍵（雜湊 + 副檔名）
+        :param stream: 可讀取位元組的檔案物件
+        :param name: 顯示用的原始檔名
+        :param save_index: 是否立即保存索引（批次寫入時最後再呼叫 save_index）
+        :return: 寫入的位元組數
+        :raises ValueError: 內容與雜湊不符
+        """
+        object_path = self._object_path(content_key)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        temp_path = object_path + '.part'
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            if digest.hexdigest() != os.path.splitext(content_key)[0]:
+                raise ValueError(f"內容雜湊不符: {name}")
+            os.replace(temp_path, object_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        with self._lock:
+            self._index.setdefault(content_key, {'name': name, 'size': size})
+        if save_index:
+            self._save_index()
+        return size
+
+    def save_index(self):
+        """保存索引"""
+        self._save_index()
+
+    def object_info(self, content_key):
+        """內容的索引資料（name、size），不在索引中時為None"""
+        with self._lock:
+            entry = self._index.get(content_key)
+            return dict(entry) if entry else None
+
+    def path_for(self, ref):
+        """取得內容ID對應的實際檔案路徑（一般路徑原樣回傳）"""
+        if not is_content_ref(ref):
+            return ref
+        return self._object_path(ref[len(LIBRARY_PREFIX):])
+
+    def resolve_paths(self, refs):
+        """批次取得實際檔案路徑"""
+        return [self.path_for(ref) for ref in refs]
+
+    def display_name(self, ref):
+        """顯示用檔名（內容ID或音訊庫內的檔案顯示匯入時的原始檔名）"""
+        if is_content_ref(ref):
+            entry = self._index.get(ref[len(LIBRARY_PREFIX):])
+            return entry['name'] if entry else ref
+        name = os.path.basename(ref)
+        entry = self._index.get(name)
+        return entry['name'] if entry else name
+
+    def stats(self):
+        """
+        音訊庫統計
+        :return: (物件數, 物件總位元組, 匯入來源數)
+        """
+        with self._lock:
+            entries = list(self._index.values())
+        return (
+            len(entries),
+            sum(entry.get('size', 0) for entry in entries),
+            sum(len(entry.get('sources', ())) for entry in entries),
+        )
@@ -0,0 +1,384 @@
+"""
+結構化記錄
+每筆記錄包含時間、等級、來源、訊息與欄位：
+- 飛行記錄器：固定容量的環狀緩衝區，保存最近的全部記錄（含 DEBUG），寫入不加鎖
+- 記錄檔：背景執行緒以 JSON Lines 寫入，超過大小時輪替；呼叫端只把記錄放入佇列
+- 主控台：INFO 以上同時輸出到標準輸出（打包後的exe沒有標準輸出時略過）
+發生未處理的例外或收到 dump-log 指令時，將飛行記錄器的內容寫入檔案，
+事後可檢查偶發的漏播前後發生了什麼，不需要一直開啟詳細記錄
+"""
+
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name.lower(): level for level, name in LEVEL_NAMES.items()}
+
+# 飛行記錄器預設容量（筆）
+DEFAULT_CAPACITY = 4096
+# 記錄檔輪替大小（位元組）與保留的舊檔數
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+# 寫入端來不及時最多累積的記錄數（超過時捨棄最舊的）
+MAX_PENDING = 10000
+
+LOG_FILE_NAME = 'radioone.jsonl'
+
+
+def parse_level(value):
+    """等級名稱（debug、info…）或數值轉為等級數值"""
+    if isinstance(value, int):
+        return value
+    try:
+        return LEVELS[str(value).lower()]
+    except KeyError:
+        raise ValueError(f"未知的記錄等級: {value}")
+
+
+def record_to_dict(record):
+    """記錄 tuple (時間, 等級, 來源, 訊息, 欄位, 執行緒) 轉為可寫入JSON的字典"""
+    created, level, name, message, fields, thread = record
+    data = {
+        'time': datetime.fromtimestamp(created).isoformat(timespec='milliseconds'),
+        'level': LEVEL_NAMES.get(level, str(level)),
+        'logger': name,
+        'thread': thread,
+        'message': message,
+    }
+    if fields:
+        for key, value in fields.items():
+            data.setdefault(key, value)
+    return data
+
+
+def format_json(record):
+    """一筆記錄的 JSON Lines 文字（不含換行）"""
+    return json.dumps(record_to_dict(record), ensure_ascii=False, default=str)
+
+
+def format_console(record):
+    """主控台顯示文字：訊息後接 key=value 欄位"""
+    message, fields = record[3], record[4]
+    if not fields:
+        return message
+    extras = ' '.join(f"{key}={value}" for key, value in fields.items() if key != 'traceback')
+    text = f"{message} {extras}" if extras else message
+    if 'traceback' in fields:
+        text += '\n' + str(fields['traceback']).rstrip()
+    return text
+
+
+class FlightRecorder:
+    """
+    飛行記錄器：固定容量的環狀緩衝區
+    序號由 itertools.count 取得（在 GIL 下為原子操作），每個寫入端只寫自己的槽位，不需要鎖；
+    讀取時複製全部槽位再依序號排序
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._sequence = itertools.count()
+
+    def record(self, record):
+        seq = next(self._sequence)
+        self._slots[seq % self.capacity] = (seq, record)
+
+    def snapshot(self):
+        """目前保存的記錄（由舊到新）"""
+        slots = [slot for slot in list(self._slots) if slot is not None]
+        slots.sort(key=lambda slot: slot[0])
+        return [record for _seq, record in slots]
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+
+
+class AsyncFileWriter:
+    """背景寫入記錄檔，超過大小時輪替（radioone.jsonl → radioone.jsonl.1 …）"""
+
+    def __init__(self, path, level=INFO, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        """
+        :param path: 記錄檔路徑
+        :param level: 寫入檔案的最低等級
+        :param max_bytes: 輪替大小
+        :param backups: 保留的舊檔數（0表示超過大小時清空）
+        """
+        self.path = path
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self.running = False
+        self.writer_thread = None
+        self._pending = deque(maxlen=MAX_PENDING)
+        self._wake = threading.Event()
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def write(self, record):
+        """放入寫入佇列（呼叫端不做任何磁碟存取）"""
+        if len(self._pending) == MAX_PENDING:
+            self.dropped += 1
+        self._pending.append(record)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.writer_thread = threading.Thread(target=self._writer_worker, daemon=True)
+        self.writer_thread.start()
+
+    def stop(self):
+        """停止背景執行緒，寫完剩餘的記錄後關閉檔案"""
+        if not self.running:
+            return
+        self.running = False
+        self._wake.set()
+        if self.writer_thread and self.writer_thread is not threading.current_thread():
+            self.writer_thread.join(timeout=2)
+        self.writer_thread = None
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def flush(self):
+        """立即寫出佇列中的記錄（呼叫端執行緒）"""
+        with self._io_lock:
+            self._drain()
+
+    def _writer_worker(self):
+        while self.running:
+            self._wake.wait(1.0)
+            self._wake.clear()
+            try:
+                self.flush()
+            except (IOError, OSError) as e:
+                # 記錄檔無法寫入時不能再寫記錄，直接輸出到錯誤輸出
+                if sys.stderr is not None:
+                    print(f"寫入記錄檔失敗: {e}", file=sys.stderr)
+                time.sleep(1)
+
+    def _drain(self):
+        while self._pending:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'ab')
+                self._size = self._file.tell()
+            data = (format_json(self._pending.popleft()) + '\n').encode('utf-8')
+            self._file.write(data)
+            self._size += len(data)
+            if self._size >= self.max_bytes:
+                self._rotate()
+        if self._file is not None:
+            self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        self._size = 0
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class LogManager:
+    """記錄的去向：飛行記錄器、主控台與記錄檔"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.recorder = FlightRecorder(capacity)
+        self.console_level = INFO
+        self.writer = None
+        self.dump_dir = None
+
+    def emit(self, level, name, message, fields):
+        record = (time.time(), level, name, message, fields, threading.current_thread().name)
+        self.recorder.record(record)
+        if level >= self.console_level and sys.stdout is not None:
+            try:
+                print(format_console(record))
+            except (OSError, ValueError, UnicodeError):
+                # 主控台已關閉或無法顯示此文字
+                pass
+        writer = self.writer
+        if writer is not None and level >= writer.level:
+            writer.write(record)
+
+    def configure(self, log_dir, file_level=INFO, console_level=INFO,
+                  max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        """
+        開始寫入記錄檔
+        :param log_dir: 記錄檔與飛行記錄傾印檔的目錄
+        :param file_level: 寫入記錄檔的最低等級（飛行記錄器一律保存全部等級）
+        :param console_level: 輸出到主控台的最低等級
+        :return: 記錄檔路徑
+        """
+        self.close()
+        self.dump_dir = log_dir
+        self.console_level = parse_level(console_level)
+        writer = AsyncFileWriter(os.path.join(log_dir, LOG_FILE_NAME), parse_level(file_level),
+                                 max_bytes=max_bytes, backups=backups)
+        writer.start()
+        self.writer = writer
+        return writer.path
+
+    def close(self):
+        """停止寫入記錄檔（寫完佇列中的記錄）"""
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.stop()
+
+    def dump(self, path=None, reason='request'):
+        """
+        將飛行記錄器的內容寫入檔案（暫存檔取代）
+        :param path: 傾印檔路徑（預設為記錄目錄下的 flight-<時間>.jsonl）
+        :param reason: 傾印原因，寫在第一行
+        :return: 傾印檔路徑，失敗時為None
+        """
+        records = self.recorder.snapshot()
+        if path is None:
+            directory = self.dump_dir or tempfile.gettempdir()
+            path = os.path.join(directory, f"flight-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl")
+        temp_file = path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                header = {'flight_recorder': reason, 'pid': os.getpid(), 'records': len(records),
+                          'dumped_at': datetime.now().isoformat(timespec='milliseconds')}
+                f.write(json.dumps(header, ensure_ascii=False) + '\n')
+                for record in records:
+                    f.write(format_json(record) + '\n')
+            os.replace(temp_file, path)
+        except (IOError, OSError) as e:
+            if sys.stderr is not None:
+                print(f"寫入飛行記錄失敗: {e}", file=sys.stderr)
+            return None
+        if self.writer is not None:
+            try:
+                self.writer.flush()
+            except (IOError, OSError):
+                pass
+        return path
+
+
+class Logger:
+    """具名的記錄來源：log.info("訊息", 欄位=值)"""
+
+    __slots__ = ('name', '_manager')
+
+    def __init__(self, name, manager):
+        self.name = name
+        self._manager = manager
+
+    def debug(self, message, **fields):
+        self._manager.emit(DEBUG, self.name, message, fields)
+
+    def info(self, message, **fields):
+        self._manager.emit(INFO, self.name, message, fields)
+
+    def warning(self, message, **fields):
+        self._manager.emit(WARNING, self.name, message, fields)
+
+    def error(self, message, **fields):
+        self._manager.emit(ERROR, self.name, message, fields)
+
+    def exception(self, message, **fields):
+        """ERROR 等級並附上目前處理中例外的堆疊"""
+        fields['traceback'] = traceback.format_exc()
+        self._manager.emit(ERROR, self.name, message, fields)
+
+
+# 全程式共用的記錄設定
+MANAGER = LogManager()
+_loggers = {}
+
+
+def get_logger(name):
+    """取得具名的記錄來源（同名只建立一次）"""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers.setdefault(name, Logger(name, MANAGER))
+    return logger
+
+
+def configure(log_dir, file_level=INFO, console_level=INFO, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+    """開始寫入記錄檔（見 LogManager.configure）"""
+    return MANAGER.configure(log_dir, file_level, console_level, max_bytes, backups)
+
+
+def shutdown():
+    """寫完佇列中的記錄並關閉記錄檔"""
+    MANAGER.close()
+
+
+def dump_flight_recorder(path=None, reason='request'):
+    """將飛行記錄器的內容寫入檔案（見 LogManager.dump）"""
+    return MANAGER.dump(path, reason)
+
+
+def report_exception(exc_type, exc, tb, where='main'):
+    """
+    記錄未處理的例外並傾印飛行記錄
+    :param where: 發生的位置（main、執行緒名稱、tk）
+    :return: 傾印檔路徑
+    """
+    get_logger('crash').error(
+        f"未處理的例外: {exc_type.__name__}: {exc}", where=where,
+        traceback=''.join(traceback.format_exception(exc_type, exc, tb)))
+    return MANAGER.dump(reason=f'unhandled exception in {where}')
+
+
+def install_exception_hooks():
+    """主執行緒與其他執行緒的未處理例外都記錄並傾印飛行記錄"""
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        if issubclass(exc_type, KeyboardInterrupt):
+            previous_hook(exc_type, exc, tb)
+            return
+        # 堆疊已隨記錄輸出到主控台與記錄檔
+        report_exception(exc_type, exc, tb)
+        shutdown()
+
+    def thread_excepthook(args):
+        if args.exc_type is SystemExit:
+            return
+        where = args.thread.name if args.thread is not None else 'thread'
+        report_exception(args.exc_type, args.exc_value, args.exc_traceback, where)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+
+
+def dump_log_command(argument):
+    """
+    控制指令 dump-log [檔案路徑]：傾印飛行記錄
+    :return: 控制通道回應字典
+    """
+    path = dump_flight_recorder(argument.strip() or None)
+    if path is None:
+        return {'ok': False, 'error': '無法寫入飛行記錄'}
+    return {'ok': True, 'path': os.path.abspath(path)}
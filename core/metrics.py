@@ -0,0 +1,286 @@
+"""
+效能指標
+計數器、量測值與直方圖的登錄表：每次更新只在極短的鎖內做一次加總，可在正式環境常駐開啟；
+以 Prometheus 文字格式匯出（本機控制通道的 GET /metrics、HTTP 管理介面），或寫入檔案
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from core.log import get_logger
+
+log = get_logger('metrics')
+
+# Prometheus 文字格式的 Content-Type
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 直方圖預設分界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class _Metric:
+    """指標共用部分：名稱、說明與依標籤值區分的子指標"""
+
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **labels):
+        """
+        取得指定標籤值的子指標（同一組標籤值只建立一次，可保存起來重複使用）
+        """
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要標籤 {self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        """(標籤, 子指標) 列表"""
+        if not self.labelnames:
+            return [((), self)]
+        with self._lock:
+            items = list(self._children.items())
+        return [(tuple(zip(self.labelnames, key)), child) for key, child in sorted(items)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, child in self._samples():
+            lines.extend(child._render_lines(self.name, labels))
+        return lines
+
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+
+    def _new_child(self):
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def _render_lines(self, name, labels):
+        return [f"{name}_total{_format_labels(labels)} {_format_value(self._value)}"]
+
+
+class Gauge(_Metric):
+    """可增可減的量測值（也可設定匯出時才計算的函數）"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+        self._function = None
+
+    def _new_child(self):
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """匯出時呼叫 function() 取得目前值（None表示取消）"""
+        self._function = function
+
+    @property
+    def value(self):
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception:
+                return float('nan')
+        return self._value
+
+    def _render_lines(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Histogram(_Metric):
+    """分佈統計（累計各分界以下的次數、總和與次數）"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self):
+        """量測一段程式的執行秒數：with histogram.time(): ..."""
+        return _Timer(self)
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    def _render_lines(self, name, labels):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            bucket_labels = labels + (('le', _format_value(float(bound))),)
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_started')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class MetricsRegistry:
+    """指標登錄表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指標 {name} 已註冊為其他類型")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """註冊計數器（同名已存在時回傳既有的指標）"""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """註冊量測值"""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """註冊直方圖"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Prometheus 文字格式"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """
+        寫入檔案（暫存檔取代）
+        :return: 是否成功
+        """
+        temp_file = path + '.tmp'
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(temp_file, path)
+            return True
+        except (IOError, OSError) as e:
+            log.error("寫入效能指標失敗", file=path, error=str(e))
+            return False
+
+
+# 全程式共用的登錄表
+REGISTRY = MetricsRegistry()
+
+
+def metrics_command(argument):
+    """
+    控制指令 metrics [檔案路徑]：回傳目前的效能指標，指定路徑時寫入該檔案
+    :return: 控制通道回應字典
+    """
+    path = argument.strip()
+    if not path:
+        return {'ok': True, 'text': REGISTRY.render()}
+    if not REGISTRY.dump(path):
+        return {'ok': False, 'error': f'無法寫入 {path}'}
+    return {'ok': True, 'path': os.path.abspath(path)}
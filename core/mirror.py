@@ -0,0 +1,297 @@
+"""
+本機鏡像快取模組
+將排程引用的音訊（常位於隨身碟或網路磁碟）於背景複製到本機快取目錄，
+播放時優先讀取本機副本，來源離線時仍可正常廣播；
+容量不足時只淘汰不再被排程引用的鏡像，引用中的檔案本身超過容量時其餘檔案不再鏡像
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from core.log import get_logger
+from core.metrics import REGISTRY
+from core.storage import write_json_file
+
+log = get_logger('mirror')
+
+# 預設快取容量上限（1GB）
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 複製與雜湊的區塊大小
+CHUNK_SIZE = 1024 * 1024
+
+CACHE_REQUESTS = REGISTRY.counter('radioone_cache_requests', '快取查詢次數', ('cache', 'result'))
+_HITS = CACHE_REQUESTS.labels('mirror', 'hit')
+_MISSES = CACHE_REQUESTS.labels('mirror', 'miss')
+
+
+def hash_file(file_path, chunk_size=CHUNK_SIZE):
+    """以串流方式計算檔案的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MirrorCache:
+    """本機鏡像快取（LRU 容量上限）"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, status_lookup=None, on_change=None, interval=300.0):
+        """
+        初始化鏡像快取
+        :param cache_dir: 快取目錄
+        :param max_bytes: 快取容量上限（位元組）
+        :param status_lookup: 查詢來源檔案快取狀態的函數(path) -> FileStatus或None
+        :param on_change: 鏡像內容變化時的回調函數()，於背景執行緒呼叫
+        :param interval: 重新比對來源檔案的間隔（秒）
+        """
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.status_lookup = status_lookup
+        self.on_change = on_change
+        self.interval = interval
+        self.running = False
+        self.mirror_thread = None
+        self._entries = {}
+        self._tracked = set()
+        self._pending = deque()
+        self._queued = set()  # 佇列中或複製中的來源（避免重複排入）
+        self._index_dirty = False  # 最近使用時間有更新、尚未寫入索引
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 保存索引（不阻擋播放端查詢）
+        self._wake = threading.Event()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ------------------------------------------------------------------ #
+    # 索引
+    # ------------------------------------------------------------------ #
+    def _load_index(self):
+        """載入鏡像索引，並移除本機副本已遺失的項目"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except (IOError, ValueError):
+            entries = {}
+        self._entries = {
+            source: entry for source, entry in entries.items()
+            if os.path.exists(self._local_path(entry))
+        }
+
+    def _save_index(self):
+        """
+        寫入鏡像索引（唯一暫存檔取代，避免中斷損毀）；
+        寫入期間持有 _save_lock，同時保存時依取得內容的順序寫入，較舊的內容不會覆蓋較新的
+        """
+        with self._save_lock:
+            with self._lock:
+                data = {'entries': {source: dict(entry) for source, entry in self._entries.items()}}
+                self._index_dirty = False
+            try:
+                write_json_file(self.index_file, data)
+            except (IOError, OSError) as e:
+                log.error("保存鏡像索引失敗", error=str(e))
+
+    def _local_path(self, entry):
+        return os.path.join(self.cache_dir, entry['local'])
+
+    # ------------------------------------------------------------------ #
+    # 背景複製
+    # ------------------------------------------------------------------ #
+    def set_paths(self, paths):
+        """設定需要鏡像的來源檔案，尚未鏡像者排入背景複製"""
+        with self._lock:
+            self._tracked = set(paths)
+            for path in self._tracked:
+                if path not in self._entries and path not in self._queued:
+                    self._queued.add(path)
+                    self._pending.append(path)
+        self._wake.set()
+
+    def start(self):
+        """啟動背景鏡像"""
+        if not self.running:
+            self.running = True
+            self.mirror_thread = threading.Thread(target=self._mirror_worker, daemon=True)
+            self.mirror_thread.start()
+
+    def stop(self):
+        """停止背景鏡像（保存最近使用時間）"""
+        self.running = False
+        self._wake.set()
+        if self._index_dirty:
+            self._save_index()
+
+    def _mirror_worker(self):
+        """鏡像工作執行緒"""
+        while self.running:
+            with self._lock:
+                source = self._pending.popleft() if self._pending else None
+            if source is None:
+                # 播放時更新的最近使用時間於閒置時寫入索引，重新啟動後淘汰順序仍正確
+                if self._index_dirty:
+                    self._save_index()
+                # 佇列清空後定期重新比對，來源更新時重新複製
+                if not self._wake.wait(self.interval):
+                    self._requeue_stale()
+                self._wake.clear()
+                continue
+            try:
+                if self.mirror_file(source):
+                    if self.on_change:
+                        self.on_change()
+            except Exception as e:
+                log.exception("鏡像檔案失敗", file=source, error=str(e))
+            finally:
+                with self._lock:
+                    self._queued.discard(source)
+
+    def _requeue_stale(self):
+        """將內容已變更的來源重新排入複製佇列（已在佇列或複製中的不重複排入）"""
+        with self._lock:
+            for source in self._tracked:
+                if source in self._queued:
+                    continue
+                entry = self._entries.get(source)
+                status = self.status_lookup(source) if self.status_lookup else None
+                if entry is None or (status is not None and status.exists and
+                                     (status.size != entry['size'] or status.mtime != entry['mtime'])):
+                    self._queued.add(source)
+                    self._pending.append(source)
+
+    def mirror_file(self, source):
+        """
+        複製單一來源檔案到快取（複製期間計算雜湊，完成後重新驗證）
+        :return: 是否新增或更新了鏡像
+        """
+        try:
+            st = os.stat(source)
+        except OSError:
+            return False
+        entry = self._entries.get(source)
+        if (entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime
+                and os.path.exists(self._local_path(entry))):
+            return False
+        if st.st_size > self.max_bytes or not self._make_room(st.st_size, keep=source):
+            return False
+
+        name = hashlib.sha1(source.encode('utf-8', 'surrogatepass')).hexdigest()[:20]
+        local_name = name + os.path.splitext(source)[1].lower()
+        local_path = os.path.join(self.cache_dir, local_name)
+        temp_path = local_path + '.part'
+
+        digest = hashlib.sha256()
+        try:
+            with open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            after = os.stat(source)
+            # 複製期間來源被修改，或寫入內容與讀取不符時放棄此次鏡像
+            if after.st_size != st.st_size or after.st_mtime != st.st_mtime:
+                raise IOError("來源檔案於複製期間變更")
+            if hash_file(temp_path) != digest.hexdigest():
+                raise IOError("鏡像檔案雜湊不符")
+            os.replace(temp_path, local_path)
+        except (IOError, OSError) as e:
+            log.warning("鏡像檔案失敗", file=source, error=str(e))
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+
+        with self._lock:
+            self._entries[source] = {
+                'local': local_name,
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'sha256': digest.hexdigest(),
+                'last_used': time.time(),
+            }
+        self._save_index()
+        return True
+
+    def _make_room(self, incoming, keep=None):
+        """
+        依最近使用時間淘汰不再被排程引用的鏡像，直到可容納新檔案
+        引用中的鏡像不淘汰（避免引用的檔案總量超過容量時反覆刪除、複製）
+        :return: 是否有足夠空間
+        """
+        with self._lock:
+            total = sum(entry['size'] for source, entry in self._entries.items() if source != keep)
+            if total + incoming <= self.max_bytes:
+                return True
+            victims = sorted(
+                (item for item in self._entries.items() if item[0] != keep and item[0] not in self._tracked),
+                key=lambda item: item[1]['last_used'],
+            )
+            reclaimable = sum(entry['size'] for _, entry in victims)
+            if total - reclaimable + incoming > self.max_bytes:
+                # 引用中的檔案已佔滿容量，不鏡像此檔案，也不淘汰任何鏡像
+                return False
+            removed = []
+            for source, entry in victims:
+                if total + incoming <= self.max_bytes:
+                    break
+                total -= entry['size']
+                removed.append((source, entry))
+                del self._entries[source]
+        for source, entry in removed:
+            try:
+                os.remove(self._local_path(entry))
+            except OSError:
+                pass
+        if removed:
+            self._save_index()
+        return True
+
+    # ------------------------------------------------------------------ #
+    # 播放端查詢
+    # ------------------------------------------------------------------ #
+    def resolve(self, source):
+        """
+        取得播放用路徑：鏡像有效時回傳本機副本，否則回傳原始路徑
+        來源狀態由 status_lookup 的快取判斷，不存取來源磁碟
+        """
+        entry = self._entries.get(source)
+        if entry is None:
+            if source in self._tracked:
+                _MISSES.inc()
+            return source
+        status = self.status_lookup(source) if self.status_lookup else None
+        if status is not None and status.exists and (
+                status.size != entry['size'] or status.mtime != entry['mtime']):
+            # 來源已更新，鏡像過期
+            _MISSES.inc()
+            return source
+        local_path = self._local_path(entry)
+        if not os.path.exists(local_path):
+            with self._lock:
+                self._entries.pop(source, None)
+            _MISSES.inc()
+            return source
+        entry['last_used'] = time.time()
+        self._index_dirty = True
+        _HITS.inc()
+        return local_path
+
+    def has_copy(self, source):
+        """是否已有本機副本"""
+        return source in self._entries
+
+    def stats(self):
+        """
+        鏡像統計
+        :return: (已鏡像檔案數, 追蹤中檔案數, 已鏡像位元組)
+        """
+        with self._lock:
+            mirrored = [self._entries[p] for p in self._tracked if p in self._entries]
+            return len(mirrored), len(self._tracked), sum(entry['size'] for entry in mirrored)
@@ -9,17 +9,30 @@ import queue
 import os
 import time
 
+from core.log import get_logger
+from core.metrics import REGISTRY
+
+log = get_logger('player')
+
 # 播放佇列最大大小（防止記憶體過度使用）
 MAX_QUEUE_SIZE = 100
 
+LOAD_LATENCY = REGISTRY.histogram('radioone_audio_load_seconds', '載入音訊檔案的時間（秒，含改用原始檔案）')
+PLAYBACK_ERRORS = REGISTRY.counter('radioone_playback_errors', '播放失敗次數')
+QUEUE_DEPTH = REGISTRY.gauge('radioone_play_queue_depth', '播放佇列中等待的檔案數')
+
 class AudioPlayer:
     """音訊播放器類別，支援播放佇列"""
     
-    def __init__(self, on_playback_start=None, on_playback_end=None):
+    def __init__(self, on_playback_start=None, on_playback_end=None, file_checker=None, path_resolver=None,
+                 on_playback_error=None):
         """
         初始化播放器
         :param on_playback_start: 播放開始時的回調函數(file_path)
         :param on_playback_end: 播放結束時的回調函數()
+        :param on_playback_error: 播放失敗時的回調函數(file_path, message)，之後仍會呼叫 on_playback_end
+        :param file_checker: 檢查檔案是否可用的函數(file_path)，預設為 os.path.exists
+        :param path_resolver: 取得實際播放路徑的函數(file_path)，例如本機鏡像副本
         """
         try:
             pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
@@ -31,38 +44,44 @@ class AudioPlayer:
         self.current_file = None
         self.on_playback_start = on_playback_start
         self.on_playback_end = on_playback_end
+        self.on_playback_error = on_playback_error
         self.play_thread = None
         self.stop_flag = False
+        self.file_checker = file_checker or os.path.exists
+        self.path_resolver = path_resolver
         
     def enqueue_files(self, file_paths):
         """
         將檔案加入播放佇列
         :param file_paths: 檔案路徑列表
+        :return: 實際加入佇列的檔案數（佇列已滿或檔案不存在時少於輸入）
         """
         added_count = 0
         skipped_count = 0
         
         for file_path in file_paths:
-            if not os.path.exists(file_path):
-                print(f"檔案不存在，跳過: {file_path}")
+            if not self.file_checker(file_path):
+                log.warning("檔案不存在，跳過", file=file_path)
                 skipped_count += 1
                 continue
             
             # 嘗試加入佇列（如果佇列已滿會拋出Full異常）
             try:
                 self.play_queue.put(file_path, block=False)
-                print(f"已加入佇列: {file_path}")
+                log.info("已加入佇列", file=file_path)
                 added_count += 1
             except queue.Full:
-                print(f"播放佇列已滿（最多100個檔案），跳過: {file_path}")
+                log.warning("播放佇列已滿（最多100個檔案），跳過", file=file_path)
                 skipped_count += 1
+        QUEUE_DEPTH.set(self.play_queue.qsize())
         
         if skipped_count > 0:
-            print(f"警告: {skipped_count} 個檔案無法加入佇列（佇列已滿）")
+            log.warning("部分檔案無法加入佇列", skipped=skipped_count)
         
         # 如果目前沒有在播放，啟動播放執行緒
         if not self.is_playing and self.play_thread is None and added_count > 0:
             self._start_playback_thread()
+        return added_count
     
     def _start_playback_thread(self):
         """啟動播放執行緒"""
@@ -77,6 +96,7 @@ class AudioPlayer:
             try:
                 # 從佇列獲取檔案（阻塞，最多等待1秒）
                 file_path = self.play_queue.get(timeout=1)
+                QUEUE_DEPTH.set(self.play_queue.qsize())
                 if not self.stop_flag:
                     self._play_file(file_path)
                 self.play_queue.task_done()
@@ -84,7 +104,7 @@ class AudioPlayer:
                 # 佇列為空，等待新任務
                 continue
             except Exception as e:
-                print(f"播放工作執行緒錯誤: {e}")
+                log.exception("播放工作執行緒錯誤", error=str(e))
                 continue
     
     def _play_file(self, file_path):
@@ -97,13 +117,25 @@ class AudioPlayer:
             if self.on_playback_start:
                 self.on_playback_start(file_path)
             
-            # 載入並播放音訊
+            # 載入並播放音訊（優先使用鏡像副本，失敗時改用原始路徑）
+            load_started = time.perf_counter()
+            load_path = self.path_resolver(file_path) if self.path_resolver else file_path
             try:
-                pygame.mixer.music.load(file_path)
-                pygame.mixer.music.play()
+                pygame.mixer.music.load(load_path)
             except pygame.error as e:
-                print(f"載入/播放音訊檔案失敗: {file_path}, {e}")
-                raise
+                if load_path == file_path:
+                    log.error("載入音訊檔案失敗", file=file_path, error=str(e))
+                    raise
+                log.warning("載入鏡像副本失敗，改用原始檔案", file=file_path, copy=load_path, error=str(e))
+                try:
+                    pygame.mixer.music.load(file_path)
+                except pygame.error as e:
+                    log.error("載入音訊檔案失敗", file=file_path, error=str(e))
+                    raise
+            load_seconds = time.perf_counter() - load_started
+            LOAD_LATENCY.observe(load_seconds)
+            pygame.mixer.music.play()
+            log.debug("開始播放", file=file_path, path=load_path, load_ms=round(load_seconds * 1000, 1))
             
             # 等待播放完成或被停止
             while pygame.mixer.music.get_busy() and not self.stop_flag:
@@ -112,17 +144,24 @@ class AudioPlayer:
             # 如果被停止，停止播放
             if self.stop_flag:
                 pygame.mixer.music.stop()
+            log.debug("播放結束", file=file_path, stopped=self.stop_flag)
             
             # 觸發播放結束回調
             if self.on_playback_end:
                 self.on_playback_end()
                 
         except pygame.error as e:
-            print(f"播放錯誤: {e}")
+            log.error("播放錯誤", file=file_path, error=str(e))
+            PLAYBACK_ERRORS.inc()
+            if self.on_playback_error:
+                self.on_playback_error(file_path, str(e))
             if self.on_playback_end:
                 self.on_playback_end()
         except Exception as e:
-            print(f"播放檔案時發生錯誤: {file_path}, {e}")
+            log.exception("播放檔案時發生錯誤", file=file_path, error=str(e))
+            PLAYBACK_ERRORS.inc()
+            if self.on_playback_error:
+                self.on_playback_error(file_path, str(e))
             if self.on_playback_end:
                 self.on_playback_end()
         finally:
@@ -157,6 +196,7 @@ class AudioPlayer:
                 self.play_queue.task_done()
             except queue.Empty:
                 break
+        QUEUE_DEPTH.set(0)
         self.is_playing = False
         self.current_file = None
         self.stop_flag = False  # 重置標誌，以便後續可以繼續播放
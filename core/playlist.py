@@ -0,0 +1,178 @@
+"""
+播放清單模組
+讀取 M3U / M3U8 / PLS 播放清單：逐行串流解析，相對路徑以播放清單所在位置為基準；
+清單中的播放清單會一併展開（有層數上限，略過循環引用）；
+排程只保存播放清單路徑，需要時才展開，展開結果依檔案大小與修改時間快取
+"""
+
+import locale
+import os
+import threading
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from core.log import get_logger
+from core.metrics import REGISTRY
+
+log = get_logger('playlist')
+
+# 支援的播放清單格式
+PLAYLIST_FORMATS = {'.m3u', '.m3u8', '.pls'}
+
+# 判斷編碼時讀取的位元組數
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# 播放清單中引用其他播放清單時，最多展開的層數
+MAX_PLAYLIST_DEPTH = 3
+
+# 路徑 -> (大小, 修改時間, 內層播放清單的 (路徑, 大小, 修改時間), 展開後的檔案)
+_expanded_cache = {}
+_cache_lock = threading.Lock()
+
+CACHE_REQUESTS = REGISTRY.counter('radioone_cache_requests', '快取查詢次數', ('cache', 'result'))
+_HITS = CACHE_REQUESTS.labels('playlist', 'hit')
+_MISSES = CACHE_REQUESTS.labels('playlist', 'miss')
+
+
+def is_playlist_file(file_path):
+    """是否為支援的播放清單"""
+    return isinstance(file_path, str) and os.path.splitext(file_path)[1].lower() in PLAYLIST_FORMATS
+
+
+def _detect_encoding(file_path):
+    """
+    判斷播放清單編碼：.m3u8 固定為 UTF-8；
+    其他格式先試 UTF-8，無法解碼時使用系統編碼（例如 Windows 上的 cp950）
+    """
+    if file_path.lower().endswith('.m3u8'):
+        return 'utf-8-sig'
+    with open(file_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # 取樣結尾剛好截斷多位元組字元時仍視為 UTF-8
+        if e.start < len(sample) - 3:
+            return locale.getpreferredencoding(False)
+    return 'utf-8-sig'
+
+
+def _resolve_entry(entry, base_dir):
+    """
+    將播放清單項目轉為絕對路徑
+    :return: 絕對路徑，網路串流等無法播放的項目回傳None
+    """
+    entry = entry.strip()
+    if not entry:
+        return None
+    if entry.lower().startswith('file:'):
+        entry = url2pathname(unquote(urlparse(entry).path))
+    elif '://' in entry:
+        return None
+    entry = os.path.expanduser(entry)
+    if not os.path.isabs(entry):
+        entry = os.path.join(base_dir, entry)
+    return os.path.normpath(entry)
+
+
+def iter_playlist(playlist_path):
+    """
+    逐行解析播放清單（不一次讀入整個檔案）
+    :param playlist_path: 播放清單路徑
+    :return: 產生檔案絕對路徑的產生器
+    """
+    base_dir = os.path.dirname(os.path.abspath(playlist_path))
+    is_pls = playlist_path.lower().endswith('.pls')
+    encoding = _detect_encoding(playlist_path)
+    with open(playlist_path, 'r', encoding=encoding, errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if is_pls:
+                key, sep, value = line.partition('=')
+                if not sep or not key.strip().lower().startswith('file'):
+                    continue
+                line = value
+            elif line.startswith('#'):
+                continue
+            path = _resolve_entry(line, base_dir)
+            if path is not None:
+                yield path
+
+
+def iter_playlist_files(playlist_path, nested=None, _depth=0, _seen=frozenset()):
+    """
+    逐行解析播放清單，其中的播放清單一併展開
+    超過 MAX_PLAYLIST_DEPTH 層或循環引用的播放清單略過，內層播放清單無法讀取時也略過
+    :param playlist_path: 播放清單路徑
+    :param nested: 提供列表時加入讀取過的內層播放清單路徑
+    :return: 產生檔案絕對路徑的產生器
+    :raises IOError, OSError, LookupError: 最外層的播放清單無法讀取
+    """
+    seen = _seen | {os.path.normcase(os.path.abspath(playlist_path))}
+    for path in iter_playlist(playlist_path):
+        if not is_playlist_file(path):
+            yield path
+            continue
+        if _depth >= MAX_PLAYLIST_DEPTH or os.path.normcase(path) in seen:
+            log.warning("略過巢狀過深或循環引用的播放清單", playlist=playlist_path, entry=path)
+            continue
+        if nested is not None:
+            nested.append(path)
+        try:
+            yield from iter_playlist_files(path, nested, _depth + 1, seen)
+        except (IOError, OSError, LookupError) as e:
+            log.warning("讀取播放清單失敗", file=path, error=str(e))
+
+
+def _signature(path):
+    """檔案的 (大小, 修改時間)，不存在時為None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+def read_playlist(playlist_path):
+    """
+    取得播放清單展開後的檔案（本身與內層播放清單都未變時使用快取）
+    :return: 檔案絕對路徑 tuple，無法讀取時為空 tuple
+    """
+    try:
+        st = os.stat(playlist_path)
+    except OSError:
+        return ()
+    with _cache_lock:
+        cached = _expanded_cache.get(playlist_path)
+    if (cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime
+            and all(_signature(path) == signature for path, signature in cached[2])):
+        _HITS.inc()
+        return cached[3]
+    _MISSES.inc()
+    nested = []
+    try:
+        entries = tuple(iter_playlist_files(playlist_path, nested))
+    except (IOError, OSError, LookupError) as e:
+        log.warning("讀取播放清單失敗", file=playlist_path, error=str(e))
+        return ()
+    nested_signatures = tuple((path, _signature(path)) for path in nested)
+    with _cache_lock:
+        _expanded_cache[playlist_path] = (st.st_size, st.st_mtime, nested_signatures, entries)
+    return entries
+
+
+def expand_playlists(paths):
+    """
+    將路徑列表中的播放清單展開為其中的檔案，其他路徑原樣保留
+    :param paths: 檔案或播放清單路徑
+    :return: 展開後的檔案列表
+    """
+    result = []
+    for path in paths:
+        if is_playlist_file(path):
+            result.extend(read_playlist(path))
+        else:
+            result.append(path)
+    return result
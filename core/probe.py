@@ -0,0 +1,124 @@
+"""
+音訊內容辨識模組
+讀取檔案開頭數KB的特徵位元組判斷實際的容器與編碼，
+並快取「此播放後端能否播放」的結果，讓無法播放的檔案在匯入時就被發現
+"""
+
+import threading
+from collections import OrderedDict
+
+# 讀取的檔頭大小
+HEADER_SIZE = 4096
+
+# pygame.mixer.music（SDL_mixer）可直接播放的格式
+PLAYABLE_FORMATS = {'mp3', 'wav', 'ogg', 'opus', 'flac'}
+
+# 顯示用格式名稱
+FORMAT_NAMES = {
+    'mp3': 'MP3',
+    'wav': 'WAV',
+    'ogg': 'Ogg Vorbis',
+    'opus': 'Ogg Opus',
+    'flac': 'FLAC',
+    'mp4': 'MP4/M4A',
+    'aac': 'AAC',
+    'asf': 'WMA',
+}
+
+_ASF_GUID = bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c')
+
+# 辨識結果快取的最大筆數（超過時捨棄最久未用的）
+MAX_CACHE_ENTRIES = 4096
+
+# 路徑 -> ((大小, 修改時間), (格式, 可播放))；檔案被取代（大小或修改時間不同）時重新辨識
+_verdict_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _skip_id3(header):
+    """略過 ID3v2 標籤，回傳音訊資料起點"""
+    if header[:3] != b'ID3' or len(header) < 10:
+        return 0
+    size = ((header[6] & 0x7F) << 21) | ((header[7] & 0x7F) << 14) | ((header[8] & 0x7F) << 7) | (header[9] & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def sniff_format(header):
+    """
+    依檔頭判斷音訊格式
+    :param header: 檔案開頭的位元組
+    :return: 格式代碼（見 FORMAT_NAMES），無法辨識時為None
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[:4] == b'OggS':
+        if b'OpusHead' in header[:128]:
+            return 'opus'
+        if b'\x01vorbis' in header[:128]:
+            return 'ogg'
+        return None
+    if header[4:8] == b'ftyp':
+        return 'mp4'
+    if header[:16] == _ASF_GUID:
+        return 'asf'
+
+    start = _skip_id3(header)
+    if start:
+        # ID3 標籤後仍可能是 AAC，但絕大多數為 MP3；標籤超過讀取範圍時視為 MP3
+        if start + 2 > len(header):
+            return 'mp3'
+        if header[start:start + 4] == b'fLaC':
+            return 'flac'
+    frame = header[start:start + 2]
+    if len(frame) == 2 and frame[0] == 0xFF:
+        if frame[1] & 0xF6 == 0xF0:
+            # ADTS（layer 位元為 00）
+            return 'aac'
+        if frame[1] & 0xE0 == 0xE0 and frame[1] & 0x06:
+            return 'mp3'
+    return None
+
+
+def probe_audio_file(file_path, size=None, mtime=None):
+    """
+    辨識檔案格式並判斷播放器能否播放（結果依路徑快取，大小或修改時間不同時重新辨識）
+    :param file_path: 檔案路徑
+    :param size: 已知的檔案大小（省略時不以大小區分快取）
+    :param mtime: 已知的修改時間
+    :return: (格式代碼或None, 是否可播放)
+    """
+    content = (size, mtime)
+    with _cache_lock:
+        cached = _verdict_cache.get(file_path)
+        if cached is not None and cached[0] == content:
+            _verdict_cache.move_to_end(file_path)
+            return cached[1]
+
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+    except OSError:
+        return None, False
+
+    audio_format = sniff_format(header)
+    verdict = (audio_format, audio_format in PLAYABLE_FORMATS)
+    with _cache_lock:
+        _verdict_cache[file_path] = (content, verdict)
+        _verdict_cache.move_to_end(file_path)
+        while len(_verdict_cache) > MAX_CACHE_ENTRIES:
+            _verdict_cache.popitem(last=False)
+    return verdict
+
+
+def describe_format(audio_format):
+    """格式代碼轉為顯示名稱"""
+    return FORMAT_NAMES.get(audio_format, '未知格式')
+
+
+def clear_cache():
+    """清除辨識結果快取"""
+    with _cache_lock:
+        _verdict_cache.clear()
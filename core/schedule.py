@@ -0,0 +1,367 @@
+"""
+播放排程資料模型
+以 __slots__ 精簡記憶體，並預先解析時間與星期，供排程器與介面直接使用
+"""
+
+import json
+import struct
+import sys
+
+from core.log import get_logger
+
+log = get_logger('schedule')
+
+# 星期名稱（索引與 datetime.weekday() 一致，0=週一）
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+WEEKDAY_BITS = {day: 1 << index for index, day in enumerate(WEEKDAYS)}
+ALL_DAYS_MASK = (1 << len(WEEKDAYS)) - 1
+
+# 序列化格式版本（1：精簡欄位；2：缺少 duration_seconds 表示時長尚未計算）
+SCHEDULE_FORMAT_VERSION = 2
+
+# 時長尚未計算的標記（與「已計算但無法取得」的None區分）
+DURATION_PENDING = object()
+
+# 二進位格式：檔頭 + 字串表 + 排程紀錄
+# 版本（2：時長為整數秒；3：時長以 double 儲存，保留小數秒）
+BINARY_MAGIC = b'RPS'
+BINARY_FORMAT_VERSION = 3
+_HEADER = struct.Struct('<3sBII')    # magic, version, 字串數, 排程數
+_STRING_LEN = struct.Struct('<I')
+_RECORD = struct.Struct('<iIHBdH')   # id, name索引, 分鐘, 星期遮罩, 時長, 檔案數
+_RECORD_V2 = struct.Struct('<iIHBiH')
+_DURATION_NONE = -1
+_DURATION_PENDING = -2
+
+
+def parse_time(time_str):
+    """
+    將 "HH:MM" 轉為當日分鐘數
+    :param time_str: 時間字串
+    :return: 0 ~ 1439 的整數
+    """
+    hour_text, _, minute_text = str(time_str).partition(':')
+    hour = int(hour_text)
+    minute = int(minute_text)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"時間超出範圍: {time_str}")
+    return hour * 60 + minute
+
+
+def format_time(minute_of_day):
+    """將當日分鐘數格式化為 "HH:MM" """
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+def days_to_mask(days):
+    """將星期名稱列表轉為位元遮罩（未知名稱會被忽略）"""
+    mask = 0
+    for day in days or ():
+        mask |= WEEKDAY_BITS.get(day, 0)
+    return mask
+
+
+def mask_to_days(mask):
+    """將位元遮罩轉回星期名稱列表（依週一至週日排序）"""
+    return [day for day in WEEKDAYS if mask & WEEKDAY_BITS[day]]
+
+
+class Schedule:
+    """單一播放排程"""
+
+    __slots__ = ('id', 'name', 'minute_of_day', 'days_mask', 'files', 'duration_seconds')
+
+    def __init__(self, schedule_id, name, minute_of_day, days_mask, files=(), duration_seconds=DURATION_PENDING):
+        """
+        初始化排程
+        :param schedule_id: 排程ID
+        :param name: 排程名稱
+        :param minute_of_day: 播放時間（當日分鐘數）
+        :param days_mask: 星期位元遮罩（bit0=週一）
+        :param files: 音訊檔案路徑
+        :param duration_seconds: 總時長（秒），None表示無法取得
+        """
+        self.id = schedule_id
+        self.name = name
+        self.minute_of_day = minute_of_day
+        self.days_mask = days_mask
+        # 路徑字串駐留，相同檔案在多個排程間共用同一物件
+        self.files = tuple(sys.intern(str(f)) for f in files)
+        self.duration_seconds = duration_seconds
+
+    @classmethod
+    def from_dict(cls, data):
+        """由舊版字典格式建立排程（相容 duration / duration_seconds）"""
+        if 'duration_seconds' in data:
+            duration = data['duration_seconds']
+        elif data.get('duration'):
+            duration = data['duration']
+        else:
+            duration = DURATION_PENDING
+        return cls(
+            data.get('id'),
+            data.get('name', ''),
+            parse_time(data.get('time', '')),
+            days_to_mask(data.get('days', [])),
+            data.get('files', []),
+            duration,
+        )
+
+    @classmethod
+    def coerce(cls, schedule):
+        """接受 Schedule 或字典，統一回傳 Schedule"""
+        if isinstance(schedule, cls):
+            return schedule
+        return cls.from_dict(schedule)
+
+    def to_dict(self):
+        """轉為可寫入JSON的字典"""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'days': self.days,
+            'time': self.time,
+            'files': list(self.files),
+        }
+        if self.has_duration:
+            data['duration_seconds'] = self.duration_seconds
+        return data
+
+    def copy(self, **changes):
+        """複製排程，並套用指定欄位的變更"""
+        # 直接複製欄位（檔案路徑已駐留，不需再經過 __init__）
+        clone = Schedule.__new__(Schedule)
+        clone.id = self.id
+        clone.name = self.name
+        clone.minute_of_day = self.minute_of_day
+        clone.days_mask = self.days_mask
+        clone.files = self.files
+        clone.duration_seconds = self.duration_seconds
+        for field, value in changes.items():
+            if field == 'files':
+                value = tuple(sys.intern(str(f)) for f in value)
+            setattr(clone, field, value)
+        return clone
+
+    @property
+    def time(self):
+        """播放時間字串 "HH:MM" """
+        return format_time(self.minute_of_day)
+
+    @property
+    def days(self):
+        """播放星期名稱列表"""
+        return mask_to_days(self.days_mask)
+
+    @property
+    def has_duration(self):
+        """時長是否已計算過"""
+        return self.duration_seconds is not DURATION_PENDING
+
+    def runs_on(self, weekday_index):
+        """是否在指定星期播放（0=週一）"""
+        return bool(self.days_mask & (1 << weekday_index))
+
+    def _key(self):
+        duration = self.duration_seconds if self.has_duration else _DURATION_PENDING
+        return (self.id, self.name, self.minute_of_day, self.days_mask, self.files, duration)
+
+    def __eq__(self, other):
+        if not isinstance(other, Schedule):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Schedule(id={self.id!r}, name={self.name!r}, time={self.time}, days={self.days!r}, files={len(self.files)})"
+
+
+def schedule_from_request(data):
+    """
+    由管理介面的請求資料建立排程（ID與時長由呼叫端指定）
+    :param data: {'name', 'time', 'days', 'files'}
+    :raises ValueError: 資料不完整或格式錯誤
+    """
+    if not isinstance(data, dict):
+        raise ValueError("排程資料必須是物件")
+    files = data.get('files')
+    if not isinstance(files, list) or not files or not all(isinstance(f, str) for f in files):
+        raise ValueError("請至少指定一個音訊檔案")
+    schedule = Schedule.from_dict({
+        'id': None,
+        'name': str(data.get('name') or '播放排程'),
+        'time': data.get('time', ''),
+        'days': data.get('days') or [],
+        'files': files,
+    })
+    if not schedule.days_mask:
+        raise ValueError("請至少指定一天")
+    return schedule
+
+
+def encode_schedules(schedules):
+    """
+    將排程編碼為帶版本的JSON結構
+    :param schedules: Schedule 列表
+    :return: {"version": N, "schedules": [...]}
+    """
+    return {
+        'version': SCHEDULE_FORMAT_VERSION,
+        'schedules': [schedule.to_dict() for schedule in schedules],
+    }
+
+
+def decode_schedules(data):
+    """
+    解碼JSON結構為 Schedule 列表，格式錯誤的排程會被略過
+    :param data: load_schedules 回傳的字典
+    :return: Schedule 列表
+    """
+    version = data.get('version', 0)
+    if version > SCHEDULE_FORMAT_VERSION:
+        log.warning("排程格式版本較新，可能無法完整讀取", version=version)
+
+    schedules = []
+    for item in data.get('schedules', []):
+        try:
+            schedules.append(Schedule.from_dict(item))
+        except (TypeError, ValueError, AttributeError) as e:
+            log.warning("略過格式錯誤的排程", item=repr(item), error=str(e))
+    return schedules
+
+
+def merge_schedules(base, local, remote, prefer='local'):
+    """
+    三方合併排程（以排程ID比對），用於套用排程檔的外部修改而不覆蓋本機修改
+    :param base: 上次與排程檔同步時的排程
+    :param local: 記憶體中的排程（可能含尚未寫入的修改）
+    :param remote: 排程檔目前的排程
+    :param prefer: 兩邊都修改了同一排程時採用的版本，'local' 或 'remote'
+    :return: (合併後的排程列表, 衝突的排程ID列表)
+    """
+    base_by_id = {s.id: s for s in base}
+    local_by_id = {s.id: s for s in local}
+    remote_ids = {s.id for s in remote}
+    merged = []
+    conflicts = []
+    # 依排程檔的順序，本機新增的排程接在後面
+    for theirs in remote:
+        old = base_by_id.get(theirs.id)
+        mine = local_by_id.get(theirs.id)
+        if mine is None:
+            if old is None:
+                merged.append(theirs)  # 外部新增
+            elif old != theirs:
+                # 本機已刪除、外部又修改
+                conflicts.append(theirs.id)
+                if prefer == 'remote':
+                    merged.append(theirs)
+        elif mine == theirs or (old is not None and theirs == old):
+            merged.append(mine)  # 沒有變化，或只有本機修改
+        elif old is not None and mine == old:
+            merged.append(theirs)  # 只有外部修改
+        else:
+            conflicts.append(theirs.id)
+            merged.append(theirs if prefer == 'remote' else mine)
+    for mine in local:
+        if mine.id in remote_ids:
+            continue
+        old = base_by_id.get(mine.id)
+        if old is None:
+            merged.append(mine)  # 本機新增
+        elif old != mine:
+            # 外部已刪除、本機又修改
+            conflicts.append(mine.id)
+            if prefer != 'remote':
+                merged.append(mine)
+    return merged, conflicts
+
+
+def dumps_schedules(schedules):
+    """將排程序列化為JSON字串"""
+    return json.dumps(encode_schedules(schedules), ensure_ascii=False, indent=2)
+
+
+def loads_schedules(text):
+    """由JSON字串還原排程"""
+    return decode_schedules(json.loads(text))
+
+
+def encode_binary(schedules):
+    """
+    將排程編碼為精簡二進位格式（重複的名稱與路徑只存一次）
+    :param schedules: Schedule 列表
+    :return: bytes
+    """
+    strings = []
+    index = {}
+
+    def string_id(text):
+        position = index.get(text)
+        if position is None:
+            position = index[text] = len(strings)
+            strings.append(text)
+        return position
+
+    records = []
+    for schedule in schedules:
+        if not schedule.has_duration:
+            duration = _DURATION_PENDING
+        elif schedule.duration_seconds is None:
+            duration = _DURATION_NONE
+        else:
+            duration = float(schedule.duration_seconds)
+        file_ids = [string_id(path) for path in schedule.files]
+        records.append(_RECORD.pack(
+            schedule.id, string_id(schedule.name), schedule.minute_of_day,
+            schedule.days_mask, duration, len(file_ids),
+        ))
+        records.append(struct.pack(f'<{len(file_ids)}I', *file_ids))
+
+    parts = [_HEADER.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION, len(strings), len(schedules))]
+    for text in strings:
+        raw = text.encode('utf-8')
+        parts.append(_STRING_LEN.pack(len(raw)))
+        parts.append(raw)
+    parts.extend(records)
+    return b''.join(parts)
+
+
+def decode_binary(payload):
+    """
+    解碼 encode_binary 產生的資料
+    :param payload: bytes
+    :return: Schedule 列表
+    """
+    view = memoryview(payload)
+    magic, version, string_count, schedule_count = _HEADER.unpack_from(view, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError("不是排程二進位格式")
+    if version > BINARY_FORMAT_VERSION:
+        raise ValueError(f"不支援的排程格式版本: {version}")
+    record = _RECORD if version >= 3 else _RECORD_V2
+
+    offset = _HEADER.size
+    strings = []
+    for _ in range(string_count):
+        (length,) = _STRING_LEN.unpack_from(view, offset)
+        offset += _STRING_LEN.size
+        strings.append(sys.intern(str(view[offset:offset + length], 'utf-8')))
+        offset += length
+
+    schedules = []
+    for _ in range(schedule_count):
+        schedule_id, name_id, minute, mask, duration, file_count = record.unpack_from(view, offset)
+        offset += record.size
+        file_ids = struct.unpack_from(f'<{file_count}I', view, offset)
+        offset += 4 * file_count
+        if duration == _DURATION_PENDING:
+            duration = DURATION_PENDING
+        elif duration == _DURATION_NONE:
+            duration = None
+        schedules.append(Schedule(
+            schedule_id, strings[name_id], minute, mask,
+            [strings[i] for i in file_ids], duration,
+        ))
+    return schedules
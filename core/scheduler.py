@@ -7,6 +7,20 @@ import threading
 import time
 from datetime import datetime
 
+from core.log import get_logger
+from core.metrics import REGISTRY
+from core.schedule import Schedule
+
+log = get_logger('scheduler')
+
+# 兩次檢查的間隔超過此秒數時記錄警告（系統休眠或執行緒被卡住，期間的排程可能漏播）
+MAX_CHECK_GAP = 3.0
+
+TRIGGER_LATENESS = REGISTRY.histogram(
+    'radioone_trigger_lateness_seconds', '排程觸發時間與排定分鐘起點的差距（秒）',
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 5.0, 10.0, 30.0, 60.0))
+TRIGGERS = REGISTRY.counter('radioone_schedule_triggers', '排程觸發次數')
+
 class Scheduler:
     """播放排程器類別"""
     
@@ -22,12 +36,12 @@ class Scheduler:
         self.last_checked_days = {}  # 記錄每個計劃上次觸發的日期，避免同一天重複觸發
     
     def add_schedule(self, schedule):
-        """添加播放計劃"""
-        self.schedules.append(schedule)
+        """添加播放計劃（接受 Schedule 或舊版字典）"""
+        self.schedules.append(Schedule.coerce(schedule))
     
     def remove_schedule(self, schedule_id):
         """移除播放計劃"""
-        self.schedules = [s for s in self.schedules if s.get('id') != schedule_id]
+        self.schedules = [s for s in self.schedules if s.id != schedule_id]
         # 清除該計劃的觸發記錄
         if schedule_id in self.last_checked_days:
             del self.last_checked_days[schedule_id]
@@ -35,16 +49,45 @@ class Scheduler:
     def update_schedule(self, schedule_id, updated_schedule):
         """更新播放計劃"""
         for i, s in enumerate(self.schedules):
-            if s.get('id') == schedule_id:
-                self.schedules[i] = updated_schedule
+            if s.id == schedule_id:
+                self.schedules[i] = Schedule.coerce(updated_schedule)
                 # 清除觸發記錄，允許重新觸發
                 if schedule_id in self.last_checked_days:
                     del self.last_checked_days[schedule_id]
                 break
     
+    def apply_schedules(self, schedules):
+        """
+        依ID比對套用播放計劃，只替換有變化的項目
+        時間或週幾未變的排程保留觸發記錄，避免同一分鐘內重新觸發
+        :param schedules: 完整的播放計劃列表
+        :return: (新增ID列表, 變更ID列表, 移除ID列表)
+        """
+        new_schedules = [Schedule.coerce(s) for s in schedules]
+        old_by_id = {s.id: s for s in self.schedules}
+        new_ids = set()
+        added = []
+        changed = []
+        for schedule in new_schedules:
+            new_ids.add(schedule.id)
+            old = old_by_id.get(schedule.id)
+            if old is None:
+                added.append(schedule.id)
+            elif old != schedule:
+                changed.append(schedule.id)
+                if old.minute_of_day != schedule.minute_of_day or old.days_mask != schedule.days_mask:
+                    # 時間改變，允許重新觸發
+                    self.last_checked_days.pop(schedule.id, None)
+        removed = [schedule_id for schedule_id in old_by_id if schedule_id not in new_ids]
+        for schedule_id in removed:
+            self.last_checked_days.pop(schedule_id, None)
+        
+        self.schedules = new_schedules
+        return added, changed, removed
+    
     def set_schedules(self, schedules):
         """設定所有播放計劃"""
-        self.schedules = schedules
+        self.schedules = [Schedule.coerce(s) for s in schedules]
         self.last_checked_days = {}  # 清除所有觸發記錄
     
     def start(self):
@@ -60,123 +103,91 @@ class Scheduler:
     
     def _scheduler_worker(self):
         """排程器工作執行緒"""
-        # 星期名映射（使用weekday()數字避免語言依賴）
-        weekday_map = {
-            0: 'monday',      # 週一
-            1: 'tuesday',     # 週二
-            2: 'wednesday',   # 週三
-            3: 'thursday',    # 週四
-            4: 'friday',      # 週五
-            5: 'saturday',    # 週六
-            6: 'sunday'       # 週日
-        }
-        
+        last_tick = None
+        checked_minute = None
         while self.running:
             try:
                 now = datetime.now()
-                current_time = now.strftime("%H:%M")
-                # 使用weekday()獲取數字(0=週一, 6=週日)，避免語言依賴
-                current_weekday = weekday_map[now.weekday()]
+                # 使用預先解析的分鐘數與星期遮罩比對，避免每秒重新解析字串
+                current_minute = now.hour * 60 + now.minute
+                current_bit = 1 << now.weekday()
+                
+                tick = time.monotonic()
+                if last_tick is not None and tick - last_tick > MAX_CHECK_GAP:
+                    log.warning("排程檢查間隔過長，期間的排程可能漏播", gap_seconds=round(tick - last_tick, 1))
+                last_tick = tick
+                if current_minute != checked_minute:
+                    # 每分鐘留下一筆，事後可確認排程器當時仍在運作
+                    checked_minute = current_minute
+                    log.debug("排程檢查", minute=now.strftime("%H:%M"), schedules=len(self.schedules))
                 
                 for schedule in self.schedules:
-                    schedule_id = schedule.get('id')
-                    schedule_time = schedule.get('time', '')
-                    schedule_days = schedule.get('days', [])
-                    
                     # 檢查是否匹配當前時間和周幾
-                    if (current_time == schedule_time and 
-                        current_weekday in schedule_days):
+                    if (schedule.minute_of_day == current_minute and
+                            schedule.days_mask & current_bit):
+                        schedule_id = schedule.id
                         
                         # 檢查今天是否已經觸發過（避免重複觸發）
                         today = now.strftime("%Y-%m-%d")
                         last_trigger_date = self.last_checked_days.get(schedule_id)
                         
                         # 使用更精確的時間戳記（包含秒），防止1秒內重複觸發
-                        trigger_key = f"{schedule_id}_{today}_{current_time}"
+                        trigger_key = f"{schedule_id}_{today}_{schedule.time}"
                         last_trigger_time = self.last_checked_days.get(trigger_key)
                         current_timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
                         
                         if last_trigger_date != today or last_trigger_time is None:
                             # 觸發播放
+                            TRIGGER_LATENESS.observe(now.second + now.microsecond / 1e6)
+                            TRIGGERS.inc()
                             if self.on_schedule_trigger:
                                 self.on_schedule_trigger(schedule)
                             # 記錄觸發日期和時間戳
                             self.last_checked_days[schedule_id] = today
                             self.last_checked_days[trigger_key] = current_timestamp
-                            print(f"✓ 觸發播放計劃: {schedule.get('name')} ({schedule_time})")
+                            log.info("✓ 觸發播放計劃", schedule_id=schedule_id, name=schedule.name,
+                                     time=schedule.time, late_seconds=round(now.second + now.microsecond / 1e6, 2))
                 
                 # 每秒檢查一次
                 time.sleep(1)
                 
             except Exception as e:
-                print(f"排程器錯誤: {e}")
+                log.exception("排程器錯誤", error=str(e))
                 time.sleep(1)
     
     def get_next_play_time(self):
-        """獲取下一個播放時間"""
-        if not self.schedules:
-            return None
-        
-        # 星期名映射（使用weekday()數字避免語言依賴）
-        weekday_map = {
-            0: 'monday',      # 週一
-            1: 'tuesday',     # 週二
-            2: 'wednesday',   # 週三
-            3: 'thursday',    # 週四
-            4: 'friday',      # 週五
-            5: 'saturday',    # 週六
-            6: 'sunday'       # 週日
-        }
-        
+        """
+        獲取下一個播放時間
+        :return: {'time', 'schedule'}（今天）或 {'time', 'schedule', 'days'}（N天後），無排程時為None
+        """
         now = datetime.now()
-        current_time = now.time()
-        # 使用weekday()獲取數字(0=週一, 6=週日)，避免語言依賴
-        current_weekday = weekday_map[now.weekday()]
-        
-        next_times = []
+        current_minute = now.hour * 60 + now.minute
+        current_weekday = now.weekday()
         
+        best = None
+        best_delta = None
         for schedule in self.schedules:
-            schedule_time_str = schedule.get('time', '')
-            schedule_days = schedule.get('days', [])
-            
-            if not schedule_time_str or not schedule_days:
+            mask = schedule.days_mask
+            if not mask:
                 continue
             
-            try:
-                schedule_time = datetime.strptime(schedule_time_str, "%H:%M").time()
-                
-                # 檢查是否在今天且還未到時間
-                if current_weekday in schedule_days and schedule_time > current_time:
-                    next_times.append({
-                        'time': schedule_time_str,
-                        'schedule': schedule
-                    })
-                
-                # 檢查下週的播放時間
-                days_ahead = []
-                weekdays = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-                current_index = weekdays.index(current_weekday)
-                
-                for day in schedule_days:
-                    day_index = weekdays.index(day)
-                    if day_index > current_index:
-                        days_ahead.append(day_index - current_index)
-                    else:
-                        days_ahead.append(7 - current_index + day_index)
-                
-                if days_ahead:
-                    min_days = min(days_ahead)
-                    next_times.append({
-                        'time': schedule_time_str,
-                        'schedule': schedule,
-                        'days': min_days
-                    })
-            except ValueError:
-                continue
+            # 從今天起找出最近一個符合的日子（今天需晚於目前時間）
+            for days_ahead in range(8):
+                if not mask & (1 << ((current_weekday + days_ahead) % 7)):
+                    continue
+                if days_ahead == 0 and schedule.minute_of_day <= current_minute:
+                    continue
+                delta = days_ahead * 1440 + schedule.minute_of_day - current_minute
+                if best_delta is None or delta < best_delta:
+                    best_delta = delta
+                    best = (schedule, days_ahead)
+                break
         
-        if not next_times:
+        if best is None:
             return None
         
-        # 返回最近的播放時間
-        next_times.sort(key=lambda x: x.get('time', ''))
-        return next_times[0]
+        schedule, days_ahead = best
+        result = {'time': schedule.time, 'schedule': schedule}
+        if days_ahead:
+            result['days'] = days_ahead
+        return result
@@ -0,0 +1,241 @@
+"""
+排程搜尋索引
+以倒排索引涵蓋排程名稱、檔案名稱、週幾與播放時間，
+排程新增、修改、刪除時逐筆更新，每次查詢只做集合運算；
+查詢延續上一次（逐字輸入）時只在上次的結果中篩選
+"""
+
+import re
+from collections import defaultdict
+
+# 週幾查詢詞 -> 星期索引（0=週一）
+_DAY_TERMS = {}
+for _index, _names in enumerate((
+        ('週一', '周一', '星期一', 'mon', 'monday'),
+        ('週二', '周二', '星期二', 'tue', 'tuesday'),
+        ('週三', '周三', '星期三', 'wed', 'wednesday'),
+        ('週四', '周四', '星期四', 'thu', 'thursday'),
+        ('週五', '周五', '星期五', 'fri', 'friday'),
+        ('週六', '周六', '星期六', 'sat', 'saturday'),
+        ('週日', '周日', '星期日', '星期天', 'sun', 'sunday'))):
+    for _name in _names:
+        _DAY_TERMS[_name] = (_index,)
+for _name in ('平日', '工作日', 'weekday', 'weekdays'):
+    _DAY_TERMS[_name] = (0, 1, 2, 3, 4)
+for _name in ('週末', '周末', 'weekend'):
+    _DAY_TERMS[_name] = (5, 6)
+for _name in ('每天', '每日', 'daily', 'everyday'):
+    _DAY_TERMS[_name] = (0, 1, 2, 3, 4, 5, 6)
+
+# 時間查詢：HH:MM 或 HH:MM-HH:MM（可跨午夜）
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})(?:[-~](\d{1,2}):(\d{2}))?$')
+
+# 沿用上次結果時，候選不超過此數才逐筆比對文字（更多時以索引查詢再取交集較快）
+_NARROW_SCAN_LIMIT = 2000
+
+
+def parse_day_term(term):
+    """
+    解析週幾名稱（週一、周一、星期一、mon、monday、平日、週末…）
+    :return: 星期索引 tuple（0=週一），無法辨識時為None
+    """
+    return _DAY_TERMS.get(term.strip().casefold())
+
+
+def _grams(text):
+    """文字的雙字片段（支援中文等不以空白分詞的名稱做子字串搜尋）"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def parse_time_term(term):
+    """
+    解析時間查詢詞
+    :return: (起始分鐘, 結束分鐘)，不是時間格式時為None
+    """
+    match = _TIME_PATTERN.match(term)
+    if not match:
+        return None
+    start_hour, start_minute, end_hour, end_minute = match.groups()
+    start = int(start_hour) * 60 + int(start_minute)
+    end = int(end_hour) * 60 + int(end_minute) if end_hour is not None else start
+    if start >= 1440 or end >= 1440:
+        return None
+    return start, end
+
+
+class ScheduleSearchIndex:
+    """
+    排程倒排索引
+    文字分兩層索引：片段 -> 不重複的文字，文字 -> 排程；
+    大量排程共用相同名稱或檔名時，片段索引只需建立一次
+    """
+
+    def __init__(self):
+        self._grams = defaultdict(set)  # 片段 -> 文字
+        self._texts = {}  # 文字 -> 列鍵
+        self._days = [set() for _ in range(7)]  # 星期 -> 列鍵
+        self._minutes = defaultdict(set)  # 當日分鐘 -> 列鍵
+        self._entries = {}  # 列鍵 -> (文字, 以換行連接的文字, 星期遮罩, 分鐘)
+        self._last = None  # 上一次查詢的 (條件, 結果)，索引變更時清除
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, key, name, file_names, minute_of_day, days_mask):
+        """
+        新增或更新一筆排程
+        :param key: 列鍵
+        :param name: 排程名稱
+        :param file_names: 檔案顯示名稱
+        :param minute_of_day: 播放時間（當日分鐘數）
+        :param days_mask: 星期位元遮罩
+        """
+        self.remove(key)
+        self._last = None
+        texts = frozenset(text.casefold() for text in (name, *file_names) if text)
+        for text in texts:
+            keys = self._texts.get(text)
+            if keys is None:
+                keys = self._texts[text] = set()
+                for gram in _grams(text):
+                    self._grams[gram].add(text)
+            keys.add(key)
+        for day in range(7):
+            if days_mask >> day & 1:
+                self._days[day].add(key)
+        self._minutes[minute_of_day].add(key)
+        self._entries[key] = (texts, '\n'.join(texts), days_mask, minute_of_day)
+
+    def remove(self, key):
+        """移除一筆排程"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._last = None
+        texts, _, days_mask, minute_of_day = entry
+        for text in texts:
+            keys = self._texts[text]
+            keys.discard(key)
+            if not keys:
+                # 已無排程使用此文字，移除其片段
+                del self._texts[text]
+                for gram in _grams(text):
+                    postings = self._grams[gram]
+                    postings.discard(text)
+                    if not postings:
+                        del self._grams[gram]
+        for day in range(7):
+            if days_mask >> day & 1:
+                self._days[day].discard(key)
+        postings = self._minutes[minute_of_day]
+        postings.discard(key)
+        if not postings:
+            del self._minutes[minute_of_day]
+
+    def search(self, query):
+        """
+        查詢排程（以空白分隔的條件須全部符合）
+        條件可為名稱或檔名片段、週幾（週一、平日、週末…）、時間（08:00）或時間範圍（08:00-09:30）
+        :param query: 查詢字串
+        :return: 符合的列鍵集合，查詢為空時回傳None
+        """
+        terms = query.casefold().split()
+        if not terms:
+            self._last = None
+            return None
+        narrowed = self._narrow(terms)
+        if narrowed is not None:
+            matched = narrowed
+        else:
+            results = [self._match_term(term) for term in terms]
+            results.sort(key=len)
+            matched = set(results[0])
+            for result in results[1:]:
+                if not matched:
+                    break
+                matched &= result
+        self._last = (terms, matched)
+        return matched
+
+    def _narrow(self, terms):
+        """
+        查詢是上一次查詢的延伸（最後一個文字條件變長或新增條件）時，只在上次結果中逐筆確認新的條件
+        :return: 符合的列鍵集合，無法沿用上次結果時為None
+        """
+        if self._last is None:
+            return None
+        last_terms, last_matched = self._last
+        if len(terms) < len(last_terms):
+            return None
+        checks = []
+        for position, last_term in enumerate(last_terms):
+            term = terms[position]
+            if term == last_term:
+                continue
+            # 只有文字條件延伸時結果必為子集（週幾、時間條件的範圍可能改變）
+            if (position != len(last_terms) - 1 or last_term not in term
+                    or not self._is_text_term(last_term) or not self._is_text_term(term)):
+                return None
+            checks.append(term)
+        checks.extend(terms[len(last_terms):])
+        matched = last_matched
+        entries = self._entries
+        for term in checks:
+            if len(matched) <= _NARROW_SCAN_LIMIT and self._is_text_term(term):
+                # 文字條件逐筆比對上次結果（只檢查候選，不掃描整個索引）
+                matched = {key for key in matched if term in entries[key][1]}
+            else:
+                matched = matched & self._match_term(term)
+            if not matched:
+                break
+        return set(matched)
+
+    @staticmethod
+    def _is_text_term(term):
+        return term not in _DAY_TERMS and parse_time_term(term) is None
+
+    def _match_term(self, term):
+        days = _DAY_TERMS.get(term)
+        if days is not None:
+            matched = set()
+            for day in days:
+                matched |= self._days[day]
+            return matched
+
+        time_range = parse_time_term(term)
+        if time_range is not None:
+            return self._match_minutes(*time_range)
+
+        return self._match_text(term)
+
+    def _match_minutes(self, start, end):
+        matched = set()
+        if start <= end:
+            minutes = range(start, end + 1)
+        else:
+            # 跨午夜，例如 22:00-02:00
+            minutes = list(range(start, 1440)) + list(range(0, end + 1))
+        for minute in minutes:
+            postings = self._minutes.get(minute)
+            if postings:
+                matched |= postings
+        return matched
+
+    def _match_text(self, term):
+        if len(term) == 1:
+            # 單一字元直接比對不重複的文字
+            texts = [text for text in self._texts if term in text]
+        else:
+            postings = [self._grams.get(gram) for gram in _grams(term)]
+            if not all(postings):
+                return set()
+            postings.sort(key=len)
+            texts = set(postings[0])
+            for posting in postings[1:]:
+                texts &= posting
+        matched = set()
+        for text in texts:
+            # 雙字片段都出現不代表整段相連，逐一確認
+            if len(term) <= 2 or term in text:
+                matched |= self._texts[text]
+        return matched
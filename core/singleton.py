@@ -1,7 +1,8 @@
 """
 單一執行實例工具。
 
-提供跨平台（Windows / POSIX）檔案鎖定確保程式同時僅有一個實例啟動。
+提供跨平台（Windows / POSIX）檔案鎖定確保程式同時僅有一個實例啟動；
+持有鎖的實例可在本機控制通道接收指令，再次啟動時將指令轉送給它後立即結束。
 """
 
 from __future__ import annotations
@@ -9,8 +10,11 @@ from __future__ import annotations
 import os
 import sys
 import tempfile
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+from core.control import CONTROL_PORT_FILE, ControlServer, send_command
 
 
 class SingleInstanceError(RuntimeError):
@@ -26,11 +30,18 @@ class SingleInstance:
             run_app()
     """
 
-    def __init__(self, name: str = "radioone", lock_dir: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        name: str = "radioone",
+        lock_dir: Optional[Path] = None,
+        port_file: Optional[Path] = None,
+    ) -> None:
         base_dir = lock_dir or Path(tempfile.gettempdir())
         base_dir.mkdir(parents=True, exist_ok=True)
         self.lock_path = base_dir / f"{name}.lock"
+        self.port_file = port_file or base_dir / CONTROL_PORT_FILE
         self._fp = None  # type: ignore[assignment]
+        self._server: Optional[ControlServer] = None
 
     # --------------------------------------------------------------------- #
     # Context manager API
@@ -56,12 +67,32 @@ class SingleInstance:
                 self._acquire_windows()
             else:
                 self._acquire_posix()
+            # 開啟後鎖檔被前一個持有者釋放時刪除，鎖住的已不是目前的鎖檔
+            if not self._holds_current_lock_file():
+                raise SingleInstanceError("鎖檔已被替換，請重試")
         except Exception:
             self._fp.close()
             self._fp = None
             raise
 
+    def serve(self, handler: Callable[[str, str], dict], port: int = 0) -> None:
+        """
+        在本機控制通道接收其他啟動轉送的指令（需先取得鎖）。
+
+        :param handler: 處理指令的函數(command, argument) -> 回應字典，於連線執行緒呼叫
+        :param port: 監聽埠號，0 表示由系統指定
+        """
+        if not self._fp:
+            raise SingleInstanceError("尚未取得執行實例鎖")
+        if self._server is None:
+            self._server = ControlServer(handler, port_file=str(self.port_file), port=port)
+            self._server.start()
+
     def release(self) -> None:
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+
         if not self._fp:
             return
 
@@ -84,6 +115,12 @@ class SingleInstance:
     # ------------------------------------------------------------------ #
     # Internal helpers
     # ------------------------------------------------------------------ #
+    def _holds_current_lock_file(self) -> bool:
+        try:
+            return os.path.samestat(os.fstat(self._fp.fileno()), os.stat(self.lock_path))
+        except OSError:
+            return False
+
     def _acquire_windows(self) -> None:
         try:
             import msvcrt  # type: ignore
@@ -123,6 +160,30 @@ class SingleInstance:
             pass
 
 
+def forward_command(
+    command: str,
+    argument: str = "",
+    port_file: Optional[Path] = None,
+    wait: float = 0.0,
+) -> Optional[dict]:
+    """
+    將指令轉送給執行中的實例。
+
+    :param command: 指令名稱（show、play、stop、reload…）
+    :param argument: 指令參數
+    :param port_file: 控制通道埠號檔（預設位於鎖目錄）
+    :param wait: 實例仍在啟動、尚未開始接收指令時最多等待的秒數
+    :return: 回應字典，沒有可接收指令的實例時為 None
+    """
+    port_file = port_file or default_lock_directory() / CONTROL_PORT_FILE
+    deadline = time.monotonic() + wait
+    while True:
+        response = send_command(str(port_file), command, argument)
+        if response is not None or time.monotonic() >= deadline:
+            return response
+        time.sleep(0.1)
+
+
 def default_lock_directory() -> Path:
     """
     取得預設鎖目錄（優先使用專案資料夾，其次為系統暫存目錄）。
@@ -5,13 +5,102 @@
 
 import json
 import os
+import shutil
 import sys
+import tempfile
+import time
+
+from core.log import get_logger
+from core.metrics import REGISTRY
+from core.schedule import SCHEDULE_FORMAT_VERSION
+
+log = get_logger('storage')
+
+# 目前的資料格式版本（與 core.schedule 的編碼版本一致）
+SCHEMA_VERSION = SCHEDULE_FORMAT_VERSION
+
+SAVE_DURATION = REGISTRY.histogram('radioone_schedule_save_seconds', '保存播放計劃的時間（秒）')
+
+
+def write_json_file(path, data, **dump_options):
+    """
+    寫入JSON檔：先寫入同目錄的唯一暫存檔再取代，
+    多個執行緒或程式同時寫入時不會寫進同一個暫存檔，中斷時也不會留下寫到一半的檔案
+    :param dump_options: 傳給 json.dump 的參數（例如 indent）
+    :raises IOError, OSError: 寫入失敗（暫存檔已移除）
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **dump_options)
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+
+class ScheduleLoadError(ValueError):
+    """排程檔無法讀取或內容不完整（例如寫到一半或損毀）"""
+
+
+# 舊版資料中的臨時欄位，遷移時移除
+_LEGACY_KEYS = ('invalid_files', 'duration')
+
+
+def _migrate_v0_to_v1(data):
+    """v0 → v1：移除執行期附加欄位，統一使用 duration_seconds"""
+    for schedule in data.get('schedules', []):
+        legacy_duration = schedule.get('duration')
+        if 'duration_seconds' not in schedule and legacy_duration:
+            schedule['duration_seconds'] = legacy_duration
+        for key in _LEGACY_KEYS:
+            schedule.pop(key, None)
+    return data
+
+
+def _migrate_v1_to_v2(data):
+    """
+    v1 → v2：缺少 duration_seconds 的排程維持「尚未計算」，由播放或背景計算補上；
+    遷移時不讀取音訊檔，避免啟動時卡在離線的網路磁碟，或把暫時無法取得的時長寫成None
+    """
+    return data
+
+
+# 遷移步驟：來源版本 → 遷移函數（每一步只升一版，且可重複執行）
+MIGRATIONS = {
+    0: _migrate_v0_to_v1,
+    1: _migrate_v1_to_v2,
+}
+
+
+def migrate(data):
+    """
+    將資料逐步升級到目前版本
+    :param data: 載入的JSON字典
+    :return: (升級後資料, 是否有變更)
+    """
+    version = data.get('version', 0)
+    if version >= SCHEMA_VERSION:
+        return data, False
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+        data['version'] = version
+    return data, True
+
 
 class Storage:
     """資料存儲管理類別"""
     
-    def __init__(self):
-        """初始化存儲路徑"""
+    def __init__(self, data_dir=None):
+        """
+        初始化存儲路徑
+        :param data_dir: 資料目錄（預設為程式目錄下的 data）
+        """
         if getattr(sys, 'frozen', False):
             # 打包後的exe
             self.base_path = os.path.dirname(sys.executable)
@@ -19,42 +108,69 @@ class Storage:
             # 開發模式
             self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
-        self.data_dir = os.path.join(self.base_path, 'data')
+        self.data_dir = data_dir or os.path.join(self.base_path, 'data')
         self.schedule_file = os.path.join(self.data_dir, 'schedule.json')
         
         # 確保data目錄存在
         os.makedirs(self.data_dir, exist_ok=True)
     
-    def load_schedules(self):
-        """載入播放計劃"""
+    def load_schedules(self, strict=False):
+        """
+        載入播放計劃（舊版資料會遷移一次並寫回）
+        :param strict: 排程檔損毀時拋出 ScheduleLoadError，而不是回傳空的排程
+                       （同步等不可把讀取失敗當成「沒有排程」的呼叫端使用）
+        :raises ScheduleLoadError: strict 且排程檔無法讀取或格式錯誤
+        """
         if not os.path.exists(self.schedule_file):
-            return {"schedules": []}
+            return {"version": SCHEMA_VERSION, "schedules": []}
         
         try:
             with open(self.schedule_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                # 驗證檔案路徑是否存在（延遲驗證，避免載入時卡頓）
-                # 只在需要時驗證，不阻塞載入過程
-                schedules = data.get('schedules', [])
-                for schedule in schedules:
-                    # 標記需要驗證，但不立即執行（由UI層在需要時驗證）
-                    if 'invalid_files' not in schedule:
-                        schedule['invalid_files'] = []
-                return data
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"載入播放計劃失敗: {e}")
-            return {"schedules": []}
+            if not isinstance(data, dict) or not isinstance(data.get('schedules'), list):
+                raise ValueError("缺少 schedules 列表")
+        except (ValueError, IOError) as e:
+            if strict:
+                raise ScheduleLoadError(f"載入播放計劃失敗: {e}")
+            log.error("載入播放計劃失敗", file=self.schedule_file, error=str(e))
+            return {"version": SCHEMA_VERSION, "schedules": []}
+        
+        # 快速路徑：已是目前版本，不做逐筆修正
+        if data.get('version', 0) >= SCHEMA_VERSION:
+            return data
+        
+        old_version = data.get('version', 0)
+        data, changed = migrate(data)
+        if changed:
+            self._backup(old_version)
+            if self.save_schedules(data):
+                log.info("✓ 播放計劃已升級", old_version=old_version, version=SCHEMA_VERSION)
+        return data
     
     def save_schedules(self, schedules_data):
-        """保存播放計劃"""
+        """
+        保存播放計劃（先寫入暫存檔再取代，避免寫入中斷損毀資料）
+        每次寫入使用不同的暫存檔，介面、同步、命令列工具同時保存時不會寫進同一個暫存檔
+        """
+        started = time.perf_counter()
         try:
-            with open(self.schedule_file, 'w', encoding='utf-8') as f:
-                json.dump(schedules_data, f, ensure_ascii=False, indent=2)
+            write_json_file(self.schedule_file, schedules_data, indent=2)
+            SAVE_DURATION.observe(time.perf_counter() - started)
             return True
-        except IOError as e:
-            print(f"保存播放計劃失敗: {e}")
+        except (IOError, OSError) as e:
+            log.error("保存播放計劃失敗", file=self.schedule_file, error=str(e))
             return False
     
     def validate_file_path(self, file_path):
         """驗證檔案路徑是否存在"""
         return os.path.exists(file_path) and os.path.isfile(file_path)
+    
+    def _backup(self, version):
+        """遷移前保留舊版檔案（每個版本只備份一次）"""
+        backup_file = f"{self.schedule_file}.v{version}.bak"
+        if os.path.exists(backup_file):
+            return
+        try:
+            shutil.copy2(self.schedule_file, backup_file)
+        except (IOError, OSError) as e:
+            log.warning("備份舊版播放計劃失敗", error=str(e))
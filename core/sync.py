@@ -0,0 +1,478 @@
+"""
+多台電腦排程同步
+多台電腦共用一個資料夾（網路磁碟或共用資料夾）：取得 leader.lock 檔案鎖的節點為主節點，
+本機排程檔有變化時發布新的版本快照與差異；其他節點只在版本號變化時讀取差異套用到本機排程檔，
+並回報已套用的版本與本機排程檔的雜湊值，方便確認整個校園的排程是否一致
+（套用後又在本機修改的節點，雜湊值與目前版本不同，視為不一致）
+
+共用資料夾結構：
+    current.json          目前版本（主節點最後寫入，作為發布完成的標記）
+    snapshots/vNNNNNNNN.json  各版本的完整排程
+    deltas/vNNNNNNNN.json     由前一版本到此版本的差異
+    nodes/<節點>.json         各節點回報的狀態
+"""
+
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+
+from core.log import get_logger
+from core.schedule import Schedule, decode_schedules, encode_schedules
+from core.singleton import SingleInstance, SingleInstanceError
+from core.storage import ScheduleLoadError
+from core.watcher import file_signature
+
+log = get_logger('sync')
+
+CURRENT_FILE = 'current.json'
+SNAPSHOT_DIR = 'snapshots'
+DELTA_DIR = 'deltas'
+NODE_DIR = 'nodes'
+# 共用資料夾保留的版本數（落後更多版本的節點改讀完整快照）
+KEEP_VERSIONS = 20
+# 節點狀態沒有變化時，多久重新回報一次（秒）
+REPORT_INTERVAL = 60.0
+
+
+def schedules_checksum(schedules):
+    """排程內容的雜湊值（與排列順序有關）"""
+    payload = json.dumps([s.to_dict() for s in schedules], ensure_ascii=False,
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def diff_schedules(old, new):
+    """
+    計算兩個版本的差異（以排程ID比對）
+    :return: {'upserts': [新增或變更的排程字典], 'removed': [移除的ID], 'order': [新版本的ID順序]}
+    """
+    old_by_id = {s.id: s for s in old}
+    new_ids = set()
+    upserts = []
+    for schedule in new:
+        new_ids.add(schedule.id)
+        if old_by_id.get(schedule.id) != schedule:
+            upserts.append(schedule.to_dict())
+    return {
+        'upserts': upserts,
+        'removed': [schedule_id for schedule_id in old_by_id if schedule_id not in new_ids],
+        'order': [schedule.id for schedule in new],
+    }
+
+
+def apply_delta(schedules, delta):
+    """將差異套用到排程列表，回傳新的列表（未變更的排程沿用原物件）"""
+    by_id = {s.id: s for s in schedules}
+    for schedule_id in delta.get('removed', ()):
+        by_id.pop(schedule_id, None)
+    for item in delta.get('upserts', ()):
+        schedule = Schedule.from_dict(item)
+        by_id[schedule.id] = schedule
+    return [by_id[schedule_id] for schedule_id in delta.get('order', ()) if schedule_id in by_id]
+
+
+def _write_json(path, data):
+    """寫入JSON（暫存檔取代，讀取端不會讀到寫到一半的內容）"""
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_file, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+class SharedScheduleStore:
+    """共用資料夾上的版本化排程"""
+
+    def __init__(self, root):
+        """
+        :param root: 共用資料夾路徑（測試時可用本機資料夾）
+        """
+        self.root = str(root)
+        self.current_file = os.path.join(self.root, CURRENT_FILE)
+        for name in (SNAPSHOT_DIR, DELTA_DIR, NODE_DIR):
+            os.makedirs(os.path.join(self.root, name), exist_ok=True)
+
+    def _version_path(self, kind, version):
+        return os.path.join(self.root, kind, f"v{version:08d}.json")
+
+    def read_current(self):
+        """
+        讀取目前版本
+        :return: {'version', 'checksum', 'leader', 'published_at', 'count'}，尚未發布時為None
+        """
+        current = _read_json(self.current_file)
+        if not isinstance(current, dict) or not isinstance(current.get('version'), int):
+            return None
+        return current
+
+    def read_snapshot(self, version):
+        """讀取版本的完整排程，版本不存在時為None"""
+        snapshot = _read_json(self._version_path(SNAPSHOT_DIR, version))
+        if not isinstance(snapshot, dict) or snapshot.get('version') != version:
+            return None
+        return decode_schedules(snapshot.get('data') or {})
+
+    def read_delta(self, version):
+        """讀取由前一版本到此版本的差異，不存在時為None"""
+        delta = _read_json(self._version_path(DELTA_DIR, version))
+        if not isinstance(delta, dict) or delta.get('version') != version:
+            return None
+        return delta
+
+    def publish(self, schedules, previous=None, leader=''):
+        """
+        發布新版本（只應由主節點呼叫）
+        :param schedules: 新版本的排程
+        :param previous: 目前版本的排程（用於產生差異，None表示不產生差異）
+        :param leader: 主節點名稱
+        :return: 新版本的 current 記錄
+        """
+        current = self.read_current()
+        version = (current['version'] if current else 0) + 1
+        record = {
+            'version': version,
+            'checksum': schedules_checksum(schedules),
+            'count': len(schedules),
+            'leader': leader,
+            'published_at': time.time(),
+        }
+        _write_json(self._version_path(SNAPSHOT_DIR, version),
+                    dict(record, data=encode_schedules(schedules)))
+        if previous is not None and current is not None:
+            delta = diff_schedules(previous, schedules)
+            _write_json(self._version_path(DELTA_DIR, version), dict(delta, version=version))
+        # 快照與差異都寫好後才更新目前版本
+        _write_json(self.current_file, record)
+        self.prune(version)
+        return record
+
+    def prune(self, version, keep=KEEP_VERSIONS):
+        """刪除過舊的快照與差異"""
+        for kind in (SNAPSHOT_DIR, DELTA_DIR):
+            directory = os.path.join(self.root, kind)
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                match = re.match(r'^v(\d+)\.json$', name)
+                if match and int(match.group(1)) <= version - keep:
+                    try:
+                        os.remove(os.path.join(directory, name))
+                    except OSError:
+                        pass
+
+    def load_version(self, current, base_version=0, base_schedules=None):
+        """
+        取得指定版本的排程：由已套用的版本依序套用差異，差異不完整或雜湊不符時改讀完整快照
+        :param current: read_current 的記錄
+        :param base_version: 已套用的版本
+        :param base_schedules: 已套用版本的排程
+        :return: (排程列表, 是否使用差異)，版本不存在時排程為None
+        """
+        version = current['version']
+        if base_schedules is not None and 0 < base_version < version:
+            schedules = base_schedules
+            for step in range(base_version + 1, version + 1):
+                delta = self.read_delta(step)
+                if delta is None:
+                    break
+                schedules = apply_delta(schedules, delta)
+            else:
+                if schedules_checksum(schedules) == current.get('checksum'):
+                    return schedules, True
+        schedules = self.read_snapshot(version)
+        if schedules is not None and schedules_checksum(schedules) != current.get('checksum'):
+            return None, False
+        return schedules, False
+
+    def write_report(self, node_id, report):
+        """寫入節點狀態"""
+        _write_json(os.path.join(self.root, NODE_DIR, f"{_safe_name(node_id)}.json"), report)
+
+    def read_reports(self):
+        """讀取所有節點狀態"""
+        directory = os.path.join(self.root, NODE_DIR)
+        reports = []
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return reports
+        for name in names:
+            if name.endswith('.json'):
+                report = _read_json(os.path.join(directory, name))
+                if isinstance(report, dict):
+                    reports.append(report)
+        return reports
+
+
+def _safe_name(node_id):
+    """節點名稱轉為可用的檔名"""
+    return re.sub(r'[^\w.-]', '_', node_id) or 'node'
+
+
+def fleet_status(shared_dir, stale_after=REPORT_INTERVAL * 3):
+    """
+    整體同步狀態
+    :param shared_dir: 共用資料夾
+    :param stale_after: 超過此秒數沒有回報的節點視為離線
+    :return: {'version', 'leader', 'nodes': [...], 'consistent'}
+    """
+    store = SharedScheduleStore(shared_dir)
+    current = store.read_current()
+    version = current['version'] if current else 0
+    now = time.time()
+    nodes = []
+    checksum = current.get('checksum') if current else None
+    for report in store.read_reports():
+        age = now - float(report.get('updated_at') or 0)
+        nodes.append(dict(
+            report,
+            stale=age > stale_after,
+            # 以本機排程檔的雜湊值判斷：已套用目前版本但之後在本機修改過也算不一致
+            in_sync=(report.get('applied_version') == version and report.get('checksum') == checksum
+                     and not report.get('error')),
+        ))
+    online = [node for node in nodes if not node['stale']]
+    return {
+        'version': version,
+        'leader': current.get('leader') if current else None,
+        'published_at': current.get('published_at') if current else None,
+        'nodes': nodes,
+        'consistent': bool(online) and all(node['in_sync'] for node in online),
+    }
+
+
+class SyncNode:
+    """同步節點：主節點發布本機排程，其他節點套用新版本到本機排程檔"""
+
+    def __init__(self, storage, shared_dir, node_id=None, role='auto', interval=5.0, on_applied=None,
+                 writer=None):
+        """
+        初始化同步節點
+        :param storage: 本機資料存儲
+        :param shared_dir: 共用資料夾
+        :param node_id: 節點名稱（預設為電腦名稱）
+        :param role: 'auto' 參與主節點選舉，'follower' 只套用其他節點發布的版本
+        :param interval: 檢查間隔（秒）
+        :param on_applied: 套用新版本到本機排程檔後的回調函數(version)，於背景執行緒呼叫
+        :param writer: 寫入新版本的函數(schedules) -> 是否成功，於背景執行緒呼叫；
+                       由擁有排程檔的程式（介面主執行緒、服務的鎖）寫入，不與本機的修改交錯。
+                       None表示直接寫入排程檔（沒有其他寫入端時，例如命令列工具與測試）
+        """
+        if role not in ('auto', 'follower'):
+            raise ValueError(f"未知的同步角色: {role}")
+        self.storage = storage
+        self.shared_dir = str(shared_dir)
+        self.store = SharedScheduleStore(self.shared_dir)
+        self.node_id = node_id or socket.gethostname()
+        self.role = role
+        self.interval = interval
+        self.on_applied = on_applied
+        self.writer = writer
+        self.running = False
+        self.sync_thread = None
+        self.is_leader = False
+        self.applied_version = 0
+        self.last_error = None
+        self._applied = None  # 已套用版本的排程
+        self._leader_lock = SingleInstance('leader', Path(self.shared_dir))
+        self._current_signature = None  # current.json 的檔案特徵（未變化時不讀取）
+        self._local_signature = None  # 本機排程檔的檔案特徵（主節點判斷是否需要發布）
+        self._last_report = None
+        self._reported_at = 0.0
+        self._allow_empty = False  # 下次發布允許以空的排程取代非空的版本
+        self._checksum_signature = None  # 已計算雜湊值的本機排程檔特徵
+        self._local_checksum = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def start(self):
+        """啟動背景同步"""
+        if not self.running:
+            self.running = True
+            self.sync_thread = threading.Thread(target=self._sync_worker, daemon=True)
+            self.sync_thread.start()
+
+    def stop(self):
+        """停止背景同步並放棄主節點身分"""
+        self.running = False
+        self._wake.set()
+        if self.sync_thread and self.sync_thread is not threading.current_thread():
+            self.sync_thread.join(timeout=5.0)
+        with self._lock:
+            if self.is_leader:
+                self.is_leader = False
+                self._leader_lock.release()
+                try:
+                    self._report()
+                except (IOError, OSError):
+                    pass
+
+    def sync_now(self):
+        """要求背景執行緒立即同步"""
+        self._wake.set()
+
+    def allow_empty_publish(self):
+        """
+        使用者明確刪除了全部排程：允許下次發布以空的排程取代目前版本
+        （未呼叫時，主節點不會把空的排程檔發布給其他電腦）
+        """
+        self._allow_empty = True
+        # 重新讀取排程檔（可能已因為空的排程而略過這次修改）
+        self._local_signature = None
+
+    def _sync_worker(self):
+        """同步工作執行緒"""
+        while self.running:
+            self.sync_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def sync_once(self):
+        """
+        同步一次：選舉主節點、套用新版本、主節點發布本機修改、回報狀態
+        :return: 本次是否套用或發布了新版本
+        """
+        with self._lock:
+            updated = False
+            try:
+                if not self.is_leader and self.role == 'auto':
+                    self._try_lead()
+                current = self._read_current_if_changed()
+                if current is not None and current['version'] != self.applied_version:
+                    updated = self._pull(current)
+                if self.is_leader:
+                    updated = self._publish_if_changed() or updated
+                self.last_error = None
+            except (IOError, OSError, ValueError) as e:
+                self.last_error = str(e)
+                log.error("排程同步失敗", error=str(e))
+            try:
+                self._report()
+            except (IOError, OSError) as e:
+                log.warning("回報同步狀態失敗", error=str(e))
+            return updated
+
+    def _try_lead(self):
+        """嘗試取得主節點鎖（主節點結束後由其他節點接手）"""
+        try:
+            self._leader_lock.acquire()
+        except (SingleInstanceError, OSError):
+            return
+        self.is_leader = True
+        # 新的主節點先套用目前版本，再發布之後的本機修改
+        self._current_signature = None
+        log.info("✓ 成為排程同步主節點", node=self.node_id)
+
+    def _read_current_if_changed(self):
+        """current.json 有變化時才讀取"""
+        signature = file_signature(self.store.current_file)
+        if signature is None or signature == self._current_signature:
+            return None
+        current = self.store.read_current()
+        if current is not None:
+            self._current_signature = signature
+        return current
+
+    def _pull(self, current):
+        """套用共用資料夾的目前版本到本機排程檔"""
+        schedules, used_delta = self.store.load_version(current, self.applied_version, self._applied)
+        if schedules is None:
+            # 下一輪重新讀取
+            self._current_signature = None
+            raise ValueError(f"排程版本 {current['version']} 不完整")
+        try:
+            local = decode_schedules(self.storage.load_schedules(strict=True))
+        except ScheduleLoadError:
+            # 本機排程檔寫到一半或損毀：本輪略過，下一輪重新讀取
+            self._current_signature = None
+            raise
+        if local != schedules:
+            if self._applied is not None and local != self._applied:
+                log.warning("本機排程的修改將被同步版本取代", node=self.node_id)
+            if self.writer is not None:
+                saved = self.writer(schedules)
+            else:
+                saved = self.storage.save_schedules(encode_schedules(schedules))
+            if not saved:
+                # 下一輪重新套用
+                self._current_signature = None
+                raise IOError("保存播放計劃失敗")
+        self._local_signature = file_signature(self.storage.schedule_file)
+        self.applied_version = current['version']
+        self._applied = schedules
+        log.info("✓ 已套用排程版本", version=self.applied_version,
+                 source='差異' if used_delta else '完整快照', schedules=len(schedules))
+        if self.on_applied:
+            self.on_applied(self.applied_version)
+        return True
+
+    def _publish_if_changed(self):
+        """主節點：本機排程與已發布版本不同時發布新版本"""
+        signature = file_signature(self.storage.schedule_file)
+        if self.applied_version and signature == self._local_signature:
+            return False
+        # 讀取失敗時拋出例外略過本輪（不記錄檔案特徵，下一輪重新讀取），不可當成沒有排程發布
+        local = decode_schedules(self.storage.load_schedules(strict=True))
+        self._local_signature = signature
+        if self.applied_version and local == self._applied:
+            return False
+        if not local and self._applied and not self._allow_empty:
+            # 空的排程檔取代非空的版本需要明確的操作（allow_empty_publish），避免誤清空所有電腦的排程
+            log.warning("本機排程檔沒有排程，未發布", version=self.applied_version, published_schedules=len(self._applied))
+            return False
+        self._allow_empty = False
+        current = self.store.read_current()
+        at_current = current is not None and current['version'] == self.applied_version
+        record = self.store.publish(local, previous=self._applied if at_current else None, leader=self.node_id)
+        self._current_signature = file_signature(self.store.current_file)
+        self.applied_version = record['version']
+        self._applied = local
+        log.info("✓ 已發布排程版本", version=self.applied_version, schedules=len(local))
+        return True
+
+    def status(self):
+        """本節點的同步狀態"""
+        return {
+            'node': self.node_id,
+            'role': 'leader' if self.is_leader else 'follower',
+            'applied_version': self.applied_version,
+            'schedules': len(self._applied) if self._applied is not None else None,
+            'checksum': self.local_checksum(),
+            'error': self.last_error,
+        }
+
+    def local_checksum(self):
+        """本機排程檔內容的雜湊值（檔案未變化時沿用上次的結果），無法讀取時為None"""
+        signature = file_signature(self.storage.schedule_file)
+        if signature != self._checksum_signature:
+            try:
+                schedules = decode_schedules(self.storage.load_schedules(strict=True))
+                self._local_checksum = schedules_checksum(schedules)
+            except ScheduleLoadError:
+                self._local_checksum = None
+            self._checksum_signature = signature
+        return self._local_checksum
+
+    def _report(self):
+        """寫入節點狀態（有變化或超過回報間隔時）"""
+        report = self.status()
+        now = time.time()
+        if report == self._last_report and now - self._reported_at < REPORT_INTERVAL:
+            return
+        self.store.write_report(self.node_id, dict(report, updated_at=now, pid=os.getpid()))
+        self._last_report = report
+        self._reported_at = now
@@ -0,0 +1,330 @@
+"""
+背景轉檔模組
+將播放器無法解碼的音訊（WMA、AAC、M4A）於背景轉為 PCM WAV，
+轉檔結果依來源內容的 SHA-256 快取，播放時自動改用轉檔後的版本
+需要系統已安裝 ffmpeg（未安裝時不轉檔，維持原本的匯入檢查）
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.log import get_logger
+from core.metrics import REGISTRY
+from core.mirror import hash_file
+from core.probe import probe_audio_file
+from core.storage import write_json_file
+
+log = get_logger('transcoder')
+
+# 可轉檔的來源格式（見 core.probe.FORMAT_NAMES）
+TRANSCODABLE_FORMATS = {'mp4', 'aac', 'asf'}
+
+# 轉檔輸出格式
+RENDITION_EXT = '.wav'
+
+# 預設同時轉檔的程序數
+DEFAULT_MAX_WORKERS = 2
+
+# 單一檔案轉檔逾時（秒）
+TRANSCODE_TIMEOUT = 600
+
+CACHE_REQUESTS = REGISTRY.counter('radioone_cache_requests', '快取查詢次數', ('cache', 'result'))
+_HITS = CACHE_REQUESTS.labels('transcoder', 'hit')
+_MISSES = CACHE_REQUESTS.labels('transcoder', 'miss')
+
+_ffmpeg_path = None
+_ffmpeg_checked = False
+
+
+def find_ffmpeg():
+    """尋找 ffmpeg 執行檔（結果快取），找不到時回傳None"""
+    global _ffmpeg_path, _ffmpeg_checked
+    if not _ffmpeg_checked:
+        _ffmpeg_path = shutil.which('ffmpeg')
+        _ffmpeg_checked = True
+    return _ffmpeg_path
+
+
+def can_transcode(audio_format):
+    """此格式能否經由背景轉檔播放"""
+    return audio_format in TRANSCODABLE_FORMATS and find_ffmpeg() is not None
+
+
+def _lower_priority():
+    """轉檔程序初始化：降低優先權，避免影響介面與播放中的廣播"""
+    try:
+        if hasattr(os, 'nice'):
+            os.nice(10)
+        else:
+            import ctypes
+            below_normal = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), below_normal)
+    except Exception:
+        pass
+
+
+def transcode_file(source, cache_dir, ffmpeg):
+    """
+    轉檔工作（於轉檔程序中執行）
+    :param source: 來源檔案路徑
+    :param cache_dir: 轉檔快取目錄
+    :param ffmpeg: ffmpeg 執行檔路徑
+    :return: (來源SHA-256, 轉檔檔名)
+    """
+    digest = hash_file(source)
+    rendition = digest + RENDITION_EXT
+    target = os.path.join(cache_dir, rendition)
+    if os.path.exists(target):
+        return digest, rendition
+
+    temp_path = target + '.part'
+    command = [
+        ffmpeg, '-nostdin', '-loglevel', 'error', '-y',
+        '-i', source, '-vn', '-acodec', 'pcm_s16le', '-f', 'wav', temp_path,
+    ]
+    creationflags = (getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+                     | getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0))
+    try:
+        result = subprocess.run(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=TRANSCODE_TIMEOUT, creationflags=creationflags
+        )
+        if result.returncode != 0:
+            message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise IOError(message[-1] if message else f"ffmpeg 結束代碼 {result.returncode}")
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return digest, rendition
+
+
+class TranscodeCache:
+    """背景轉檔快取"""
+
+    def __init__(self, cache_dir, max_workers=DEFAULT_MAX_WORKERS, status_lookup=None, on_change=None, ffmpeg=None):
+        """
+        初始化轉檔快取
+        :param cache_dir: 轉檔快取目錄
+        :param max_workers: 同時轉檔的程序數上限
+        :param status_lookup: 查詢來源檔案快取狀態的函數(path) -> FileStatus或None
+        :param on_change: 轉檔完成時的回調函數()，於背景執行緒呼叫
+        :param ffmpeg: ffmpeg 執行檔路徑，預設自動尋找
+        """
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.max_workers = max(1, max_workers)
+        self.status_lookup = status_lookup
+        self.on_change = on_change
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        self.running = False
+        self.dispatch_thread = None
+        self._executor = None
+        self._entries = {}
+        self._tracked = set()
+        self._pending = deque()
+        self._in_flight = set()
+        self._futures = {}  # 來源 -> 已送出的轉檔工作（停止時取消）
+        self._skipped = {}
+        self._slots = threading.Semaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 保存索引（不阻擋播放端查詢）
+        self._wake = threading.Event()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @property
+    def enabled(self):
+        """是否可轉檔（已找到 ffmpeg）"""
+        return self.ffmpeg is not None
+
+    # ------------------------------------------------------------------ #
+    # 索引
+    # ------------------------------------------------------------------ #
+    def _load_index(self):
+        """載入轉檔索引，並移除轉檔結果已遺失的項目"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except (IOError, ValueError):
+            entries = {}
+        self._entries = {
+            source: entry for source, entry in entries.items()
+            if os.path.exists(self._rendition_path(entry))
+        }
+
+    def _save_index(self):
+        """寫入轉檔索引（唯一暫存檔取代；持有 _save_lock 依序寫入，較舊的內容不會覆蓋較新的）"""
+        with self._save_lock:
+            with self._lock:
+                data = {'entries': dict(self._entries)}
+            try:
+                write_json_file(self.index_file, data)
+            except (IOError, OSError) as e:
+                log.error("保存轉檔索引失敗", error=str(e))
+
+    def _rendition_path(self, entry):
+        return os.path.join(self.cache_dir, entry['rendition'])
+
+    def _is_current(self, source, entry):
+        """轉檔結果是否仍對應來源內容（依檔案狀態快取判斷，不存取來源磁碟）"""
+        if entry is None:
+            return False
+        status = self.status_lookup(source) if self.status_lookup else None
+        return status is None or not status.exists or (
+            status.size == entry['size'] and status.mtime == entry['mtime'])
+
+    # ------------------------------------------------------------------ #
+    # 背景轉檔
+    # ------------------------------------------------------------------ #
+    def set_paths(self, paths):
+        """設定排程引用的檔案，需要轉檔且尚無最新結果者排入佇列"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tracked = set(paths)
+            queued = set(self._pending) | self._in_flight
+            for path in self._tracked:
+                if path in queued or self._is_current(path, self._entries.get(path)):
+                    continue
+                if self._is_current(path, self._skipped.get(path)):
+                    # 已確認不需轉檔且內容未變
+                    continue
+                self._pending.append(path)
+        self._wake.set()
+
+    def start(self):
+        """啟動背景轉檔"""
+        if self.enabled and not self.running:
+            self.running = True
+            self.dispatch_thread = threading.Thread(target=self._dispatch_worker, daemon=True)
+            self.dispatch_thread.start()
+
+    def stop(self):
+        """停止背景轉檔（進行中的轉檔不等待完成）"""
+        self.running = False
+        self._wake.set()
+        # 逐一取消尚未開始的工作（shutdown 的 cancel_futures 需要 Python 3.9）
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _dispatch_worker(self):
+        """分派執行緒：辨識格式後交給轉檔程序，同時進行的轉檔不超過 max_workers"""
+        while self.running:
+            with self._lock:
+                source = self._pending.popleft() if self._pending else None
+            if source is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self._submit(source)
+            except Exception as e:
+                log.exception("轉檔排程失敗", file=source, error=str(e))
+
+    def _submit(self, source):
+        """辨識來源格式，需要轉檔時送出轉檔工作"""
+        try:
+            st = os.stat(source)
+        except OSError:
+            return
+        audio_format, playable = probe_audio_file(source, st.st_size, st.st_mtime)
+        if playable or audio_format not in TRANSCODABLE_FORMATS:
+            with self._lock:
+                self._skipped[source] = {'size': st.st_size, 'mtime': st.st_mtime}
+            return
+        entry = self._entries.get(source)
+        if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+            return
+
+        self._slots.acquire()
+        if not self.running:
+            self._slots.release()
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_lower_priority)
+        with self._lock:
+            self._in_flight.add(source)
+        try:
+            future = self._executor.submit(transcode_file, source, self.cache_dir, self.ffmpeg)
+        except Exception:
+            # 程序池已損壞或正在關閉：歸還名額，讓來源可再次排入
+            self._slots.release()
+            with self._lock:
+                self._in_flight.discard(source)
+            raise
+        with self._lock:
+            self._futures[source] = future
+        future.add_done_callback(lambda f: self._on_done(source, st, f))
+
+    def _on_done(self, source, st, future):
+        """轉檔完成回調，更新索引"""
+        self._slots.release()
+        with self._lock:
+            self._in_flight.discard(source)
+            if self._futures.get(source) is future:
+                del self._futures[source]
+        if future.cancelled():
+            return
+        try:
+            digest, rendition = future.result()
+        except Exception as e:
+            log.warning("轉檔失敗", file=source, error=str(e))
+            return
+        with self._lock:
+            self._entries[source] = {
+                'rendition': rendition,
+                'sha256': digest,
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+            }
+        self._save_index()
+        if self.on_change:
+            self.on_change()
+
+    # ------------------------------------------------------------------ #
+    # 播放端查詢
+    # ------------------------------------------------------------------ #
+    def resolve(self, source):
+        """取得播放用路徑：有最新轉檔結果時回傳轉檔檔案，否則回傳原始路徑"""
+        entry = self._entries.get(source)
+        if not self._is_current(source, entry):
+            if source in self._tracked:
+                _MISSES.inc()
+            return source
+        rendition_path = self._rendition_path(entry)
+        if not os.path.exists(rendition_path):
+            with self._lock:
+                self._entries.pop(source, None)
+            _MISSES.inc()
+            return source
+        _HITS.inc()
+        return rendition_path
+
+    def has_rendition(self, source):
+        """是否已有可播放的轉檔結果"""
+        return self._is_current(source, self._entries.get(source))
+
+    def stats(self):
+        """
+        轉檔統計
+        :return: (已轉檔數, 等待與進行中的數量)
+        """
+        with self._lock:
+            done = sum(1 for p in self._tracked if p in self._entries)
+            return done, len(self._pending) + len(self._in_flight)
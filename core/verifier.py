@@ -0,0 +1,203 @@
+"""
+檔案可用性檢查模組
+於背景執行緒定期以 os.stat 批次檢查排程引用的檔案，維護狀態快取表，
+讓觸發播放與介面顯示時不必即時存取磁碟；
+檔頭辨識結果只用於介面提示，檔案存在即視為可用，不會因辨識不出格式而在觸發時略過
+"""
+
+import os
+import stat
+import threading
+import time
+
+from core.dragdrop import is_audio_file
+from core.log import get_logger
+from core.probe import probe_audio_file
+
+log = get_logger('verifier')
+
+
+class FileStatus:
+    """單一檔案的快取狀態"""
+
+    __slots__ = ('exists', 'size', 'mtime', 'decodable', 'checked_at')
+
+    def __init__(self, exists, size=0, mtime=0.0, decodable=False, checked_at=0.0):
+        self.exists = exists
+        self.size = size
+        self.mtime = mtime
+        self.decodable = decodable
+        self.checked_at = checked_at
+
+    @property
+    def available(self):
+        """檔案存在（可交給播放器）"""
+        return self.exists
+
+    @property
+    def unrecognized(self):
+        """檔案存在但檔頭無法辨識為播放器可解碼的格式（僅供介面提示）"""
+        return self.exists and not self.decodable
+
+    def same_content(self, other):
+        """大小與修改時間是否相同（用於判斷是否需要重新檢查可播放性）"""
+        return (other is not None and self.exists == other.exists
+                and self.size == other.size and self.mtime == other.mtime)
+
+    def __repr__(self):
+        return f"FileStatus(exists={self.exists}, size={self.size}, decodable={self.decodable})"
+
+
+def default_probe(file_path, size, mtime):
+    """預設的格式判斷：支援的副檔名，且檔頭辨識為播放器可解碼的格式"""
+    if size <= 0 or not is_audio_file(file_path):
+        return False
+    return probe_audio_file(file_path, size, mtime)[1]
+
+
+class FileVerifier:
+    """背景檔案檢查器"""
+
+    def __init__(self, on_change=None, interval=30.0, batch_size=64, batch_pause=0.01, probe=None):
+        """
+        初始化檢查器
+        :param on_change: 狀態變化時的回調函數(changed_paths)，於背景執行緒呼叫
+        :param interval: 完整檢查一輪的間隔（秒）
+        :param batch_size: 每批 stat 的檔案數
+        :param batch_pause: 批次之間的暫停（秒），避免長時間佔用磁碟
+        :param probe: 格式判斷函數(file_path, size, mtime) -> bool，結果只用於介面提示
+        """
+        self.on_change = on_change
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.probe = probe or default_probe
+        self.running = False
+        self.verifier_thread = None
+        self._paths = ()
+        self._status = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def set_paths(self, paths):
+        """設定需要追蹤的檔案（新檔案會盡快檢查）"""
+        unique = tuple(dict.fromkeys(paths))
+        with self._lock:
+            self._paths = unique
+            keep = set(unique)
+            for path in [p for p in self._status if p not in keep]:
+                del self._status[path]
+        self._wake.set()
+
+    def start(self):
+        """啟動背景檢查"""
+        if not self.running:
+            self.running = True
+            self.verifier_thread = threading.Thread(target=self._verifier_worker, daemon=True)
+            self.verifier_thread.start()
+
+    def stop(self):
+        """停止背景檢查"""
+        self.running = False
+        self._wake.set()
+
+    def refresh_now(self):
+        """要求背景執行緒立即檢查一輪"""
+        self._wake.set()
+
+    def _verifier_worker(self):
+        """檢查器工作執行緒"""
+        while self.running:
+            try:
+                self.refresh()
+            except Exception as e:
+                log.exception("檔案檢查錯誤", error=str(e))
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, paths=None):
+        """
+        分批檢查檔案並更新狀態表
+        :param paths: 要檢查的檔案，預設為全部追蹤中的檔案
+        :return: 狀態有變化的檔案列表
+        """
+        if paths is None:
+            paths = self._paths
+        changed = []
+        for start in range(0, len(paths), self.batch_size):
+            for path in paths[start:start + self.batch_size]:
+                old = self._status.get(path)
+                new = self._stat(path, old)
+                with self._lock:
+                    self._status[path] = new
+                if (old is None or old.available != new.available or old.decodable != new.decodable
+                        or not new.same_content(old)):
+                    changed.append(path)
+            if self.batch_pause and start + self.batch_size < len(paths):
+                time.sleep(self.batch_pause)
+        if changed and self.on_change:
+            self.on_change(changed)
+        return changed
+
+    def _stat(self, path, previous=None):
+        """以單次 os.stat 取得檔案狀態，內容未變時沿用先前的格式判斷"""
+        now = time.time()
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return FileStatus(False, checked_at=now)
+        if not stat.S_ISREG(st.st_mode):
+            return FileStatus(False, checked_at=now)
+        status = FileStatus(True, st.st_size, st.st_mtime, False, now)
+        if status.same_content(previous):
+            status.decodable = previous.decodable
+        else:
+            try:
+                status.decodable = bool(self.probe(path, st.st_size, st.st_mtime))
+            except Exception:
+                status.decodable = False
+        return status
+
+    def check(self, path):
+        """立即檢查單一檔案並更新快取"""
+        status = self._stat(path, self._status.get(path))
+        with self._lock:
+            self._status[path] = status
+        return status
+
+    def status(self, path):
+        """取得快取狀態（尚未檢查過時為None）"""
+        return self._status.get(path)
+
+    def is_available(self, path):
+        """
+        檔案是否可用（存在）
+        快取為可用時直接回傳；尚未檢查或快取為不存在時才即時重新檢查
+        （例如隨身碟剛插回）
+        """
+        status = self._status.get(path)
+        if status is not None and status.available:
+            return True
+        return self.check(path).available
+
+    def filter_available(self, paths):
+        """回傳可用的檔案（保持原順序）"""
+        return [path for path in paths if self.is_available(path)]
+
+    def missing(self, paths):
+        """依快取回傳不可用的檔案（不存取磁碟，未檢查過的檔案視為可用）"""
+        result = []
+        for path in paths:
+            status = self._status.get(path)
+            if status is not None and not status.available:
+                result.append(path)
+        return result
+
+    def unrecognized(self, paths):
+        """依快取回傳存在但無法辨識格式的檔案（不存取磁碟，僅供介面提示）"""
+        result = []
+        for path in paths:
+            status = self._status.get(path)
+            if status is not None and status.unrecognized:
+                result.append(path)
+        return result
@@ -0,0 +1,121 @@
+"""
+排程檔監看模組
+於背景執行緒以 os.stat 輪詢排程檔的修改時間與大小，偵測同步工具或命令列工具的外部修改；
+檔案沒有變化時輪詢間隔逐步拉長，偵測到變化後恢復為最短間隔
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from core.log import get_logger
+
+log = get_logger('watcher')
+
+
+def file_signature(path):
+    """
+    檔案的變化特徵
+    :return: (修改時間ns, 大小, inode)，檔案不存在時為None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ScheduleFileWatcher:
+    """背景監看排程檔"""
+
+    def __init__(self, path, on_change=None, min_interval=1.0, max_interval=8.0, settle=0.2):
+        """
+        初始化監看器
+        :param path: 排程檔路徑
+        :param on_change: 偵測到外部修改時的回調函數()，於背景執行緒呼叫
+        :param min_interval: 最短輪詢間隔（秒）
+        :param max_interval: 檔案持續沒有變化時的最長輪詢間隔（秒）
+        :param settle: 偵測到變化後等待檔案寫完的時間（秒），期間仍在變化則延到下一輪
+        """
+        self.path = path
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.settle = settle
+        self.running = False
+        self.watcher_thread = None
+        self._known = file_signature(path)  # 上次載入或寫入時的特徵
+        self._reported = self._known  # 已通知過的特徵（同一變化只通知一次）
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def start(self):
+        """啟動背景監看"""
+        if not self.running:
+            self.running = True
+            self.watcher_thread = threading.Thread(target=self._watcher_worker, daemon=True)
+            self.watcher_thread.start()
+
+    def stop(self):
+        """停止背景監看"""
+        self.running = False
+        self._wake.set()
+
+    def refresh_now(self):
+        """要求背景執行緒立即檢查（例如視窗重新取得焦點時）"""
+        self._wake.set()
+
+    def mark_current(self):
+        """記錄目前的檔案特徵為已同步（讀取排程檔之前呼叫）"""
+        with self._lock:
+            self._known = self._reported = file_signature(self.path)
+
+    @contextmanager
+    def writing(self):
+        """
+        包住本程式自己的寫入，寫入後的檔案特徵視為已同步，不會被當作外部修改
+        """
+        with self._lock:
+            yield
+            self._known = self._reported = file_signature(self.path)
+
+    def has_changed(self):
+        """檔案在上次同步後是否被修改（立即檢查，不等待輪詢）"""
+        return file_signature(self.path) != self._known
+
+    def _watcher_worker(self):
+        """監看器工作執行緒"""
+        interval = self.min_interval
+        while self.running:
+            try:
+                changed = self.poll()
+            except Exception as e:
+                log.exception("排程檔監看錯誤", error=str(e))
+                changed = False
+            # 沒有變化時逐步拉長間隔
+            interval = self.min_interval if changed else min(interval * 2, self.max_interval)
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def poll(self):
+        """
+        檢查一次排程檔
+        :return: 檔案是否有新的變化（仍在寫入中時下一輪再通知）
+        """
+        signature = file_signature(self.path)
+        if signature == self._known or signature == self._reported:
+            return False
+        if self.settle:
+            # 同步工具可能分段寫入，等檔案穩定後再通知
+            time.sleep(self.settle)
+            if file_signature(self.path) != signature:
+                return True
+        with self._lock:
+            # 等待期間本程式已寫入或重新載入
+            if signature == self._known or signature == self._reported:
+                return False
+            self._reported = signature
+        if self.on_change:
+            self.on_change()
+        return True
@@ -9,6 +9,7 @@ GitHub: https://github.com/DreamOne09/radioone
 
 import sys
 import os
+import multiprocessing
 
 # 確保程式目錄在Python路徑中
 if getattr(sys, 'frozen', False):
@@ -20,12 +21,148 @@ else:
 
 sys.path.insert(0, application_path)
 
-from ui.main_window import MainWindow
+from core.singleton import SingleInstance, SingleInstanceError, default_lock_directory, forward_command
+
+def parse_args(argv=None):
+    """解析命令列參數"""
+    import argparse
+    parser = argparse.ArgumentParser(description="自動廣播系統")
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument("--show", action="store_true", help="顯示執行中實例的視窗（未執行時正常啟動）")
+    commands.add_argument("--play", type=int, metavar="排程ID", help="要求執行中的實例立即播放排程")
+    commands.add_argument("--stop", action="store_true", help="要求執行中的實例停止播放")
+    commands.add_argument("--reload", action="store_true", help="要求執行中的實例重新讀取排程檔")
+    commands.add_argument("--dump-metrics", metavar="檔案", help="要求執行中的實例將效能指標寫入資料目錄內的檔案（Prometheus 文字格式，相對路徑以資料目錄為準）")
+    commands.add_argument("--dump-log", nargs="?", const="", metavar="檔案",
+                          help="要求執行中的實例傾印最近的記錄（飛行記錄，預設寫入 data/logs；指定檔案時限資料目錄內）")
+    parser.add_argument("--headless", action="store_true",
+                        help="無介面模式：只執行排程與播放，透過本機控制通道操作")
+    parser.add_argument("--log-file", help="無介面模式的記錄檔（預設輸出到主控台）")
+    parser.add_argument("--log-level", choices=("debug", "info", "warning", "error"), default="info",
+                        help="寫入 data/logs/radioone.jsonl 的最低等級（預設 info；飛行記錄一律保存全部等級）")
+    parser.add_argument("--control-port", type=int, default=0,
+                        help="控制通道埠號，也提供 GET /metrics（預設由系統指定；-1 表示無介面模式不開啟）")
+    parser.add_argument("--http-port", type=int,
+                        help="HTTP 管理介面埠號（介面與無介面模式皆可，未指定時不開啟）")
+    parser.add_argument("--http-host", default="127.0.0.1",
+                        help="HTTP 管理介面監聽位址（預設只接受本機，0.0.0.0 開放區域網路，此時必須設定存取權杖）")
+    parser.add_argument("--http-token", default=os.environ.get("RADIOONE_HTTP_TOKEN"),
+                        help="HTTP 管理介面存取權杖（也可用環境變數 RADIOONE_HTTP_TOKEN 設定）")
+    parser.add_argument("--sync-dir", help="多台電腦排程同步的共用資料夾（未指定時不同步）")
+    parser.add_argument("--sync-node", help="同步時本機的節點名稱（預設為電腦名稱）")
+    parser.add_argument("--sync-role", choices=("auto", "follower"), default="auto",
+                        help="auto 參與主節點選舉，follower 只套用其他電腦發布的排程")
+    parser.add_argument("--sync-interval", type=float, default=5.0, help="同步檢查間隔秒數（預設 5）")
+    return parser.parse_args(argv)
+
+def forwarded_command(args):
+    """
+    要轉送給執行中實例的指令
+    :return: (指令, 參數)，不需轉送時為None
+    """
+    if args.play is not None:
+        return 'play', str(args.play)
+    if args.stop:
+        return 'stop', ''
+    if args.reload:
+        return 'reload', ''
+    if args.dump_metrics:
+        # 相對路徑由執行中的實例以其資料目錄解析
+        return 'metrics', args.dump_metrics
+    if args.dump_log is not None:
+        return 'dump-log', args.dump_log
+    if args.show or not args.headless:
+        # 再次開啟程式時顯示已在執行的視窗
+        return 'show', ''
+    return None
+
+def create_sync_node(args):
+    """依命令列參數建立排程同步節點，未指定共用資料夾時為None"""
+    if not args.sync_dir:
+        return None
+    from core.storage import Storage
+    from core.sync import SyncNode
+    return SyncNode(Storage(), args.sync_dir, node_id=args.sync_node,
+                    role=args.sync_role, interval=args.sync_interval)
+
+def run_headless(args, instance):
+    """無介面模式：不載入 Tk、字體與託盤"""
+    from core.daemon import HeadlessDaemon, redirect_output
+    log_file = args.log_file
+    if log_file is None and sys.stdout is None:
+        # 打包後的無主控台exe沒有標準輸出，改寫入資料目錄
+        log_file = os.path.join(application_path, 'data', 'radioone.log')
+    if log_file:
+        redirect_output(log_file)
+    daemon = HeadlessDaemon(
+        control_port=None,
+        http_port=args.http_port,
+        http_host=args.http_host,
+        http_token=args.http_token,
+        sync=create_sync_node(args)
+    )
+    # 控制通道同時接收再次啟動時轉送的指令
+    if args.control_port >= 0:
+        instance.serve(daemon.handle_command, port=args.control_port)
+    daemon.run()
+
+def run_gui(args, instance):
+    from ui.main_window import MainWindow
+    app = MainWindow(sync=create_sync_node(args), http_port=args.http_port,
+                     http_host=args.http_host, http_token=args.http_token)
+    # 介面模式一定開啟控制通道（再次啟動時轉送指令）
+    instance.serve(app.handle_control_command, port=max(args.control_port, 0))
+    app.run()
 
 def main():
     """主程式入口"""
-    app = MainWindow()
-    app.run()
+    args = parse_args()
+    lock_dir = default_lock_directory()
+    command = forwarded_command(args)
+    
+    # 已有實例在執行：轉送指令後立即結束，不載入介面
+    if command is not None:
+        response = forward_command(*command)
+        if response is not None:
+            if not response.get('ok'):
+                print(f"指令失敗: {response.get('error')}")
+                return 1
+            if response.get('path'):
+                print(response['path'])
+            return 0
+    if args.play is not None or args.stop or args.reload or args.dump_metrics or args.dump_log is not None:
+        print("沒有執行中的程式實例")
+        return 1
+    if args.http_port is not None and not args.http_token:
+        from core.http_api import is_loopback_host
+        if not is_loopback_host(args.http_host):
+            print(f"HTTP 管理介面監聽 {args.http_host} 時必須設定存取權杖（--http-token 或環境變數 RADIOONE_HTTP_TOKEN）")
+            return 1
+    
+    instance = SingleInstance("radioone", lock_dir)
+    try:
+        instance.acquire()
+    except SingleInstanceError:
+        # 另一個實例正在啟動，等待它開始接收指令
+        if command is not None and forward_command(*command, wait=5.0) is not None:
+            return 0
+        print("偵測到另一個程式實例正在執行")
+        return 1
+    
+    from core import log
+    log.configure(os.path.join(str(lock_dir), 'logs'), file_level=args.log_level)
+    log.install_exception_hooks()
+    try:
+        if args.headless:
+            run_headless(args, instance)
+        else:
+            run_gui(args, instance)
+    finally:
+        instance.release()
+        log.shutdown()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    # 打包後的exe啟動背景轉檔程序時需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
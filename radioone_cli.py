@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+radioone-cli：不開啟介面，直接以命令列批次管理播放排程。
+
+指令：
+    list       列出排程（可依週幾篩選）
+    add        新增一個排程
+    import     由 CSV 批次匯入排程（逐列串流讀取）
+    shift      將排程時間整體提前或延後 N 分鐘（跨午夜時週幾一併調整）
+    copy-day   將某一天的排程複製到其他天
+    validate   檢查排程引用的檔案與重複的播放時間
+    export-bundle / import-bundle
+               匯出、匯入排程與音訊組合包（只傳輸內容雜湊不同的音訊）
+    fleet      顯示多台電腦的排程同步狀態
+
+所有變更在記憶體中完成後一次寫回排程檔；程式正在執行時通知它只重新載入有變化的排程。
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+if getattr(sys, 'frozen', False):
+    ROOT = os.path.dirname(sys.executable)
+else:
+    ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from core.audio_utils import get_audio_duration  # noqa: E402
+from core.bundle import BundleError, HashCache, export_bundle, import_bundle, read_manifest  # noqa: E402
+from core.control import CONTROL_PORT_FILE  # noqa: E402
+from core.dragdrop import iter_validated_files  # noqa: E402
+from core.library import AudioLibrary, is_content_ref  # noqa: E402
+from core.playlist import expand_playlists  # noqa: E402
+from core.schedule import (  # noqa: E402
+    ALL_DAYS_MASK,
+    Schedule,
+    decode_schedules,
+    encode_schedules,
+    format_time,
+    parse_time,
+)
+from core.search import parse_day_term  # noqa: E402
+from core.singleton import forward_command  # noqa: E402
+from core.storage import Storage  # noqa: E402
+from core.sync import fleet_status  # noqa: E402
+
+# CSV 欄位中多個檔案的分隔字元
+FILE_SEPARATOR = '|'
+DAY_NAMES = ('週一', '週二', '週三', '週四', '週五', '週六', '週日')
+
+
+class CliError(Exception):
+    """命令列參數或資料錯誤"""
+
+
+def parse_days(text: str) -> int:
+    """
+    將週幾清單轉為位元遮罩
+    接受以逗號、頓號或空白分隔的名稱：monday、mon、週一、平日、週末、每天…
+    """
+    mask = 0
+    for term in text.replace('、', ',').replace(' ', ',').split(','):
+        if not term.strip():
+            continue
+        days = parse_day_term(term)
+        if days is None:
+            raise CliError(f"無法辨識的週幾: {term.strip()}")
+        for day in days:
+            mask |= 1 << day
+    if not mask:
+        raise CliError("請至少指定一天")
+    return mask
+
+
+def format_days(mask: int) -> str:
+    if mask == ALL_DAYS_MASK:
+        return '每天'
+    return '、'.join(name for index, name in enumerate(DAY_NAMES) if mask >> index & 1)
+
+
+class ScheduleBatch:
+    """載入一次排程、在記憶體中修改、最後一次寫回"""
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+        self.schedules: List[Schedule] = decode_schedules(storage.load_schedules())
+        self.next_id = max((s.id or 0 for s in self.schedules), default=0) + 1
+        self.changed = False
+        self._library: Optional[AudioLibrary] = None
+        self._durations: Dict[str, Optional[float]] = {}
+
+    @property
+    def library(self) -> AudioLibrary:
+        if self._library is None:
+            self._library = AudioLibrary(os.path.join(self.storage.data_dir, 'library'))
+        return self._library
+
+    def expand_files(self, files: Iterable[str]) -> List[str]:
+        """內容ID轉為音訊庫路徑，播放清單展開為其中的檔案"""
+        return expand_playlists(self.library.resolve_paths(list(files)))
+
+    def total_duration(self, files: Sequence[str]) -> Optional[int]:
+        """總時長（同一檔案只讀取一次）"""
+        total = 0.0
+        for path in self.expand_files(files):
+            if path not in self._durations:
+                self._durations[path] = get_audio_duration(path)
+            total += self._durations[path] or 0
+        return int(total) if total > 0 else None
+
+    def add(self, name: str, minute_of_day: int, days_mask: int, files: Sequence[str],
+            base_dir: Optional[str] = None) -> Schedule:
+        """新增排程；內容ID原樣保留，相對路徑以 base_dir（預設為目前目錄）為準"""
+        if not files:
+            raise CliError("請至少指定一個音訊檔案")
+        files = [f if is_content_ref(f) else os.path.abspath(os.path.join(base_dir or '', f)) for f in files]
+        schedule = Schedule(self.next_id, name or '播放排程', minute_of_day, days_mask, files,
+                            self.total_duration(files))
+        self.next_id += 1
+        self.schedules.append(schedule)
+        self.changed = True
+        return schedule
+
+    def invalid_files(self, schedules: Iterable[Schedule]) -> Dict[str, str]:
+        """檢查排程引用的檔案（每個檔案只檢查一次）：{實際路徑: 原因}"""
+        paths = {os.path.abspath(path) for schedule in schedules for path in self.expand_files(schedule.files)}
+        return {path: reason for path, reason in iter_validated_files(sorted(paths)) if reason}
+
+    def commit(self, dry_run: bool = False) -> bool:
+        """寫回排程檔並通知執行中的程式重新載入"""
+        if not self.changed:
+            print("沒有需要寫入的變更")
+            return True
+        if dry_run:
+            print("（試執行，未寫入排程檔）")
+            return True
+        if not self.storage.save_schedules(encode_schedules(self.schedules)):
+            return False
+        print(f"✓ 已寫入 {len(self.schedules)} 個排程: {self.storage.schedule_file}")
+        response = forward_command('reload', port_file=os.path.join(self.storage.data_dir, CONTROL_PORT_FILE))
+        if response is not None:
+            print("✓ 已通知執行中的程式重新載入排程")
+        return True
+
+
+# ---------------------------------------------------------------------- #
+# 指令
+# ---------------------------------------------------------------------- #
+def cmd_list(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    schedules = batch.schedules
+    if args.day:
+        mask = parse_days(args.day)
+        schedules = [s for s in schedules if s.days_mask & mask]
+    schedules = sorted(schedules, key=lambda s: (s.minute_of_day, s.id or 0))
+    if args.json:
+        print(json.dumps([s.to_dict() for s in schedules], ensure_ascii=False, indent=2))
+        return 0
+    for schedule in schedules:
+        files = ', '.join(batch.library.display_name(f) for f in schedule.files[:3])
+        if len(schedule.files) > 3:
+            files += f" …共 {len(schedule.files)} 個"
+        print(f"{schedule.id:>5}  {schedule.time}  {format_days(schedule.days_mask):<14}  {schedule.name}  [{files}]")
+    print(f"共 {len(schedules)} 個排程")
+    return 0
+
+
+def cmd_add(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    schedule = batch.add(args.name, _parse_time(args.time), parse_days(args.days), args.file)
+    print(f"✓ 新增排程 {schedule.id}: {schedule.name} {schedule.time} {format_days(schedule.days_mask)}")
+    return 0 if batch.commit(args.dry_run) else 1
+
+
+def iter_csv_rows(path: str, encoding: str) -> Iterable[Tuple[int, Dict[str, str]]]:
+    """
+    逐列讀取 CSV（不一次讀入整個檔案）
+    欄位：name、time、days、files（多個檔案以 | 分隔）
+    """
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding=encoding, newline='')
+    try:
+        reader = csv.DictReader(stream)
+        missing = {'time', 'days', 'files'} - set(reader.fieldnames or ())
+        if missing:
+            raise CliError(f"CSV 缺少欄位: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def cmd_import(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    if args.replace:
+        batch.schedules = []
+        batch.changed = True
+    # 相對路徑以 CSV 所在的目錄為準
+    base_dir = None if args.csv == '-' else os.path.dirname(os.path.abspath(args.csv))
+    errors: List[Tuple[int, str]] = []
+    added: List[Tuple[int, Schedule]] = []
+    for line_num, row in iter_csv_rows(args.csv, args.encoding):
+        try:
+            files = [f.strip() for f in (row.get('files') or '').split(FILE_SEPARATOR) if f.strip()]
+            schedule = batch.add((row.get('name') or '').strip(), _parse_time(row.get('time') or ''),
+                                 parse_days(row.get('days') or ''), files, base_dir)
+            added.append((line_num, schedule))
+        except CliError as e:
+            errors.append((line_num, str(e)))
+
+    # 寫入前檢查引用的檔案，適用與錯誤資料行相同的規則
+    invalid = batch.invalid_files(schedule for _, schedule in added)
+    if invalid:
+        rejected = set()
+        for line_num, schedule in added:
+            for path in batch.expand_files(schedule.files):
+                reason = invalid.get(os.path.abspath(path))
+                if reason:
+                    errors.append((line_num, f"{path}: {reason}"))
+                    rejected.add(id(schedule))
+                    break
+        batch.schedules = [s for s in batch.schedules if id(s) not in rejected]
+        added = [(line_num, s) for line_num, s in added if id(s) not in rejected]
+    errors.sort()
+    for line_num, error in errors[:20]:
+        print(f"第 {line_num} 行: {error}")
+    if len(errors) > 20:
+        print(f"...還有 {len(errors) - 20} 行錯誤")
+    if errors and not args.skip_invalid:
+        print(f"✗ {len(errors)} 行資料錯誤，未寫入任何變更（使用 --skip-invalid 略過錯誤的資料行）")
+        return 1
+    print(f"✓ 匯入 {len(added)} 個排程")
+    return 0 if batch.commit(args.dry_run) else 1
+
+
+def _rotate_days(mask: int, offset: int) -> int:
+    """將星期遮罩平移 offset 天（週日之後回到週一）"""
+    offset %= 7
+    return ((mask << offset) | (mask >> (7 - offset))) & ALL_DAYS_MASK
+
+
+def shift_schedule(schedule: Schedule, minutes: int) -> Schedule:
+    """
+    將排程時間平移；跨越午夜時週幾一併平移，實際播放的時刻保持一致
+    """
+    day_offset, minute_of_day = divmod(schedule.minute_of_day + minutes, 1440)
+    return schedule.copy(minute_of_day=minute_of_day, days_mask=_rotate_days(schedule.days_mask, day_offset))
+
+
+def cmd_shift(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    day_mask = parse_days(args.day) if args.day else None
+    ids = set(args.id or ())
+    shifted = 0
+    for index, schedule in enumerate(batch.schedules):
+        if ids and schedule.id not in ids:
+            continue
+        if day_mask is not None and not schedule.days_mask & day_mask:
+            continue
+        batch.schedules[index] = shift_schedule(schedule, args.minutes)
+        shifted += 1
+    if shifted:
+        batch.changed = True
+    print(f"✓ 已平移 {shifted} 個排程 {args.minutes:+d} 分鐘")
+    return 0 if batch.commit(args.dry_run) else 1
+
+
+def cmd_copy_day(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    source = parse_day_term(args.source)
+    if source is None or len(source) != 1:
+        raise CliError(f"來源必須是單一天: {args.source}")
+    source_bit = 1 << source[0]
+    targets = parse_days(','.join(args.targets)) & ~source_bit
+    if not targets:
+        raise CliError("目標日不可與來源相同")
+    copied = removed = 0
+    schedules = []
+    for schedule in batch.schedules:
+        if schedule.days_mask & source_bit:
+            if schedule.days_mask & targets != targets:
+                schedule = schedule.copy(days_mask=schedule.days_mask | targets)
+                copied += 1
+        elif args.replace and schedule.days_mask & targets:
+            # 目標日原有的排程改為不在目標日播放
+            schedule = schedule.copy(days_mask=schedule.days_mask & ~targets)
+            if not schedule.days_mask:
+                removed += 1
+                continue
+        schedules.append(schedule)
+    if schedules != batch.schedules:
+        batch.schedules = schedules
+        batch.changed = True
+    print(f"✓ {DAY_NAMES[source[0]]}的排程已加入 {format_days(targets)}（更新 {copied} 個，移除 {removed} 個）")
+    return 0 if batch.commit(args.dry_run) else 1
+
+
+def cmd_validate(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    problems = []
+    slots: Dict[Tuple[int, int], List[Schedule]] = {}
+    for schedule in batch.schedules:
+        if not schedule.days_mask:
+            problems.append(f"排程 {schedule.id} {schedule.name}: 沒有指定週幾")
+        if not schedule.files:
+            problems.append(f"排程 {schedule.id} {schedule.name}: 沒有音訊檔案")
+        for day in range(7):
+            if schedule.days_mask >> day & 1:
+                slots.setdefault((day, schedule.minute_of_day), []).append(schedule)
+    for (day, minute), schedules in sorted(slots.items()):
+        if len(schedules) > 1:
+            names = '、'.join(f"{s.id} {s.name}" for s in schedules)
+            problems.append(f"{DAY_NAMES[day]} {format_time(minute)} 有 {len(schedules)} 個排程同時播放: {names}")
+
+    # 每個檔案只檢查一次
+    users: Dict[str, List[Schedule]] = {}
+    for schedule in batch.schedules:
+        for path in batch.expand_files(schedule.files):
+            users.setdefault(os.path.abspath(path), []).append(schedule)
+    invalid = 0
+    for path, reason in iter_validated_files(list(users)):
+        if reason:
+            invalid += 1
+            ids = ', '.join(str(s.id) for s in users.get(path, ()))
+            problems.append(f"{path}: {reason}（排程 {ids}）")
+
+    for problem in problems:
+        print(problem)
+    print(f"檢查 {len(batch.schedules)} 個排程、{len(users)} 個檔案：{len(problems)} 個問題（{invalid} 個檔案無效）")
+    return 1 if problems else 0
+
+
+def _format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def cmd_export_bundle(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    ids = set(args.id or ())
+    schedules = [s for s in batch.schedules if not ids or s.id in ids]
+    hash_cache = HashCache(os.path.join(batch.storage.data_dir, 'cache', 'hashes.json'))
+    stats = export_bundle(schedules, batch.library, args.target, hash_cache=hash_cache, prune=not args.keep)
+    for ref in stats['missing']:
+        print(f"找不到檔案，未加入組合包: {ref}")
+    print(f"✓ 匯出 {stats['schedules']} 個排程、{stats['objects']} 個音訊到 {args.target}")
+    print(f"  寫入 {stats['written']} 個（{_format_size(stats['bytes_written'])}），"
+          f"略過未變更 {stats['skipped']} 個，移除 {stats['removed']} 個")
+    return 1 if stats['missing'] else 0
+
+
+def cmd_import_bundle(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    try:
+        if args.dry_run:
+            manifest = read_manifest(args.source)
+            missing = [key for key in manifest['objects'] if not batch.library.has_object(key)]
+            print(f"需要寫入 {len(missing)} 個音訊"
+                  f"（{_format_size(sum(manifest['objects'][key].get('size', 0) for key in missing))}）")
+            schedules = decode_schedules(manifest.get('schedules') or {})
+            stats = None
+        else:
+            schedules, stats = import_bundle(args.source, batch.library)
+    except BundleError as e:
+        raise CliError(str(e))
+    if stats:
+        print(f"✓ 音訊 {stats['objects']} 個：寫入 {stats['written']} 個（{_format_size(stats['bytes_written'])}），"
+              f"已存在 {stats['skipped']} 個")
+    if args.merge:
+        # 依ID取代同一排程，其餘排程保留
+        incoming = {s.id: s for s in schedules}
+        merged = [incoming.pop(s.id, s) for s in batch.schedules]
+        schedules = merged + [s for s in schedules if s.id in incoming]
+    if schedules != batch.schedules:
+        batch.schedules = schedules
+        batch.changed = True
+    print(f"✓ 匯入 {len(schedules)} 個排程")
+    return 0 if batch.commit(args.dry_run) else 1
+
+
+def cmd_fleet(batch: ScheduleBatch, args: argparse.Namespace) -> int:
+    status = fleet_status(args.sync_dir)
+    if args.json:
+        print(json.dumps(status, ensure_ascii=False, indent=2))
+        return 0 if status['consistent'] else 1
+    print(f"目前版本: {status['version']}（由 {status['leader'] or '—'} 發布）")
+    for node in status['nodes']:
+        if node['stale']:
+            state = '離線'
+        elif node['in_sync']:
+            state = '一致'
+        elif node.get('applied_version') == status['version'] and not node.get('error'):
+            state = '本機已修改'
+        else:
+            state = node.get('error') or '未同步'
+        role = '主節點' if node.get('role') == 'leader' else ''
+        print(f"  {node.get('node', '?'):<20} 版本 {node.get('applied_version', 0):>5}  {state} {role}".rstrip())
+    print("✓ 所有節點一致" if status['consistent'] else "✗ 有節點尚未套用目前版本或本機已修改")
+    return 0 if status['consistent'] else 1
+
+
+def _parse_time(text: str) -> int:
+    try:
+        return parse_time(text.strip())
+    except ValueError:
+        raise CliError(f"時間格式錯誤（應為 HH:MM）: {text}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="radioone-cli", description="批次管理自動廣播系統的播放排程")
+    parser.add_argument("--data-dir", help="資料目錄（預設為程式目錄下的 data）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="列出排程")
+    list_parser.add_argument("--day", help="只列出指定週幾的排程，例如 週一、weekend")
+    list_parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    list_parser.set_defaults(func=cmd_list)
+
+    add_parser = subparsers.add_parser("add", help="新增排程")
+    add_parser.add_argument("--name", default="播放排程", help="排程名稱")
+    add_parser.add_argument("--time", required=True, help="播放時間 HH:MM")
+    add_parser.add_argument("--days", required=True, help="週幾，例如 monday,wednesday、平日、每天")
+    add_parser.add_argument("--file", action="append", required=True, help="音訊檔案（可重複指定）")
+    add_parser.set_defaults(func=cmd_add)
+
+    import_parser = subparsers.add_parser("import", help="由 CSV 匯入排程（欄位：name,time,days,files）")
+    import_parser.add_argument("csv", help="CSV 檔案路徑，- 表示標準輸入")
+    import_parser.add_argument("--encoding", default="utf-8-sig", help="CSV 編碼（預設 utf-8-sig，Excel 繁中可用 cp950）")
+    import_parser.add_argument("--replace", action="store_true", help="取代全部現有排程")
+    import_parser.add_argument("--skip-invalid", action="store_true", help="略過錯誤的資料行，仍寫入其餘排程")
+    import_parser.set_defaults(func=cmd_import)
+
+    shift_parser = subparsers.add_parser("shift", help="將排程時間平移 N 分鐘")
+    shift_parser.add_argument("minutes", type=int, help="分鐘數（負數為提前）")
+    shift_parser.add_argument("--day", help="只平移在指定週幾播放的排程")
+    shift_parser.add_argument("--id", type=int, action="append", help="只平移指定ID的排程（可重複指定）")
+    shift_parser.set_defaults(func=cmd_shift)
+
+    copy_parser = subparsers.add_parser("copy-day", help="將某一天的排程複製到其他天")
+    copy_parser.add_argument("source", help="來源日，例如 monday 或 週一")
+    copy_parser.add_argument("targets", nargs="+", help="目標日，例如 tuesday 週三 週末")
+    copy_parser.add_argument("--replace", action="store_true", help="目標日原有的其他排程不再於目標日播放")
+    copy_parser.set_defaults(func=cmd_copy_day)
+
+    validate_parser = subparsers.add_parser("validate", help="檢查檔案與重複的播放時間")
+    validate_parser.set_defaults(func=cmd_validate)
+
+    export_parser = subparsers.add_parser("export-bundle", help="匯出排程與音訊組合包")
+    export_parser.add_argument("target", help="組合包資料夾，或以 .zip 結尾的單一檔案")
+    export_parser.add_argument("--id", type=int, action="append", help="只匯出指定ID的排程（可重複指定）")
+    export_parser.add_argument("--keep", action="store_true", help="保留組合包資料夾中不再引用的音訊")
+    export_parser.set_defaults(func=cmd_export_bundle)
+
+    bundle_parser = subparsers.add_parser("import-bundle", help="匯入組合包（只寫入本機沒有的音訊）")
+    bundle_parser.add_argument("source", help="組合包資料夾或 .zip 檔案")
+    bundle_parser.add_argument("--merge", action="store_true", help="只新增或取代同ID的排程，保留其他排程")
+    bundle_parser.set_defaults(func=cmd_import_bundle)
+
+    fleet_parser = subparsers.add_parser("fleet", help="顯示多台電腦的排程同步狀態")
+    fleet_parser.add_argument("sync_dir", help="同步用的共用資料夾")
+    fleet_parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    fleet_parser.set_defaults(func=cmd_fleet)
+
+    for sub in (add_parser, import_parser, shift_parser, copy_parser, bundle_parser):
+        sub.add_argument("--dry-run", action="store_true", help="只顯示結果，不寫入排程檔")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    storage = Storage(args.data_dir)
+    try:
+        batch = ScheduleBatch(storage)
+        return args.func(batch, args)
+    except CliError as e:
+        print(f"錯誤: {e}")
+        return 2
+    except (IOError, OSError) as e:
+        print(f"讀取檔案失敗: {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,16 +6,44 @@
 import sys
 import os
 import time
+import json
+import threading
+import socket
+import tempfile
+import shutil
+import wave
+from http.client import HTTPConnection
 from datetime import datetime, timedelta
+from pathlib import Path
 
 # 添加父目錄到路徑
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.storage import Storage
+from core.storage import Storage, SCHEMA_VERSION
 from core.player import AudioPlayer
 from core.scheduler import Scheduler
-from core.dragdrop import validate_dropped_files
+from core.dragdrop import validate_dropped_files, expand_dropped_paths, validate_playlist, check_playlist_batch
+from core.playlist import expand_playlists, read_playlist
+from core.probe import sniff_format
+from core.transcoder import can_transcode
 from core.notifier import Notifier
+from core.verifier import FileVerifier
+from core.schedule import Schedule, decode_schedules, encode_schedules, encode_binary, decode_binary, parse_time, days_to_mask, merge_schedules
+from core.search import ScheduleSearchIndex
+from ui.timers import UITimerManager
+from core.daemon import HeadlessDaemon, CONTROL_PORT_FILE
+from core.control import send_command
+from core.events import EventBus
+from core.singleton import SingleInstance, SingleInstanceError, forward_command
+from core.watcher import ScheduleFileWatcher
+from core.sync import SyncNode, fleet_status
+from core.bundle import BundleError, export_bundle, import_bundle
+from core.library import AudioLibrary
+from core.metrics import MetricsRegistry, REGISTRY, metrics_command
+from core.control import ControlServer, resolve_output_path
+from core.http_api import HttpControlServer, is_loopback_host
+from core.log import LogManager, FlightRecorder, get_logger, dump_log_command
+import radioone_cli
 
 def test_storage():
     """測試數據存儲功能"""
@@ -51,6 +79,15 @@ def test_storage():
     assert loaded_data['schedules'][0]['name'] == "測試計劃1", "載入失敗"
     print("  ✓ 載入成功")
     
+    # 測試舊版資料遷移（只執行一次並寫回）
+    print("✓ 測試資料格式遷移...")
+    migrated = loaded_data['schedules'][0]
+    assert loaded_data['version'] == SCHEMA_VERSION, "未升級至目前版本"
+    assert 'duration' not in migrated, "遷移欄位錯誤"
+    assert not Schedule.from_dict(migrated).has_duration, "遷移時不應讀取檔案計算時長"
+    assert storage.load_schedules() == loaded_data, "遷移結果未寫回"
+    print("  ✓ 遷移成功")
+    
     # 清理測試數據
     storage.save_schedules({"schedules": []})
     print("  ✓ 測試數據已清理")
@@ -82,6 +119,77 @@ def test_dragdrop():
     assert len(invalid_files) >= 1, "驗證功能異常"
     print("  ✓ 格式驗證正常")
     
+    print("✓ 測試資料夾遞迴展開...")
+    import tempfile
+    with tempfile.TemporaryDirectory() as temp_dir:
+        headers = {
+            'a.mp3': b'\xff\xfb\x90\x00',
+            'notes.txt': b'\x00',
+            os.path.join('sub', 'b.wav'): b'RIFF\x24\x00\x00\x00WAVEfmt ',
+        }
+        for relative, header in headers.items():
+            path = os.path.join(temp_dir, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(header)
+        expanded = list(expand_dropped_paths([temp_dir]))
+        assert sorted(os.path.basename(p) for p in expanded) == ['a.mp3', 'b.wav'], "資料夾展開錯誤"
+        valid_files, _ = validate_dropped_files(expand_dropped_paths([temp_dir]))
+        assert len(valid_files) == 2, "資料夾驗證錯誤"
+    print("  ✓ 資料夾展開正常")
+    
+    print("✓ 測試檔頭格式辨識...")
+    assert sniff_format(b'ID3\x04\x00\x00\x00\x00\x00\x00\xff\xfb') == 'mp3', "MP3辨識錯誤"
+    assert sniff_format(b'OggS' + b'\x00' * 24 + b'\x01vorbis') == 'ogg', "Ogg辨識錯誤"
+    assert sniff_format(b'\x00\x00\x00\x20ftypM4A ') == 'mp4', "M4A辨識錯誤"
+    assert sniff_format(b'\xff\xf1\x50\x80') == 'aac', "AAC辨識錯誤"
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 副檔名為 mp3 但內容為 WMA：匯入時即被排除
+        fake_path = os.path.join(temp_dir, 'fake.mp3')
+        with open(fake_path, 'wb') as f:
+            f.write(bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c'))
+        valid_files, invalid_files = validate_dropped_files([fake_path])
+        if can_transcode('asf'):
+            assert valid_files == [fake_path], "可轉檔的格式應被接受"
+        else:
+            assert not valid_files and 'WMA' in invalid_files[0][1], "不支援格式應被排除"
+    print("  ✓ 格式辨識正常")
+    
+    print("✓ 測試播放清單...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, 'music'))
+        song_path = os.path.join(temp_dir, 'music', 'song.mp3')
+        with open(song_path, 'wb') as f:
+            f.write(b'\xff\xfb\x90\x00')
+        playlist_path = os.path.join(temp_dir, 'set.m3u')
+        with open(playlist_path, 'w', encoding='utf-8') as f:
+            f.write('#EXTM3U\n#EXTINF:3,Song\nmusic/song.mp3\nmissing.mp3\nhttp://example.com/live\n')
+        pls_path = os.path.join(temp_dir, 'set.pls')
+        with open(pls_path, 'w', encoding='utf-8') as f:
+            f.write('[playlist]\nFile1=music/song.mp3\nTitle1=Song\nNumberOfEntries=1\n')
+        valid_files, _ = validate_dropped_files([playlist_path])
+        assert valid_files == [playlist_path], "播放清單應以路徑引用"
+        valid_count, invalid_entries = validate_playlist(playlist_path)
+        assert valid_count == 1 and len(invalid_entries) == 1, "播放清單項目驗證錯誤"
+        assert expand_playlists([pls_path, song_path]) == [song_path, song_path], "播放清單展開錯誤"
+        empty_path = os.path.join(temp_dir, 'empty.m3u')
+        with open(empty_path, 'w', encoding='utf-8') as f:
+            f.write('missing.mp3\n')
+        valid_files, invalid_files = validate_dropped_files([playlist_path, empty_path])
+        check_playlist_batch(valid_files, invalid_files)
+        assert valid_files == [playlist_path], "沒有可用檔案的播放清單應被排除"
+        assert len(invalid_files) == 3, "播放清單中的無效項目應列出"
+        outer_path = os.path.join(temp_dir, 'outer.m3u')
+        with open(outer_path, 'w', encoding='utf-8') as f:
+            f.write('set.pls\nouter.m3u\nmusic/song.mp3\n')
+        assert read_playlist(outer_path) == (song_path, song_path), "內層播放清單應展開並略過循環引用"
+        assert validate_playlist(outer_path) == (2, []), "內層播放清單驗證錯誤"
+        with open(pls_path, 'w', encoding='utf-8') as f:
+            f.write('[playlist]\nFile1=music/song.mp3\nFile2=music/song.mp3\nNumberOfEntries=2\n')
+        os.utime(pls_path, (time.time() + 10, time.time() + 10))
+        assert len(read_playlist(outer_path)) == 3, "內層播放清單修改後應重新展開"
+    print("  ✓ 播放清單解析正常")
+    
     print("✓ 檔案拖放驗證功能測試通過！\n")
     return True
 
@@ -121,6 +229,18 @@ def test_scheduler():
     assert next_time is not None, "無法獲取下一個播放時間"
     print(f"  ✓ 下一個播放時間: {next_time['time']}")
     
+    print("✓ 測試依ID比對套用計劃...")
+    original = scheduler.schedules[0]
+    scheduler.last_checked_days[1] = now.strftime("%Y-%m-%d")
+    renamed = original.copy(name='改名排程')
+    second = original.copy(id=2)
+    added, changed, removed = scheduler.apply_schedules([renamed, second])
+    assert (added, changed, removed) == ([2], [1], []), "差異比對錯誤"
+    assert 1 in scheduler.last_checked_days, "時間未變時應保留觸發記錄"
+    scheduler.apply_schedules([renamed.copy(minute_of_day=(renamed.minute_of_day + 1) % 1440)])
+    assert 1 not in scheduler.last_checked_days, "時間改變時應清除觸發記錄"
+    print("  ✓ 差異套用正確")
+    
     print("✓ 測試移除計劃...")
     scheduler.remove_schedule(1)
     assert len(scheduler.schedules) == 0, "移除失敗"
@@ -234,6 +354,804 @@ def test_integration():
     print("✓ 整合測試通過！\n")
     return True
 
+def test_schedule_model():
+    """測試排程資料模型與編碼"""
+    print("="*50)
+    print("測試 7: 排程資料模型")
+    print("="*50)
+    
+    legacy = {
+        'id': 3,
+        'name': '午休鐘聲',
+        'days': ['wednesday', 'monday'],
+        'time': '12:05',
+        'files': ['chime.mp3', 'chime.mp3'],
+        'duration': 30,
+        'invalid_files': []
+    }
+    
+    print("✓ 測試舊版字典轉換...")
+    schedule = Schedule.from_dict(legacy)
+    assert schedule.minute_of_day == 12 * 60 + 5, "時間解析錯誤"
+    assert schedule.days == ['monday', 'wednesday'], "星期轉換錯誤"
+    assert schedule.runs_on(0) and not schedule.runs_on(1), "星期遮罩錯誤"
+    assert schedule.duration_seconds == 30, "舊版時長欄位未轉換"
+    assert schedule.files[0] is schedule.files[1], "檔案路徑未駐留"
+    print("  ✓ 轉換正確")
+    
+    print("✓ 測試JSON與二進位往返...")
+    data = encode_schedules([schedule])
+    assert data['version'] >= 1, "缺少版本欄位"
+    assert 'invalid_files' not in data['schedules'][0], "殘留臨時欄位"
+    assert decode_schedules(data) == [schedule], "JSON往返失敗"
+    assert decode_binary(encode_binary([schedule])) == [schedule], "二進位往返失敗"
+    variants = [
+        Schedule(2, '小數時長', 60, 1, ['a.mp3'], 183.52),
+        Schedule(3, '無法取得', 60, 1, ['a.mp3'], None),
+        Schedule(4, '尚未計算', 60, 1, ['a.mp3']),
+    ]
+    assert decode_binary(encode_binary(variants)) == variants, "時長二進位往返失敗"
+    print("  ✓ 往返一致")
+    
+    print("✓ 排程資料模型測試通過！\n")
+    return True
+
+def test_file_verifier():
+    """測試背景檔案檢查快取"""
+    print("="*50)
+    print("測試 8: 檔案可用性檢查")
+    print("="*50)
+    
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_path = os.path.join(temp_dir, 'bell.mp3')
+        with open(audio_path, 'wb') as f:
+            f.write(b'\xff\xfb' + b'\x00' * 64)
+        missing_path = os.path.join(temp_dir, 'missing.mp3')
+        
+        changes = []
+        verifier = FileVerifier(on_change=changes.append, batch_size=1)
+        verifier.set_paths([audio_path, missing_path])
+        
+        print("✓ 測試批次檢查...")
+        changed = verifier.refresh()
+        assert set(changed) == {audio_path, missing_path}, "首次檢查應回報所有檔案"
+        assert verifier.status(audio_path).size == 66, "檔案大小錯誤"
+        assert verifier.missing([audio_path, missing_path]) == [missing_path], "缺少檔案判斷錯誤"
+        assert verifier.refresh() == [], "狀態未變時不應回報"
+        print("  ✓ 狀態表正確")
+        
+        print("✓ 測試快取查詢...")
+        assert verifier.is_available(audio_path), "快取應為可用"
+        with open(missing_path, 'wb') as f:
+            f.write(b'OggS' + b'\x00' * 24 + b'\x01vorbis')
+        assert verifier.is_available(missing_path), "不存在的檔案應即時重新檢查"
+        print("  ✓ 快取查詢正確")
+        
+        print("✓ 測試無法辨識格式的檔案...")
+        with open(audio_path, 'wb') as f:
+            f.write(b'\x00' * 80)
+        os.utime(audio_path, (time.time() + 5, time.time() + 5))
+        verifier.refresh()
+        assert verifier.is_available(audio_path), "檔案存在即應可用，不因檔頭辨識結果略過"
+        assert verifier.unrecognized([audio_path, missing_path]) == [audio_path], "被取代的檔案應重新辨識"
+        assert verifier.filter_available([audio_path, missing_path]) == [audio_path, missing_path]
+        print("  ✓ 辨識結果只用於提示")
+    
+    print("✓ 檔案可用性檢查測試通過！\n")
+    return True
+
+def test_search_index():
+    """測試排程搜尋索引"""
+    print("="*50)
+    print("測試 9: 排程搜尋索引")
+    print("="*50)
+    
+    index = ScheduleSearchIndex()
+    index.update('1', '早自習鐘聲', ['bell.mp3'], parse_time('07:30'), days_to_mask(['monday', 'tuesday']))
+    index.update('2', '午休音樂', ['music.mp3', 'Bell_Long.wav'], parse_time('12:10'), days_to_mask(['saturday']))
+    index.update('3', '放學鐘聲', ['bell.mp3'], parse_time('23:50'), days_to_mask(['friday']))
+    
+    print("✓ 測試名稱、檔名、週幾與時間條件...")
+    assert index.search('') is None, "空白查詢應回傳None"
+    assert index.search('鐘聲') == {'1', '3'}, "名稱搜尋錯誤"
+    assert index.search('BELL') == {'1', '2', '3'}, "檔名搜尋應不分大小寫"
+    assert index.search('bell_l') == {'2'}, "檔名片段搜尋錯誤"
+    assert index.search('週末') == {'2'}, "週幾搜尋錯誤"
+    assert index.search('07:00-08:00 鐘聲') == {'1'}, "時間範圍搜尋錯誤"
+    assert index.search('23:00-01:00') == {'3'}, "跨午夜時間範圍錯誤"
+    print("  ✓ 查詢結果正確")
+    
+    print("✓ 測試逐字輸入時沿用上次結果...")
+    assert index.search('b') == {'1', '2', '3'}, "單字元搜尋錯誤"
+    assert index.search('bell_') == {'2'}, "延伸查詢應在上次結果中篩選"
+    assert index.search('bell_ 週六') == {'2'}, "新增條件應在上次結果中篩選"
+    assert index.search('mo') == set(), "文字條件錯誤"
+    assert index.search('mon') == {'1'}, "文字延伸為週幾條件時應重新查詢"
+    assert index.search('07:0') == set() and index.search('07:00-08:00') == {'1'}, "延伸為時間條件時應重新查詢"
+    assert index.search('23:00-01:00 放學') == {'3'}, "時間條件後新增文字條件錯誤"
+    print("  ✓ 沿用結果正確")
+    
+    print("✓ 測試索引逐筆更新...")
+    index.update('1', '升旗', ['anthem.mp3'], parse_time('07:30'), days_to_mask(['monday']))
+    index.remove('3')
+    assert index.search('鐘聲') == set(), "更新後舊名稱應移除"
+    assert index.search('升旗 週一') == {'1'}, "更新後新名稱應可搜尋"
+    assert len(index) == 2, "索引筆數錯誤"
+    print("  ✓ 逐筆更新正確")
+    
+    print("✓ 排程搜尋索引測試通過！\n")
+    return True
+
+def test_ui_timers():
+    """測試介面計時器隱藏時暫停"""
+    print("="*50)
+    print("測試 10: 介面計時器暫停")
+    print("="*50)
+    
+    class FakeRoot:
+        def __init__(self):
+            self.jobs = {}
+            self.next_id = 0
+        def after(self, delay_ms, callback, *args):
+            self.next_id += 1
+            self.jobs[self.next_id] = (callback, args)
+            return self.next_id
+        def after_cancel(self, job):
+            self.jobs.pop(job, None)
+        def fire_all(self):
+            jobs, self.jobs = self.jobs, {}
+            for callback, args in jobs.values():
+                callback(*args)
+    
+    root = FakeRoot()
+    timers = UITimerManager(root)
+    ticks = []
+    
+    def tick():
+        ticks.append(1)
+        timers.schedule('clock', 1000, tick)
+    
+    print("✓ 測試可見時正常排程...")
+    timers.run_now('clock', tick)
+    timers.schedule('clock', 1000, tick)
+    assert len(root.jobs) == 1, "同名計時器應只保留一個"
+    root.fire_all()
+    assert len(ticks) == 2, "計時器應執行"
+    print("  ✓ 正常排程")
+    
+    print("✓ 測試隱藏時暫停、顯示時立即補跑...")
+    timers.set_visible(False)
+    assert not root.jobs, "隱藏時不應有待執行的計時器"
+    timers.schedule('clock', 1000, tick)
+    assert not root.jobs, "隱藏時排程應暫停"
+    timers.set_visible(True)
+    assert len(ticks) == 3, "顯示時應立即執行一次"
+    assert len(root.jobs) == 1, "顯示後應恢復定期更新"
+    assert timers.stats()['timers']['clock'][0] == 3, "執行次數統計錯誤"
+    print("  ✓ 暫停與恢復正確")
+    
+    print("✓ 介面計時器測試通過！\n")
+    return True
+
+def test_headless_daemon():
+    """測試無介面模式與本機控制通道"""
+    print("="*50)
+    print("測試 11: 無介面模式")
+    print("="*50)
+    
+    storage = Storage()
+    test_file = os.path.join(storage.data_dir, "daemon_test.wav")
+    with open(test_file, "wb") as f:
+        f.write(b"RIFF\x24\x00\x00\x00WAVEfmt ")
+    storage.save_schedules(encode_schedules([
+        Schedule(1, "鐘聲", parse_time("08:00"), days_to_mask(["monday"]), [test_file])
+    ]))
+    
+    daemon = HeadlessDaemon(storage=storage)
+    daemon.start()
+    port_file = os.path.join(storage.data_dir, CONTROL_PORT_FILE)
+    try:
+        print("✓ 測試控制指令...")
+        response = send_command(port_file, "status")
+        assert response and response['ok'], "應回應狀態"
+        assert response['status']['schedules'] == 1, "排程數量錯誤"
+        assert response['status']['next_play']['schedule'] == 1, "下次播放排程錯誤"
+        assert not send_command(port_file, "play", "99")['ok'], "不存在的排程應回應錯誤"
+        assert not send_command(port_file, "unknown")['ok'], "未知指令應回應錯誤"
+        print("  ✓ 指令回應正確")
+        
+        print("✓ 測試重新載入...")
+        # 停止監看，改由指令觸發重新載入
+        daemon.schedule_watcher.stop()
+        storage.save_schedules(encode_schedules([]))
+        response = send_command(port_file, "reload")
+        assert response['removed'] == [1], "重新載入應移除排程"
+        assert daemon.scheduler.schedules == [], "排程器應同步更新"
+        print("  ✓ 重新載入正確")
+        
+        assert send_command(port_file, "quit")['ok'], "結束指令失敗"
+    finally:
+        daemon.shutdown()
+        os.remove(test_file)
+    assert send_command(port_file, "status") is None, "結束後不應有回應"
+    
+    print("✓ 無介面模式測試通過！\n")
+    return True
+
+def test_http_api():
+    """測試HTTP管理介面"""
+    print("="*50)
+    print("測試 12: HTTP 管理介面")
+    print("="*50)
+    
+    storage = Storage()
+    storage.save_schedules(encode_schedules([]))
+    test_file = os.path.join(storage.data_dir, "http_test.wav")
+    with open(test_file, "wb") as f:
+        f.write(b"RIFF\x24\x00\x00\x00WAVEfmt ")
+    
+    daemon = HeadlessDaemon(storage=storage, control_port=None, http_port=0, http_token="secret")
+    daemon.start()
+    
+    def request(method, path, body=None, token="secret"):
+        conn = HTTPConnection("127.0.0.1", daemon.http.port, timeout=5)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        result = response.status, json.loads(response.read())
+        conn.close()
+        return result
+    
+    try:
+        print("✓ 測試權杖與健康檢查...")
+        assert request("GET", "/status", token=None)[0] == 401, "未帶權杖應拒絕"
+        status, body = request("GET", "/health")
+        assert status == 200 and body['health']['scheduler'], "健康檢查錯誤"
+        print("  ✓ 權杖與健康檢查正確")
+        
+        print("✓ 測試排程增刪改...")
+        data = {"name": "早自習", "time": "07:30", "days": ["monday"], "files": [test_file]}
+        status, body = request("POST", "/schedules", data)
+        assert status == 201 and body['schedule']['id'] == 1, "新增排程失敗"
+        assert request("POST", "/schedules", dict(data, time="25:00"))[0] == 400, "錯誤時間應回應400"
+        status, body = request("PUT", "/schedules/1", dict(data, time="08:00"))
+        assert status == 200 and body['schedule']['time'] == "08:00", "更新排程失敗"
+        assert decode_schedules(storage.load_schedules())[0].time == "08:00", "更新應寫入排程檔"
+        assert daemon.scheduler.schedules[0].time == "08:00", "排程器應同步更新"
+        status, body = request("GET", "/schedules")
+        assert [s['id'] for s in body['schedules']] == [1], "排程列表錯誤"
+        assert request("DELETE", "/schedules/1")[0] == 200, "刪除排程失敗"
+        assert request("DELETE", "/schedules/1")[0] == 404, "重複刪除應回應404"
+        print("  ✓ 排程增刪改正確")
+        
+        print("✓ 測試狀態快照...")
+        _, first = request("GET", "/status")
+        assert first['status']['schedules'] == 0, "狀態快照應反映刪除"
+        assert request("GET", "/queue")[1]['queue']['pending'] == [], "佇列查詢錯誤"
+        print("  ✓ 狀態快照正確")
+        
+        print("✓ 測試監聽位址限制...")
+        assert is_loopback_host("127.0.0.1") and is_loopback_host("::1") and is_loopback_host("localhost")
+        try:
+            HttpControlServer(daemon, host="0.0.0.0", port=0)
+            assert False, "開放區域網路且未設定權杖時應拒絕"
+        except ValueError:
+            pass
+        HttpControlServer(daemon, host="0.0.0.0", port=0, token="secret")
+        print("  ✓ 非本機位址必須設定權杖")
+    finally:
+        daemon.shutdown()
+        os.remove(test_file)
+    
+    print("✓ HTTP 管理介面測試通過！\n")
+    return True
+
+def test_event_stream():
+    """測試事件廣播與事件串流"""
+    print("="*50)
+    print("測試 13: 事件串流")
+    print("="*50)
+    
+    print("✓ 測試緩衝上限...")
+    bus = EventBus()
+    fast = bus.subscribe(max_buffer=4)
+    slow = bus.subscribe(max_buffer=4)
+    for index in range(3):
+        bus.publish('queue', queue_size=index)
+    assert [e['data']['queue_size'] for e in fast.drain()] == [0, 1, 2], "事件順序錯誤"
+    bus.publish('queue', queue_size=3)
+    assert not slow.closed, "緩衝區未滿不應斷開"
+    bus.publish('queue', queue_size=4)
+    assert len(fast.drain()) == 2, "應收到新事件"
+    assert slow.closed and slow.dropped, "緩衝區滿時應斷開慢速訂閱者"
+    assert bus.subscriber_count == 1, "斷開的訂閱者應移除"
+    fast.close()
+    print("  ✓ 慢速訂閱者被斷開，發布端不等待")
+    
+    print("✓ 測試 Server-Sent Events...")
+    daemon = HeadlessDaemon(control_port=None, http_port=0)
+    daemon.start()
+    try:
+        sock = socket.create_connection(("127.0.0.1", daemon.http.port), timeout=5)
+        sock.sendall(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        deadline = time.time() + 5
+        while daemon.events.subscriber_count == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        daemon.events.publish('trigger', schedule=7)
+        received = b""
+        while b"event: trigger" not in received or not received.endswith(b"\n\n"):
+            chunk = sock.recv(4096)
+            assert chunk, "事件串流不應中斷"
+            received += chunk
+        sock.close()
+        assert b"text/event-stream" in received, "應回應事件串流"
+        assert b'"schedule": 7' in received, "事件內容錯誤"
+    finally:
+        daemon.shutdown()
+    print("  ✓ 事件串流正確")
+    
+    print("✓ 事件串流測試通過！\n")
+    return True
+
+def test_single_instance_forwarding():
+    """測試單一實例與指令轉送"""
+    print("="*50)
+    print("測試 14: 單一實例指令轉送")
+    print("="*50)
+    
+    lock_dir = Path(tempfile.mkdtemp())
+    port_file = lock_dir / "control.json"
+    received = []
+    
+    def handler(command, argument):
+        received.append((command, argument))
+        return {'ok': True}
+    
+    instance = SingleInstance("radioone_test", lock_dir)
+    instance.acquire()
+    try:
+        instance.serve(handler)
+        print("✓ 測試第二個實例...")
+        second = SingleInstance("radioone_test", lock_dir)
+        try:
+            second.acquire()
+            assert False, "第二個實例不應取得鎖"
+        except SingleInstanceError:
+            pass
+        response = forward_command("play", "3", port_file=port_file)
+        assert response == {'ok': True}, "指令應轉送成功"
+        assert received == [("play", "3")], "持有鎖的實例應收到指令"
+        print("  ✓ 指令已轉送給執行中的實例")
+    finally:
+        instance.release()
+    assert forward_command("show", port_file=port_file) is None, "實例結束後不應有回應"
+    assert not port_file.exists(), "結束時應移除埠號檔"
+    shutil.rmtree(lock_dir, ignore_errors=True)
+    
+    print("✓ 單一實例測試通過！\n")
+    return True
+
+def test_cli():
+    """測試命令列排程管理"""
+    print("="*50)
+    print("測試 15: 命令列排程管理")
+    print("="*50)
+    
+    work_dir = tempfile.mkdtemp()
+    data_dir = os.path.join(work_dir, "data")
+    audio_file = os.path.join(work_dir, "test.wav")
+    with wave.open(audio_file, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b'\x00' * 1600)
+    csv_file = os.path.join(work_dir, "schedules.csv")
+    with open(csv_file, 'w', encoding='utf-8') as f:
+        f.write("name,time,days,files\n")
+        f.write(f"早安,07:30,平日,{audio_file}\n")
+        f.write(f"晚間,23:50,週五,{audio_file}|{audio_file}\n")
+        f.write(f"錯誤,25:00,週一,{audio_file}\n")
+        f.write("相對路徑,08:00,週二,test.wav\n")
+        f.write("缺少檔案,09:00,週二,missing.wav\n")
+    
+    def load():
+        return decode_schedules(Storage(data_dir).load_schedules())
+    
+    try:
+        print("✓ 測試 CSV 匯入...")
+        assert radioone_cli.main(["--data-dir", data_dir, "import", csv_file]) == 1, "有錯誤的資料行應失敗"
+        assert load() == [], "匯入失敗時不應寫入"
+        assert radioone_cli.main(["--data-dir", data_dir, "import", csv_file, "--skip-invalid"]) == 0
+        schedules = load()
+        assert [s.name for s in schedules] == ["早安", "晚間", "相對路徑"], "應略過錯誤的資料行與缺少的檔案"
+        assert schedules[0].days_mask == days_to_mask(['monday', 'tuesday', 'wednesday', 'thursday', 'friday'])
+        assert list(schedules[2].files) == [audio_file], "相對路徑應以 CSV 所在目錄為準"
+        assert radioone_cli.ScheduleBatch(Storage(data_dir)).add("內容", 0, 1, ["lib:abc"]).files == ("lib:abc",), \
+            "內容ID不應轉為路徑"
+        print("  ✓ 錯誤的資料行與無效的檔案已略過")
+        
+        print("✓ 測試時間平移（跨午夜）...")
+        radioone_cli.main(["--data-dir", data_dir, "shift", "15", "--id", "2"])
+        late = load()[1]
+        assert late.time == "00:05" and late.days == ['saturday'], "跨午夜時週幾應一併平移"
+        print("  ✓ 23:50 週五 → 00:05 週六")
+        
+        print("✓ 測試複製某天的排程...")
+        radioone_cli.main(["--data-dir", data_dir, "copy-day", "monday", "sunday"])
+        assert load()[0].runs_on(6), "週一的排程應加入週日"
+        
+        print("✓ 測試檢查...")
+        assert radioone_cli.main(["--data-dir", data_dir, "validate"]) == 0, "檔案皆存在時應通過"
+        radioone_cli.main(["--data-dir", data_dir, "add", "--time", "07:30", "--days", "週一",
+                           "--file", os.path.join(work_dir, "missing.mp3")])
+        assert radioone_cli.main(["--data-dir", data_dir, "validate"]) == 1, "應發現缺少的檔案與重複時間"
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 命令列測試通過！\n")
+    return True
+
+def test_schedule_file_watcher():
+    """測試排程檔監看與合併"""
+    print("="*50)
+    print("測試 16: 排程檔監看")
+    print("="*50)
+    
+    def make(schedule_id, time_str, name="排程"):
+        return Schedule(schedule_id, name, parse_time(time_str), days_to_mask(["monday"]), ["a.mp3"], None)
+    
+    print("✓ 測試三方合併...")
+    base = [make(1, "08:00"), make(2, "09:00"), make(3, "10:00")]
+    local = [base[0], make(2, "09:30"), base[2], make(4, "12:00")]
+    remote = [make(1, "08:15"), base[1], make(5, "13:00")]
+    merged, conflicts = merge_schedules(base, local, remote)
+    assert [(s.id, s.time) for s in merged] == [(1, "08:15"), (2, "09:30"), (5, "13:00"), (4, "12:00")], \
+        "應套用外部修改、保留本機修改並移除外部刪除的排程"
+    assert conflicts == [], "沒有衝突"
+    merged, conflicts = merge_schedules(base, local, [make(2, "09:45")])
+    assert conflicts == [2] and merged[0].time == "09:30", "兩邊都修改時預設保留本機版本"
+    merged, _ = merge_schedules(base, local, [make(2, "09:45")], prefer='remote')
+    assert merged[0].time == "09:45", "可選擇以排程檔為準"
+    print("  ✓ 合併結果正確")
+    
+    print("✓ 測試外部修改偵測...")
+    work_dir = tempfile.mkdtemp()
+    storage = Storage(work_dir)
+    storage.save_schedules(encode_schedules(base))
+    notified = []
+    watcher = ScheduleFileWatcher(storage.schedule_file, on_change=lambda: notified.append(True), settle=0)
+    try:
+        watcher.mark_current()
+        assert not watcher.poll(), "未修改時不應通知"
+        with watcher.writing():
+            storage.save_schedules(encode_schedules(local))
+        assert not watcher.poll() and not notified, "自己的寫入不應視為外部修改"
+        Storage(work_dir).save_schedules(encode_schedules(remote))
+        assert watcher.has_changed(), "應偵測到外部修改"
+        assert watcher.poll() and len(notified) == 1, "外部修改應通知"
+        assert not watcher.poll() and len(notified) == 1, "同一修改只通知一次"
+        print("  ✓ 只通知外部修改")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 排程檔監看測試通過！\n")
+    return True
+
+def test_schedule_sync():
+    """測試多台電腦排程同步"""
+    print("="*50)
+    print("測試 17: 多台電腦排程同步")
+    print("="*50)
+    
+    work_dir = tempfile.mkdtemp()
+    shared_dir = os.path.join(work_dir, "shared")
+    storage_a = Storage(os.path.join(work_dir, "a"))
+    storage_b = Storage(os.path.join(work_dir, "b"))
+    plan = [
+        Schedule(1, "早自習", parse_time("07:30"), days_to_mask(["monday"]), ["a.mp3"], None),
+        Schedule(2, "午休", parse_time("12:10"), days_to_mask(["monday", "friday"]), ["b.mp3"], None),
+    ]
+    storage_a.save_schedules(encode_schedules(plan))
+    node_a = SyncNode(storage_a, shared_dir, node_id="pc-a")
+    node_b = SyncNode(storage_b, shared_dir, node_id="pc-b")
+    try:
+        print("✓ 測試主節點選舉與發布...")
+        assert node_a.sync_once() and node_a.is_leader, "第一個節點應成為主節點並發布"
+        assert node_b.sync_once() and not node_b.is_leader, "第二個節點應套用版本"
+        assert decode_schedules(storage_b.load_schedules()) == plan, "排程應同步到其他節點"
+        assert not node_b.sync_once(), "版本未變時不應重新套用"
+        print("  ✓ 版本 1 已同步")
+        
+        print("✓ 測試差異同步...")
+        plan[1] = plan[1].copy(minute_of_day=parse_time("12:20"))
+        storage_a.save_schedules(encode_schedules(plan[1:]))
+        node_a.sync_once()
+        node_b.sync_once()
+        assert node_b.applied_version == 2, "應套用版本 2"
+        assert [s.time for s in decode_schedules(storage_b.load_schedules())] == ["12:20"], "差異套用錯誤"
+        status = fleet_status(shared_dir)
+        assert status['version'] == 2 and status['consistent'], "所有節點應一致"
+        assert {n['node']: n['applied_version'] for n in status['nodes']} == {"pc-a": 2, "pc-b": 2}
+        storage_b.save_schedules(encode_schedules([]))
+        node_b.sync_once()
+        status = fleet_status(shared_dir)
+        assert not status['consistent'], "套用後在本機修改的節點應視為不一致"
+        storage_b.save_schedules(encode_schedules(plan[1:]))
+        node_b.sync_once()
+        assert fleet_status(shared_dir)['consistent'], "本機恢復後應一致"
+        print("  ✓ 節點回報版本與排程檔雜湊值")
+        
+        print("✓ 測試主節點接手...")
+        node_a.stop()
+        node_b.sync_once()
+        assert node_b.is_leader, "主節點結束後應由其他節點接手"
+        node_a = SyncNode(storage_a, shared_dir, node_id="pc-a", role="follower")
+        node_a.sync_once()
+        assert not node_a.is_leader and node_a.applied_version == 2, "只套用的節點不參與選舉"
+        print("  ✓ 主節點接手正確")
+        
+        print("✓ 測試排程檔損毀或清空時不發布...")
+        with open(storage_b.schedule_file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 2, "schedu')
+        assert not node_b.sync_once() and node_b.last_error, "排程檔寫到一半時應略過本輪"
+        storage_b.save_schedules(encode_schedules([]))
+        assert not node_b.sync_once() and node_b.applied_version == 2, "空的排程不應自動取代已發布版本"
+        node_b.allow_empty_publish()
+        assert node_b.sync_once() and node_b.applied_version == 3, "明確清空後應發布"
+        with open(storage_a.schedule_file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 2, "schedu')
+        assert not node_a.sync_once() and node_a.applied_version == 2, "本機排程檔損毀時不應套用"
+        storage_a.save_schedules(encode_schedules(plan[1:]))
+        assert node_a.sync_once() and node_a.applied_version == 3, "排程檔恢復後應套用"
+        print("  ✓ 讀取失敗時略過，清空需要明確操作")
+        
+        print("✓ 測試同步版本經由服務寫入...")
+        storage_c = Storage(os.path.join(work_dir, "c"))
+        daemon = HeadlessDaemon(storage=storage_c, control_port=None,
+                                sync=SyncNode(storage_c, shared_dir, node_id="pc-c", role="follower"))
+        daemon.reload()
+        storage_b.save_schedules(encode_schedules(plan))
+        assert node_b.sync_once() and node_b.applied_version == 4, "主節點應發布新版本"
+        assert daemon.sync.sync_once() and daemon.schedules == plan, "服務的排程應立即更新"
+        assert not daemon.schedule_watcher.has_changed(), "同步寫入不應被當成外部修改"
+        daemon.schedule_watcher.stop()
+        
+        threads = [threading.Thread(target=lambda: [storage_c.save_schedules(encode_schedules(plan))
+                                                    for _ in range(20)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert decode_schedules(storage_c.load_schedules(strict=True)) == plan, "同時保存不應損毀排程檔"
+        assert not [name for name in os.listdir(storage_c.data_dir) if name.endswith(".tmp")], "不應留下暫存檔"
+        print("  ✓ 同時保存時排程檔完整")
+    finally:
+        node_a.stop()
+        node_b.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 多台電腦排程同步測試通過！\n")
+    return True
+
+def test_bundle():
+    """測試排程組合包"""
+    print("="*50)
+    print("測試 18: 排程組合包")
+    print("="*50)
+    
+    work_dir = tempfile.mkdtemp()
+    try:
+        files = []
+        for index in range(3):
+            path = os.path.join(work_dir, f"bell_{index}.mp3")
+            with open(path, 'wb') as f:
+                f.write(bytes([index]) * 4096)
+            files.append(path)
+        schedules = [
+            Schedule(1, "上課", parse_time("08:00"), days_to_mask(["monday"]), files[:2], 10),
+            Schedule(2, "下課", parse_time("08:50"), days_to_mask(["monday"]), files[1:], 10),
+        ]
+        source = AudioLibrary(os.path.join(work_dir, "source"))
+        target = AudioLibrary(os.path.join(work_dir, "target"))
+        bundle_dir = os.path.join(work_dir, "bundle")
+        
+        print("✓ 測試匯出與匯入...")
+        stats = export_bundle(schedules, source, bundle_dir)
+        assert stats['objects'] == 3 and stats['written'] == 3, "相同檔案只應匯出一次"
+        imported, stats = import_bundle(bundle_dir, target)
+        assert stats['written'] == 3, "第一次匯入應寫入全部音訊"
+        assert [s.time for s in imported] == ["08:00", "08:50"], "排程應一併匯入"
+        assert all(f.startswith("lib:") for s in imported for f in s.files), "檔案應改為內容ID"
+        with open(target.path_for(imported[0].files[0]), 'rb') as f:
+            assert f.read() == bytes([0]) * 4096, "音訊內容錯誤"
+        print("  ✓ 匯入內容正確")
+        
+        print("✓ 測試只傳輸有變化的音訊...")
+        with open(files[2], 'wb') as f:
+            f.write(b'\x09' * 4096)
+        stats = export_bundle(schedules, source, bundle_dir)
+        assert stats['written'] == 1 and stats['skipped'] == 2 and stats['removed'] == 1, "只應寫入新內容"
+        stats = import_bundle(bundle_dir, target)[1]
+        assert stats['written'] == 1 and stats['skipped'] == 2, "匯入只應寫入本機沒有的內容"
+        print("  ✓ 只寫入 1 個音訊")
+        
+        print("✓ 測試 zip 組合包與損毀偵測...")
+        zip_file = os.path.join(work_dir, "plan.zip")
+        export_bundle(schedules, source, zip_file)
+        imported, stats = import_bundle(zip_file, AudioLibrary(os.path.join(work_dir, "zip_target")))
+        assert stats['written'] == 3 and len(imported) == 2, "zip 組合包匯入失敗"
+        for directory, _dirs, names in os.walk(os.path.join(bundle_dir, "objects")):
+            for name in names:
+                with open(os.path.join(directory, name), 'ab') as f:
+                    f.write(b'x')
+        try:
+            import_bundle(bundle_dir, AudioLibrary(os.path.join(work_dir, "bad_target")))
+            assert False, "內容損毀應失敗"
+        except BundleError:
+            pass
+        print("  ✓ 雜湊不符時拒絕匯入")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 排程組合包測試通過！\n")
+    return True
+
+def test_metrics():
+    """測試效能指標"""
+    print("="*50)
+    print("測試 19: 效能指標")
+    print("="*50)
+    
+    print("✓ 測試 Prometheus 文字格式...")
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests", "請求次數", ("cache", "result"))
+    requests.labels("mirror", "hit").inc()
+    requests.labels(cache="mirror", result="hit").inc(2)
+    assert registry.counter("test_requests", "請求次數", ("cache", "result")) is requests, "同名指標應只註冊一次"
+    registry.gauge("test_depth", "佇列深度").set(4)
+    latency = registry.histogram("test_latency_seconds", "延遲", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value)
+    text = registry.render()
+    assert 'test_requests_total{cache="mirror",result="hit"} 3' in text, "計數器輸出錯誤"
+    assert "# TYPE test_depth gauge\ntest_depth 4" in text, "量測值輸出錯誤"
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text, "直方圖分界應為累計次數"
+    assert 'test_latency_seconds_bucket{le="1"} 3' in text, "直方圖分界應為累計次數"
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in text and "test_latency_seconds_count 4" in text
+    print("  ✓ 計數器、量測值、直方圖輸出正確")
+    
+    work_dir = tempfile.mkdtemp()
+    try:
+        print("✓ 測試保存耗時與寫入檔案...")
+        saves = REGISTRY.get("radioone_schedule_save_seconds")
+        before = saves.count
+        Storage(data_dir=os.path.join(work_dir, "data")).save_schedules({'schedules': []})
+        assert saves.count == before + 1, "保存播放計劃應記錄耗時"
+        dump_file = os.path.join(work_dir, "metrics.prom")
+        response = metrics_command(dump_file)
+        assert response['ok'] and os.path.exists(dump_file), "應寫入指標檔"
+        with open(dump_file, 'r', encoding='utf-8') as f:
+            assert "radioone_schedule_save_seconds_count" in f.read(), "指標檔內容錯誤"
+        print("  ✓ 指標檔已寫入")
+        
+        print("✓ 測試輸出路徑限制...")
+        assert resolve_output_path("metrics.prom", work_dir) == os.path.realpath(dump_file)
+        assert resolve_output_path("", work_dir) is None
+        for outside in ("../metrics.prom", os.path.join(tempfile.gettempdir(), "metrics.prom"), "."):
+            try:
+                resolve_output_path(outside, work_dir)
+                assert False, f"不應允許寫入資料目錄以外: {outside}"
+            except ValueError:
+                pass
+        print("  ✓ 只能寫入資料目錄內的檔案")
+        
+        print("✓ 測試控制通道 GET /metrics...")
+        received = []
+        
+        def handle(command, argument):
+            received.append(command)
+            try:
+                return metrics_command(resolve_output_path(argument, work_dir) or '')
+            except ValueError as e:
+                return {'ok': False, 'error': str(e)}
+        
+        server = ControlServer(handle, port_file=os.path.join(work_dir, "control.json"))
+        server.start()
+        try:
+            connection = HTTPConnection("127.0.0.1", server.port, timeout=5)
+            connection.request("GET", "/metrics")
+            reply = connection.getresponse()
+            body = reply.read().decode('utf-8')
+            connection.close()
+            assert reply.status == 200, "GET /metrics 應成功"
+            assert reply.getheader("Content-Type").startswith("text/plain"), "應為 Prometheus 文字格式"
+            assert "# TYPE radioone_trigger_lateness_seconds histogram" in body, "應包含排程觸發延遲"
+            response = send_command(os.path.join(work_dir, "control.json"), "metrics")
+            assert response['ok'] and "radioone_playback_errors_total" in response['text'], "metrics 指令應回傳指標"
+            response = send_command(os.path.join(work_dir, "control.json"), "metrics", "../escape.prom")
+            assert not response['ok'], "控制通道不應寫入資料目錄以外"
+            # 網頁送出的 POST：主體與標頭都不應被當成指令
+            received.clear()
+            connection = HTTPConnection("127.0.0.1", server.port, timeout=5)
+            connection.request("POST", "/", body="metrics\nstop\n", headers={"Content-Type": "text/plain"})
+            reply = connection.getresponse()
+            reply.read()
+            connection.close()
+            assert reply.status == 405 and not received, "POST 請求的內容不應執行"
+            with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+                sock.sendall(b"Host: 127.0.0.1\r\nmetrics\n")
+                assert sock.recv(1024) == b"", "收到 HTTP 標頭應關閉連線"
+            assert not received, "HTTP 標頭之後的內容不應執行"
+        finally:
+            server.stop()
+        print("  ✓ 控制通道可讀取指標")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 效能指標測試通過！\n")
+    return True
+
+def test_structured_logging():
+    """測試結構化記錄與飛行記錄器"""
+    print("="*50)
+    print("測試 20: 結構化記錄與飛行記錄器")
+    print("="*50)
+    
+    print("✓ 測試環狀緩衝區...")
+    recorder = FlightRecorder(capacity=8)
+    
+    def writer(prefix):
+        for index in range(50):
+            recorder.record((prefix, index))
+    
+    threads = [threading.Thread(target=writer, args=(name,)) for name in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = recorder.snapshot()
+    assert len(records) == 8, "環狀緩衝區只保留最近的記錄"
+    assert len(set(records)) == 8, "多個執行緒同時寫入不應互相覆蓋成重複記錄"
+    print("  ✓ 多執行緒寫入後保留最近 8 筆")
+    
+    work_dir = tempfile.mkdtemp()
+    manager = LogManager(capacity=64)
+    try:
+        print("✓ 測試非同步記錄檔與輪替...")
+        # console_level=100：測試時不輸出到主控台
+        log_path = manager.configure(work_dir, file_level="info", console_level=100, max_bytes=2048, backups=2)
+        for index in range(100):
+            manager.emit(20, "test", "播放排程觸發", {'schedule_id': index})
+            manager.emit(10, "test", "排程檢查", {'minute': index})
+        manager.close()
+        assert os.path.exists(log_path + ".1") and os.path.exists(log_path + ".2"), "超過大小應輪替"
+        assert not os.path.exists(log_path + ".3"), "只保留指定數量的舊檔"
+        with open(log_path + ".1", "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert all(line['level'] == "INFO" and 'schedule_id' in line for line in lines), "記錄檔只寫入 INFO 以上"
+        print("  ✓ 記錄檔為 JSON Lines 並已輪替")
+        
+        print("✓ 測試傾印飛行記錄...")
+        manager.emit(40, "test", "播放錯誤", {'traceback': 'Traceback...'})
+        dump_path = manager.dump(os.path.join(work_dir, "flight.jsonl"), reason="test")
+        with open(dump_path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0]['flight_recorder'] == "test" and lines[0]['records'] == 64, "傾印應包含標頭"
+        assert lines[-1]['message'] == "播放錯誤", "最後一筆應為最新記錄"
+        assert any(line['level'] == "DEBUG" for line in lines[1:]), "飛行記錄應保留 DEBUG 記錄"
+        get_logger("test").debug("控制指令傾印", check=True)
+        response = dump_log_command(os.path.join(work_dir, "requested.jsonl"))
+        assert response['ok'] and os.path.exists(response['path']), "dump-log 指令應寫入檔案"
+        print("  ✓ 傾印包含最近的全部等級記錄")
+    finally:
+        manager.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print("✓ 結構化記錄測試通過！\n")
+    return True
+
 def main():
     """主測試函數"""
     print("\n" + "="*50)
@@ -248,6 +1166,20 @@ def main():
         ("播放器", test_player),
         ("通知功能", test_notifier),
         ("整合測試", test_integration),
+        ("排程資料模型", test_schedule_model),
+        ("檔案可用性檢查", test_file_verifier),
+        ("排程搜尋索引", test_search_index),
+        ("介面計時器暫停", test_ui_timers),
+        ("無介面模式", test_headless_daemon),
+        ("HTTP 管理介面", test_http_api),
+        ("事件串流", test_event_stream),
+        ("單一實例指令轉送", test_single_instance_forwarding),
+        ("命令列排程管理", test_cli),
+        ("排程檔監看", test_schedule_file_watcher),
+        ("多台電腦排程同步", test_schedule_sync),
+        ("排程組合包", test_bundle),
+        ("效能指標", test_metrics),
+        ("結構化記錄", test_structured_logging),
     ]
     
     passed = 0
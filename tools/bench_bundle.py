@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+排程組合包部署基準測試。
+
+模擬將大型音訊庫的排程部署到另一台電腦，再部署一次小幅修改：
+1. 第一次匯出與匯入（全部音訊都需要寫入）
+2. 修改一個排程並替換一個音訊後重新匯出到同一資料夾、再匯入
+   （只應寫入內容雜湊不同的一個檔案；重新匯出時未變更的檔案由雜湊快取略過）
+
+音訊以隨機內容的檔案代替，不需要音效卡或 mutagen。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.bundle import HashCache, export_bundle, import_bundle  # noqa: E402
+from core.library import AudioLibrary  # noqa: E402
+from core.schedule import Schedule  # noqa: E402
+
+
+def make_audio(path: str, size: int) -> None:
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+
+
+def run_step(label: str, func):
+    started = time.perf_counter()
+    stats = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<18} {elapsed * 1000:9.1f} ms  寫入 {stats['written']:>5} 個 "
+          f"{stats['bytes_written'] / (1024 * 1024):8.1f} MB  略過 {stats['skipped']:>5} 個")
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="排程組合包部署基準測試")
+    parser.add_argument("--files", type=int, default=200, help="音訊檔案數量（預設 200）")
+    parser.add_argument("--size-kb", type=int, default=512, help="每個音訊的大小 KB（預設 512）")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="radioone_bundle_")
+    try:
+        audio_dir = os.path.join(work_dir, "audio")
+        os.makedirs(audio_dir)
+        files = []
+        for index in range(args.files):
+            path = os.path.join(audio_dir, f"bell_{index:04d}.mp3")
+            make_audio(path, args.size_kb * 1024)
+            files.append(path)
+        schedules = [
+            Schedule(index + 1, f"鐘聲 {index}", (index * 5) % 1440, 0b0011111, [path], 30)
+            for index, path in enumerate(files)
+        ]
+        source_library = AudioLibrary(os.path.join(work_dir, "source_library"))
+        target_library = AudioLibrary(os.path.join(work_dir, "target_library"))
+        bundle_dir = os.path.join(work_dir, "bundle")
+        hash_cache = HashCache(os.path.join(work_dir, "hashes.json"))
+
+        total_mb = args.files * args.size_kb / 1024
+        print(f"音訊 {args.files} 個，共 {total_mb:.1f} MB")
+        print("-" * 72)
+
+        run_step("第一次匯出", lambda: export_bundle(schedules, source_library, bundle_dir, hash_cache))
+        run_step("第一次匯入", lambda: import_bundle(bundle_dir, target_library)[1])
+
+        # 小幅修改：一個排程改時間、一個音訊換成新內容
+        schedules[0] = schedules[0].copy(minute_of_day=schedules[0].minute_of_day + 1)
+        make_audio(files[1], args.size_kb * 1024)
+        run_step("修改後重新匯出", lambda: export_bundle(schedules, source_library, bundle_dir, hash_cache))
+        stats = run_step("修改後匯入", lambda: import_bundle(bundle_dir, target_library)[1])
+        print("-" * 72)
+        print(f"重新部署只寫入 {stats['written']} 個音訊（共 {args.files} 個）")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+排程列表顯示基準測試。
+
+建立大量排程（預設 20,000 筆），比較：
+1. 舊版做法：全部插入 ttk.Treeview
+2. ui.schedule_view.VirtualScheduleView：只實體化可見列
+
+量測從取得排程到第一個畫面繪製完成的時間，以及捲動、排序的耗時；
+第一個畫面超過目標（預設 100 ms）時以結束碼 1 結束。
+需要顯示環境；無法建立 Tk 視窗時只量測排序鍵索引的建立時間。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.schedule import Schedule, WEEKDAYS  # noqa: E402
+
+COLUMNS = ('名稱', '週幾', '時間', '預估完播', '音訊檔案', '檔案數')
+
+# 第一個畫面的目標時間（毫秒）
+FIRST_SCREEN_BUDGET_MS = 100.0
+
+
+def make_schedules(count: int) -> List[Schedule]:
+    schedules = []
+    for index in range(count):
+        minute = (index * 7) % 1440
+        schedules.append(Schedule(
+            index + 1,
+            f"第{index // 40 + 1}棟 鐘聲 {index % 40}",
+            minute,
+            (1 << (1 + index % 7)) - 1,
+            [f"D:/bells/chime_{(index + n) % 20}.mp3" for n in range(3)],
+            12,
+        ))
+    return schedules
+
+
+def row_values(schedule: Schedule):
+    days = ','.join(WEEKDAYS[i][:3] for i in range(7) if schedule.days_mask >> i & 1)
+    files = '、'.join(os.path.basename(f) for f in schedule.files[:3])
+    return (schedule.name, days, schedule.time, schedule.time, files, len(schedule.files)), (schedule.id,)
+
+
+def sort_key(schedule: Schedule):
+    return (
+        schedule.name.casefold(),
+        tuple(day for day in range(7) if schedule.days_mask >> day & 1),
+        schedule.minute_of_day,
+        schedule.minute_of_day * 60 + schedule.duration_seconds,
+        os.path.basename(schedule.files[0]).casefold() if schedule.files else '',
+        len(schedule.files),
+    )
+
+
+def timed(label: str, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="排程列表顯示基準測試")
+    parser.add_argument("--count", type=int, default=20000, help="排程數量（預設 20000）")
+    parser.add_argument("--budget-ms", type=float, default=FIRST_SCREEN_BUDGET_MS,
+                        help=f"第一個畫面的目標時間（預設 {FIRST_SCREEN_BUDGET_MS:g} ms）")
+    args = parser.parse_args(argv)
+
+    schedules = make_schedules(args.count)
+    by_key: Dict[str, Schedule] = {str(s.id): s for s in schedules}
+    keys = list(by_key)
+    print(f"排程數量：{len(schedules)}")
+    print("-" * 60)
+
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception as e:  # 無顯示環境
+        print(f"無法建立 Tk 視窗（{e}），只量測排序鍵索引")
+        timed("建立排序鍵索引", lambda: {key: sort_key(s) for key, s in by_key.items()})
+        return 0
+
+    from ui.schedule_view import VirtualScheduleView
+
+    root.geometry("1000x600")
+    frame = tk.Frame(root)
+    frame.pack(fill='both', expand=True)
+
+    def legacy() -> None:
+        tree = ttk.Treeview(frame, columns=COLUMNS, show='headings')
+        tree.pack(fill='both', expand=True)
+        for schedule in schedules:
+            values, tags = row_values(schedule)
+            tree.insert('', 'end', values=values, tags=tags)
+        root.update()
+        tree.destroy()
+
+    view = None
+
+    def virtual() -> None:
+        nonlocal view
+        view = VirtualScheduleView(
+            frame, COLUMNS,
+            row_builder=lambda key: row_values(by_key[key]),
+            sort_key_builder=lambda key: sort_key(by_key[key]),
+        )
+        view.tree.pack(side='left', fill='both', expand=True)
+        view.scrollbar.pack(side='right', fill='y')
+        view.set_rows(keys, changed=keys)
+        root.update()
+
+    legacy_time = timed("舊版：全部插入 Treeview", legacy)
+    virtual_time = timed("虛擬化列表：第一個畫面", virtual)
+    timed("捲動到中間", lambda: (view._on_scrollbar('moveto', '0.5'), root.update()))
+    timed("依時間排序（建立索引）", lambda: (view.sort_by(2), root.update()))
+    timed("依名稱排序（使用索引）", lambda: (view.sort_by(0), root.update()))
+    root.destroy()
+
+    print("-" * 60)
+    print(f"第一個畫面加速：{legacy_time / virtual_time:.1f}x")
+    first_screen_ms = virtual_time * 1000
+    if first_screen_ms > args.budget_ms:
+        print(f"未達目標：第一個畫面 {first_screen_ms:.1f} ms > {args.budget_ms:g} ms")
+        return 1
+    print(f"達成目標：第一個畫面 {first_screen_ms:.1f} ms <= {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
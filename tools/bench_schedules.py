@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+排程資料模型基準測試。
+
+比較舊版字典排程與 core.schedule.Schedule 在大量排程下的記憶體與解析時間：
+1. 每筆排程常駐的記憶體（tracemalloc）
+2. JSON / 二進位格式的解碼時間
+3. 排程器每秒比對一次全部排程的成本
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.schedule import (  # noqa: E402
+    WEEKDAYS,
+    decode_binary,
+    decode_schedules,
+    encode_binary,
+    encode_schedules,
+)
+
+
+def make_legacy_data(count: int) -> dict:
+    """產生舊版格式的排程資料（含 duration / invalid_files 等附加欄位）"""
+    schedules = []
+    for index in range(count):
+        minute = (index * 7) % 1440
+        schedules.append({
+            "id": index + 1,
+            "name": f"排程 {index % 50}",
+            "days": list(WEEKDAYS[: 1 + index % 7]),
+            "time": f"{minute // 60:02d}:{minute % 60:02d}",
+            "files": [f"D:/bells/chime_{(index + n) % 20}.mp3" for n in range(3)],
+            "duration": 12,
+            "duration_seconds": 12,
+            "invalid_files": [],
+        })
+    return {"schedules": schedules}
+
+
+def measure(label: str, func: Callable[[], object]) -> Tuple[object, float, int]:
+    """回傳 (結果, 耗時秒數, 結果常駐記憶體位元組)"""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    result = func()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {elapsed * 1000:9.1f} ms   常駐 {retained / 1024:9.1f} KB")
+    return result, elapsed, retained
+
+
+def legacy_parse(text: str) -> List[dict]:
+    """舊版流程：json.loads 取得字典列表"""
+    return json.loads(text)["schedules"]
+
+
+def legacy_scan(schedules: List[dict]) -> int:
+    """舊版排程器每秒的比對：解析時間字串並查詢星期列表"""
+    now = datetime.now()
+    weekday = WEEKDAYS[now.weekday()]
+    current = now.time()
+    hits = 0
+    for schedule in schedules:
+        schedule_time = datetime.strptime(schedule["time"], "%H:%M").time()
+        if weekday in schedule["days"] and schedule_time > current:
+            hits += 1
+    return hits
+
+
+def model_scan(schedules) -> int:
+    """Schedule 模型的比對：整數分鐘與位元遮罩"""
+    now = datetime.now()
+    bit = 1 << now.weekday()
+    current = now.hour * 60 + now.minute
+    hits = 0
+    for schedule in schedules:
+        if schedule.days_mask & bit and schedule.minute_of_day > current:
+            hits += 1
+    return hits
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="排程資料模型基準測試")
+    parser.add_argument("--count", type=int, default=10000, help="排程數量（預設 10000）")
+    args = parser.parse_args(argv)
+
+    text = json.dumps(make_legacy_data(args.count), ensure_ascii=False)
+    print(f"排程數量：{args.count}，JSON 大小：{len(text.encode('utf-8')) / 1024:.1f} KB")
+    print("-" * 60)
+
+    legacy, _, legacy_bytes = measure("字典（json.loads）", lambda: legacy_parse(text))
+    models, _, model_bytes = measure("Schedule（decode_schedules）", lambda: decode_schedules(json.loads(text)))
+    payload = encode_binary(models)
+    measure("Schedule（decode_binary）", lambda: decode_binary(payload))
+    measure("encode_binary", lambda: encode_binary(models))
+    measure("排程比對（字典 + strptime）", lambda: legacy_scan(legacy))
+    measure("排程比對（Schedule）", lambda: model_scan(models))
+
+    compact = json.dumps(encode_schedules(models), ensure_ascii=False)
+    print("-" * 60)
+    print(f"每筆排程常駐記憶體：字典 {legacy_bytes / args.count:.0f} B，Schedule {model_bytes / args.count:.0f} B")
+    print(f"二進位大小：{len(payload) / 1024:.1f} KB（精簡JSON {len(compact.encode('utf-8')) / 1024:.1f} KB）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+介面計時器閒置負載基準測試。
+
+模擬應用程式常駐託盤一段時間（預設 1 小時），比較：
+1. 舊版做法：視窗隱藏後時間顯示（每秒）與播放進度（100/500 ms）仍持續更新
+2. ui.timers.UITimerManager：視窗隱藏時暫停，重新顯示時補跑一次
+
+以虛擬時鐘驅動計時器，回調執行與主視窗相同的工作（下次播放時間計算、時間格式化），
+量測喚醒次數與實際消耗的 CPU 時間；不需要顯示環境。
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.audio_utils import format_duration  # noqa: E402
+from core.schedule import Schedule  # noqa: E402
+from core.scheduler import Scheduler  # noqa: E402
+from ui.timers import UITimerManager  # noqa: E402
+
+
+class VirtualClockRoot:
+    """以虛擬時鐘執行 after 回調的替身根視窗"""
+
+    def __init__(self) -> None:
+        self.now_ms = 0
+        self.wakeups = 0
+        self._queue: List = []
+        self._ids = itertools.count()
+        self._cancelled = set()
+
+    def after(self, delay_ms, callback, *args):
+        job = next(self._ids)
+        heapq.heappush(self._queue, (self.now_ms + delay_ms, job, callback, args))
+        return job
+
+    def after_cancel(self, job) -> None:
+        self._cancelled.add(job)
+
+    def run_until(self, end_ms: int) -> None:
+        while self._queue and self._queue[0][0] <= end_ms:
+            due, job, callback, args = heapq.heappop(self._queue)
+            if job in self._cancelled:
+                self._cancelled.discard(job)
+                continue
+            self.now_ms = due
+            self.wakeups += 1
+            callback(*args)
+        self.now_ms = end_ms
+
+
+def make_scheduler(count: int) -> Scheduler:
+    scheduler = Scheduler()
+    scheduler.schedules = [
+        Schedule(index + 1, f"排程 {index}", (index * 7) % 1440, (1 << (1 + index % 7)) - 1,
+                 [f"D:/bells/chime_{index % 20}.mp3"], 12)
+        for index in range(count)
+    ]
+    return scheduler
+
+
+def simulate(scheduler: Scheduler, hidden_seconds: int, pause_when_hidden: bool):
+    """回傳 (喚醒次數, CPU秒數)"""
+    root = VirtualClockRoot()
+    timers = UITimerManager(root)
+    labels = {}
+
+    def update_time_display() -> None:
+        labels['time'] = time.strftime("%m/%d %H:%M:%S")
+        labels['next'] = scheduler.get_next_play_time()
+        timers.schedule('clock', 1000, update_time_display)
+
+    def update_playback_progress() -> None:
+        # 播放佇列等待中：每500ms檢查一次
+        labels['progress'] = f"{format_duration(root.now_ms / 1000)} / --:--"
+        timers.schedule('progress', 500, update_playback_progress)
+
+    update_time_display()
+    update_playback_progress()
+    if pause_when_hidden:
+        timers.set_visible(False)
+
+    started = time.process_time()
+    root.run_until(hidden_seconds * 1000)
+    elapsed = time.process_time() - started
+    return root.wakeups, elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="介面計時器閒置負載基準測試")
+    parser.add_argument("--count", type=int, default=1000, help="排程數量（預設 1000）")
+    parser.add_argument("--minutes", type=int, default=60, help="模擬隱藏在託盤的分鐘數（預設 60）")
+    args = parser.parse_args(argv)
+
+    scheduler = make_scheduler(args.count)
+    seconds = args.minutes * 60
+    print(f"排程數量：{args.count}，模擬隱藏 {args.minutes} 分鐘")
+    print("-" * 60)
+
+    legacy_wakeups, legacy_cpu = simulate(scheduler, seconds, pause_when_hidden=False)
+    print(f"{'舊版：隱藏時持續更新':<24} 喚醒 {legacy_wakeups:>8} 次  CPU {legacy_cpu * 1000:10.1f} ms")
+    paused_wakeups, paused_cpu = simulate(scheduler, seconds, pause_when_hidden=True)
+    print(f"{'隱藏時暫停':<24} 喚醒 {paused_wakeups:>8} 次  CPU {paused_cpu * 1000:10.1f} ms")
+
+    print("-" * 60)
+    print(f"每小時節省 CPU：約 {(legacy_cpu - paused_cpu) * 3600 / seconds:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+拖放檔案驗證基準測試。
+
+比較舊版逐檔多次 stat 的驗證流程與 core.dragdrop 的單次 stat + 執行緒池並行驗證。
+預設在暫存目錄建立 5,000 個檔案，並以 --latency 模擬網路磁碟每次 stat 的延遲；
+也可用 --path 指向實際的網路共用資料夾（該資料夾下的檔案會被列舉，不會被修改）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core import dragdrop  # noqa: E402
+
+
+def legacy_validate(file_paths: List[str]):
+    """舊版流程：abspath + exists + isfile + getsize，依序執行"""
+    valid_files = []
+    invalid_files = []
+    for file_path in file_paths:
+        abs_path = os.path.abspath(file_path)
+        if not os.path.exists(abs_path):
+            invalid_files.append((abs_path, "檔案不存在"))
+        elif not os.path.isfile(abs_path):
+            invalid_files.append((abs_path, "不是檔案"))
+        elif not dragdrop.is_audio_file(abs_path):
+            invalid_files.append((abs_path, "不支援的音訊格式"))
+        elif dragdrop.get_file_size(abs_path) > dragdrop.MAX_FILE_SIZE:
+            invalid_files.append((abs_path, "檔案過大"))
+        else:
+            valid_files.append(abs_path)
+    return valid_files, invalid_files
+
+
+def serial_validate(file_paths: List[str]):
+    """單次 stat，但不並行"""
+    results = [dragdrop.validate_file(path) for path in file_paths]
+    return [p for p, r in results if r is None], [(p, r) for p, r in results if r is not None]
+
+
+def first_batch_latency(file_paths: List[str]) -> float:
+    """串流模式下第一批結果送達所需時間"""
+    started = time.perf_counter()
+    for _ in dragdrop.iter_validation_batches(file_paths):
+        return time.perf_counter() - started
+    return 0.0
+
+
+def make_files(directory: str, count: int) -> List[str]:
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"bell_{index:05d}.mp3")
+        with open(path, "wb") as f:
+            f.write(b"\xff\xfb")
+        paths.append(path)
+    return paths
+
+
+def install_latency(latency: float) -> Callable[[], None]:
+    """以延遲包裝 os.stat（os.path.exists / isfile / getsize 皆經由 os.stat）"""
+    original = os.stat
+
+    def slow_stat(path, *args, **kwargs):
+        time.sleep(latency)
+        return original(path, *args, **kwargs)
+
+    os.stat = slow_stat
+
+    def restore() -> None:
+        os.stat = original
+
+    return restore
+
+
+def run(label: str, func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="拖放檔案驗證基準測試")
+    parser.add_argument("--count", type=int, default=5000, help="檔案數量（預設 5000）")
+    parser.add_argument("--latency", type=float, default=0.0005, help="模擬每次 stat 的延遲秒數（預設 0.5ms）")
+    parser.add_argument("--path", help="改用實際資料夾（例如網路共用）中的檔案")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.path:
+            paths = [entry.path for entry in os.scandir(args.path) if entry.is_file()][: args.count]
+            restore = lambda: None  # noqa: E731
+        else:
+            paths = make_files(temp_dir, args.count)
+            restore = install_latency(args.latency)
+
+        print(f"檔案數量：{len(paths)}，模擬延遲：{0 if args.path else args.latency * 1000:.2f} ms/stat")
+        print("-" * 60)
+        try:
+            legacy = run("舊版（多次 stat，依序）", lambda: legacy_validate(paths))
+            run("單次 stat，依序", lambda: serial_validate(paths))
+            parallel = run("單次 stat，執行緒池", lambda: dragdrop.validate_dropped_files(paths))
+            first = first_batch_latency(paths)
+        finally:
+            restore()
+
+    print("-" * 60)
+    print(f"加速：{legacy / parallel:.1f}x；串流第一批結果：{first * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
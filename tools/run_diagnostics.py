@@ -46,21 +46,41 @@ RESOURCE_CHECKS = [
 SCOPE_SUMMARY = {
     "核心模組": [
         "core/storage.py",
+        "core/schedule.py",
         "core/scheduler.py",
         "core/player.py",
         "core/notifier.py",
         "core/dragdrop.py",
+        "core/verifier.py",
+        "core/mirror.py",
+        "core/library.py",
+        "core/probe.py",
+        "core/transcoder.py",
+        "core/playlist.py",
+        "core/search.py",
+        "core/daemon.py",
+        "core/control.py",
+        "core/http_api.py",
+        "core/events.py",
+        "core/watcher.py",
+        "core/sync.py",
+        "core/bundle.py",
+        "core/metrics.py",
+        "core/log.py",
         "core/audio_utils.py",
         "core/singleton.py",
     ],
     "界面與系統整合": [
         "ui/main_window.py",
+        "ui/schedule_view.py",
+        "ui/timers.py",
         "core/tray.py",
         "core/autostart.py",
     ],
     "測試與工具": [
         "simple_test.py",
         "test_functionality.py",
+        "radioone_cli.py",
         "build.spec",
     ],
     "關鍵資源": [
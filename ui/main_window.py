@@ -9,8 +9,13 @@ import sys
 import threading
 from collections import deque
 from datetime import datetime, timedelta, time
+from time import monotonic
 from PIL import Image, ImageTk
 
+from core.log import dump_log_command, get_logger, report_exception
+
+log = get_logger('ui')
+
 # 嘗試匯入tkinterdnd2，如果失敗則使用普通Tk
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
@@ -19,7 +24,7 @@ except ImportError:
     TkinterDnD = tk.Tk
     DND_FILES = None
     HAS_DND = False
-    print("警告: tkinterdnd2未安裝，拖放功能不可用，請使用「選擇音訊檔案」按鈕")
+    log.warning("tkinterdnd2未安裝，拖放功能不可用，請使用「選擇音訊檔案」按鈕")
 
 # 新增父目錄到路徑
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -27,24 +32,64 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.storage import Storage
 from core.player import AudioPlayer
 from core.scheduler import Scheduler
-from core.dragdrop import validate_dropped_files
+from core.dragdrop import iter_validation_batches, expand_dropped_paths, check_playlist_batch
 from core.notifier import Notifier
-from core.audio_utils import get_total_duration, format_duration
+from core.audio_utils import get_audio_duration, get_total_duration, format_duration
 from core.tray import SystemTray
+from core.verifier import FileVerifier
+from core.mirror import MirrorCache
+from core.transcoder import TranscodeCache
+from core.library import AudioLibrary, is_content_ref
+from core.playlist import expand_playlists, is_playlist_file, read_playlist
+from core.player import MAX_QUEUE_SIZE
+from core.dragdrop import format_file_size
+from core.schedule import (Schedule, decode_schedules, encode_schedules, merge_schedules, parse_time, days_to_mask,
+                           schedule_from_request)
+from core.events import EventBus
+from core.sync import fleet_status
+from core.search import ScheduleSearchIndex
+from core.watcher import ScheduleFileWatcher
+from core.metrics import metrics_command
+from core.control import resolve_output_path
+from ui.schedule_view import VirtualScheduleView
+from ui.timers import UITimerManager
+
+# 排程列表的週幾顯示名稱
+DAY_NAMES = {
+    'monday': '週一',
+    'tuesday': '週二',
+    'wednesday': '週三',
+    'thursday': '週四',
+    'friday': '週五',
+    'saturday': '週六',
+    'sunday': '週日'
+}
+
+# 搜尋框停止輸入多久後才查詢（毫秒）
+SEARCH_DEBOUNCE_MS = 150
 
 class ScheduleDialog:
     """排程設定彈窗（整合檔案選擇和排程設定）"""
     
-    def __init__(self, parent, font_family, colors, schedule=None):
+    def __init__(self, parent, font_family, colors, schedule=None, library=None):
         """初始化彈窗
         Args:
             parent: 父視窗
             font_family: 字體
             colors: 顏色配置
             schedule: 如果提供，則為編輯模式，否則為新增模式
+            library: 音訊庫（提供時可匯入檔案並顯示內容ID的原始檔名）
         """
+        self.library = library
         self.result = None  # 儲存結果：None表示取消，否則為排程字典
-        self.selected_files = schedule['files'].copy() if schedule and schedule.get('files') else []
+        self._validation_cancel = None  # 背景驗證的取消旗標
+        self._validation_invalid = []  # 前5個無效檔案（顯示用）
+        self._validation_invalid_count = 0
+        self._validation_checked = 0
+        self._file_durations = {}  # 檔案路徑 -> 時長（秒），無法取得時為None
+        self._duration_cancel = None  # 背景計算時長的取消旗標
+        self._total_duration = None  # 目前檔案列表的總時長（計算完成後才有值）
+        self.selected_files = list(schedule.files) if schedule and schedule.files else []
         
         # 創建彈窗
         # 創建彈窗
@@ -68,11 +113,9 @@ class ScheduleDialog:
         
         # 載入排程資料（編輯模式）
         if schedule:
-            self.name = schedule['name']
-            self.days = schedule['days'].copy()
-            hour, minute = schedule['time'].split(':')
-            self.hour = int(hour)
-            self.minute = int(minute)
+            self.name = schedule.name
+            self.days = schedule.days
+            self.hour, self.minute = divmod(schedule.minute_of_day, 60)
         else:
             self.name = "上課提醒"
             self.days = []
@@ -316,6 +359,14 @@ class ScheduleDialog:
         )
         self.file_listbox.pack(side='left', fill='both', expand=True)
         listbox_scrollbar.config(command=self.file_listbox.yview)
+        
+        # 支援拖放檔案或資料夾到列表
+        if HAS_DND:
+            try:
+                self.file_listbox.drop_target_register(DND_FILES)
+                self.file_listbox.dnd_bind('<<Drop>>', self._on_drop)
+            except (tk.TclError, AttributeError) as e:
+                log.warning("無法啟用拖放", error=str(e))
 
         # 總時長與預估完播顯示
         info_frame = tk.Frame(files_frame, bg=self.colors['bg_card'])
@@ -340,9 +391,20 @@ class ScheduleDialog:
         )
         self.estimated_end_label.grid(row=1, column=0, sticky='w')
 
+        # 驗證/匯入進度（點擊可取消）
+        self.validation_label = tk.Label(
+            info_frame,
+            text="",
+            font=(self.font_family, 10),
+            bg=self.colors['bg_card'],
+            fg=self.colors['primary'],
+            cursor='hand2'
+        )
+        self.validation_label.grid(row=2, column=0, sticky='w')
+        self.validation_label.bind('<Button-1>', lambda e: self._cancel_validation())
+
         self.hour_var.trace_add("write", self._on_time_changed)
         self.minute_var.trace_add("write", self._on_time_changed)
-        self._update_duration()
         self._update_file_listbox()
         
         # 檔案操作按鈕
@@ -383,6 +445,20 @@ class ScheduleDialog:
         )
         clear_btn.grid(row=0, column=1, sticky='ew')
         
+        # 匯入音訊庫（相同內容的音訊只保存一份）
+        self.import_var = tk.BooleanVar(value=False)
+        if self.library:
+            tk.Checkbutton(
+                file_btn_frame,
+                text="匯入音訊庫（相同音訊只保存一份）",
+                variable=self.import_var,
+                font=(self.font_family, 10),
+                bg=self.colors['bg_card'],
+                fg=self.colors['text_primary'],
+                activebackground=self.colors['bg_card'],
+                selectcolor=self.colors['bg_card']
+            ).grid(row=1, column=0, columnspan=2, sticky='w', pady=(6, 0))
+        
         # 確定和取消按鈕（固定在對話框底部，不在滾動區域內，始終可見）
         btn_frame = tk.Frame(body_container, bg=self.colors['bg_card'], height=72)
         btn_frame.grid(row=1, column=0, sticky='ew', pady=(12, 0))
@@ -426,51 +502,174 @@ class ScheduleDialog:
             title="選擇音訊檔案",
             filetypes=[
                 ("音訊檔案", "*.mp3 *.wav *.wma *.ogg *.flac *.m4a *.aac"),
+                ("播放清單", "*.m3u *.m3u8 *.pls"),
                 ("所有檔案", "*.*")
             ]
         )
         
         if files:
-            valid_files, invalid_files = validate_dropped_files(files)
-            if invalid_files:
-                messagebox.showwarning("警告", f"以下檔案無效：\n" + "\n".join(invalid_files[:5]))
-            if valid_files:
-                self.selected_files.extend(valid_files)
-                # 限制最多50個檔案
-                if len(self.selected_files) > 50:
-                    self.selected_files = self.selected_files[-50:]
-                    messagebox.showwarning("提示", "檔案列表已限制為最多50個檔案")
-                self._update_file_listbox()
-                # 更新總時長
-                self._update_duration()
+            self._start_validation(files)
+    
+    def _on_drop(self, event):
+        """處理拖放的檔案或資料夾（資料夾會遞迴匯入其中的音訊檔案）"""
+        paths = self.dialog.tk.splitlist(event.data)
+        if paths:
+            self._start_validation(paths)
+    
+    def _start_validation(self, paths):
+        """在背景執行緒展開資料夾並驗證檔案，結果分批加入列表"""
+        # 取消上一次尚未完成的驗證
+        if self._validation_cancel is not None:
+            self._validation_cancel.set()
+        cancel_event = threading.Event()
+        self._validation_cancel = cancel_event
+        self._validation_invalid = []
+        self._validation_invalid_count = 0
+        self._validation_checked = 0
+        self.duration_label.config(text="總時長：驗證檔案中...")
+        self.validation_label.config(text="驗證檔案中...（點此取消）")
+        
+        def worker():
+            try:
+                files = expand_dropped_paths(paths, cancel_event)
+                for valid_files, invalid_files in iter_validation_batches(files, cancel_event=cancel_event):
+                    check_playlist_batch(valid_files, invalid_files, cancel_event)
+                    self.dialog.after(0, self._add_validated_batch, cancel_event, valid_files, invalid_files)
+                self.dialog.after(0, self._finish_validation, cancel_event)
+            except (tk.TclError, RuntimeError):
+                # 對話框已關閉
+                cancel_event.set()
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _add_validated_batch(self, cancel_event, valid_files, invalid_files):
+        """加入一批驗證結果（主執行緒）"""
+        if cancel_event.is_set() or not self.dialog.winfo_exists():
+            return
+        self._validation_checked += len(valid_files) + len(invalid_files)
+        self._validation_invalid_count += len(invalid_files)
+        self._validation_invalid.extend(invalid_files[:5 - len(self._validation_invalid)])
+        for file_path in valid_files:
+            self.selected_files.append(file_path)
+            self.file_listbox.insert(tk.END, self._display_name(file_path))
+        self.validation_label.config(
+            text=f"已檢查 {self._validation_checked} 個，加入 {len(self.selected_files)} 個（點此取消）"
+        )
+        # 達到上限後不再掃描
+        if len(self.selected_files) >= 50:
+            cancel_event.set()
+            self._finish_validation(cancel_event, force=True)
+    
+    def _cancel_validation(self):
+        """取消進行中的驗證，保留已加入的檔案"""
+        cancel_event = self._validation_cancel
+        if cancel_event is not None:
+            cancel_event.set()
+            self._finish_validation(cancel_event, force=True)
+    
+    def _finish_validation(self, cancel_event, force=False):
+        """驗證完成：提示無效檔案、套用數量上限並更新總時長"""
+        if (cancel_event.is_set() and not force) or not self.dialog.winfo_exists():
+            return
+        if self._validation_cancel is not cancel_event:
+            return
+        self._validation_cancel = None
+        self.validation_label.config(text="")
+        invalid_files = self._validation_invalid
+        if invalid_files:
+            lines = [f"{os.path.basename(path)}: {reason}" for path, reason in invalid_files]
+            if self._validation_invalid_count > len(invalid_files):
+                lines.append(f"...還有 {self._validation_invalid_count - len(invalid_files)} 個檔案無效")
+            messagebox.showwarning("警告", "以下檔案無效：\n" + "\n".join(lines))
+        # 限制最多50個檔案
+        if len(self.selected_files) > 50:
+            self.selected_files = self.selected_files[-50:]
+            messagebox.showwarning("提示", "檔案列表已限制為最多50個檔案")
+        self._update_file_listbox()
     
     def _update_file_listbox(self):
         """更新檔案列表顯示"""
         self.file_listbox.delete(0, tk.END)
         for file_path in self.selected_files:
-            self.file_listbox.insert(tk.END, os.path.basename(file_path))
+            self.file_listbox.insert(tk.END, self._display_name(file_path))
         # 更新總時長
         self._update_duration()
     
+    def _display_name(self, file_path):
+        """檔案顯示名稱"""
+        if self.library:
+            return self.library.display_name(file_path)
+        return os.path.basename(file_path)
+    
+    def _resolved_files(self, files=None):
+        """選取檔案的實際路徑（內容ID轉為音訊庫路徑，播放清單展開為其中的檔案）"""
+        if files is None:
+            files = self.selected_files
+        if self.library:
+            return expand_playlists(self.library.resolve_paths(files))
+        return expand_playlists(files)
+    
     def _update_duration(self):
-        """更新總時長顯示"""
-        total_duration = None
-        if self.selected_files:
-            total_duration = get_total_duration(self.selected_files)
-            if total_duration:
-                formatted = format_duration(total_duration)
-                self.duration_label.config(text=f"總時長：{formatted}")
-            else:
-                self.duration_label.config(text="總時長：無法計算")
-        else:
+        """
+        更新總時長顯示
+        時長在背景執行緒讀取，只處理尚未讀取過的檔案；檔案列表再次變更時取消進行中的計算
+        """
+        if self._duration_cancel is not None:
+            self._duration_cancel.set()
+            self._duration_cancel = None
+        self._total_duration = None
+        if not self.selected_files:
             self.duration_label.config(text="總時長：0:00")
-        self._update_estimated_end(total_duration)
+            self._update_estimated_end()
+            return
+        
+        cancel_event = threading.Event()
+        self._duration_cancel = cancel_event
+        self.duration_label.config(text="總時長：計算中...")
+        self._update_estimated_end()
+        selected = list(self.selected_files)
+        known = set(self._file_durations)
+        
+        def worker():
+            try:
+                files = self._resolved_files(selected)
+                durations = {}
+                for file_path in files:
+                    if cancel_event.is_set():
+                        return
+                    if file_path not in known and file_path not in durations:
+                        durations[file_path] = get_audio_duration(file_path)
+                self.dialog.after(0, self._apply_durations, cancel_event, files, durations)
+            except (tk.TclError, RuntimeError):
+                # 對話框已關閉
+                cancel_event.set()
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _apply_durations(self, cancel_event, files, durations):
+        """套用背景計算的時長（主執行緒）"""
+        if cancel_event.is_set() or not self.dialog.winfo_exists():
+            return
+        self._duration_cancel = None
+        self._file_durations.update(durations)
+        total_duration = sum(self._file_durations.get(f) or 0 for f in files)
+        if total_duration > 0:
+            self._total_duration = total_duration
+            duration_text = f"總時長：{format_duration(total_duration)}"
+        else:
+            duration_text = "總時長：無法計算"
+        if len(files) > MAX_QUEUE_SIZE:
+            # 播放佇列放不下時，超出的檔案不會播放
+            duration_text += f"　⚠ 共{len(files)}個檔案，超過佇列上限只播放前{MAX_QUEUE_SIZE}個"
+        self.duration_label.config(text=duration_text)
+        self._update_estimated_end()
 
-    def _update_estimated_end(self, total_duration=None):
-        if total_duration is None and self.selected_files:
-            total_duration = get_total_duration(self.selected_files)
+    def _update_estimated_end(self):
+        """依快取的總時長計算預估完播時間（不讀取檔案）"""
+        total_duration = self._total_duration
         if not total_duration:
-            self.estimated_end_label.config(text="預估完播：--:--")
+            pending = self._duration_cancel is not None
+            self.estimated_end_label.config(text="預估完播：計算中..." if pending else "預估完播：--:--")
             return
         try:
             hour = int(self.hour_var.get())
@@ -506,6 +705,10 @@ class ScheduleDialog:
     
     def _confirm(self):
         """確認並關閉"""
+        if self._validation_cancel is not None:
+            messagebox.showinfo("提示", "檔案仍在驗證中，請稍候")
+            return
+        
         # 驗證
         if not self.selected_files:
             messagebox.showwarning("提示", "請至少選擇一個音訊檔案")
@@ -524,6 +727,11 @@ class ScheduleDialog:
             messagebox.showerror("錯誤", "時間格式不正確")
             return
         
+        if self._duration_cancel is not None:
+            # 時長尚未算完，交由主視窗計算
+            self._duration_cancel.set()
+            self._duration_cancel = None
+        
         name = self.name_var.get().strip()
         if not name:
             name = "播放排程"
@@ -533,23 +741,209 @@ class ScheduleDialog:
             'name': name,
             'days': selected_days,
             'time': time_str,
-            'files': self.selected_files.copy()
+            'files': self.selected_files.copy(),
+            'duration_seconds': int(self._total_duration) if self._total_duration else None,
+            'import_to_library': self.import_var.get()
         }
         
         self.dialog.destroy()
     
     def _cancel(self):
         """取消並關閉"""
+        if self._validation_cancel is not None:
+            self._validation_cancel.set()
+        if self._duration_cancel is not None:
+            self._duration_cancel.set()
         self.result = None
         self.dialog.destroy()
 
+class GuiHttpController:
+    """
+    介面模式的 HTTP 管理介面服務物件（與 HeadlessDaemon 相同的介面）
+    請求在 HTTP 執行緒池呼叫，讀寫排程與播放控制都交由主執行緒執行，與畫面上的操作依序進行
+    """
+    
+    # 修改排程（含保存）等待主執行緒的秒數
+    WRITE_TIMEOUT = 30.0
+    
+    def __init__(self, window):
+        self.window = window
+        self.events = window.events
+        self.started_at = monotonic()
+    
+    @property
+    def state_version(self):
+        return self.window.state_version
+    
+    def _uptime(self):
+        return round(monotonic() - self.started_at, 1)
+    
+    def health(self):
+        """健康檢查：背景服務是否運作中（不經主執行緒，介面卡住時仍可回應）"""
+        window = self.window
+        return {
+            'scheduler': window.scheduler.running,
+            'file_verifier': window.file_verifier.running,
+            'uptime': self._uptime(),
+        }
+    
+    def status(self):
+        """目前狀態摘要"""
+        def build():
+            window = self.window
+            current = window.current_schedule
+            next_info = window.scheduler.get_next_play_time()
+            return {
+                'schedules': len(window.schedules),
+                'playing': window.player.is_playing,
+                'current_file': window.player.current_file,
+                'current_schedule': current.id if current else None,
+                'queue_size': window.player.get_queue_size(),
+                'pending_schedules': [schedule.id for schedule, _ in window.pending_schedules],
+                'next_play': {
+                    'time': next_info['time'],
+                    'schedule': next_info['schedule'].id,
+                    'days': next_info.get('days', 0),
+                } if next_info else None,
+                'uptime': self._uptime(),
+                'sync': window.sync.status() if window.sync else None,
+            }
+        return self.window._run_in_main_thread(build)
+    
+    def sync_status(self):
+        """本節點與所有節點的同步狀態，未啟用同步時為None"""
+        sync = self.window.sync
+        if sync is None:
+            return None
+        return {'node': sync.status(), 'fleet': fleet_status(sync.shared_dir)}
+    
+    def queue_snapshot(self):
+        """播放佇列與待播排程"""
+        def build():
+            window = self.window
+            current = window.current_schedule
+            return {
+                'current_schedule': current.id if current else None,
+                'current_file': window.player.current_file,
+                'playing': window.player.is_playing,
+                'queue_size': window.player.get_queue_size(),
+                'pending': [
+                    {'schedule': schedule.id, 'name': schedule.name, 'files': len(files)}
+                    for schedule, files in window.pending_schedules
+                ],
+            }
+        return self.window._run_in_main_thread(build)
+    
+    def schedule_list(self):
+        """全部排程（可寫入JSON的字典）"""
+        return self.window._run_in_main_thread(lambda: [s.to_dict() for s in self.window.schedules])
+    
+    def find_schedule(self, schedule_id):
+        """依ID取得排程，不存在時為None"""
+        def find():
+            for schedule in self.window.schedules:
+                if schedule.id == schedule_id:
+                    return schedule.copy()
+            return None
+        return self.window._run_in_main_thread(find)
+    
+    def _build_schedule(self, data):
+        """由請求資料建立排程並計算時長（HTTP 執行緒，不佔用主執行緒）"""
+        schedule = schedule_from_request(data)
+        schedule.duration_seconds = self.window._calculate_schedule_duration(schedule.files)
+        return schedule
+    
+    def _commit(self):
+        """更新列表與排程器並保存（主執行緒）"""
+        window = self.window
+        window.update_schedule_tree()
+        if not window.save_schedules():
+            raise IOError("保存播放計劃失敗")
+    
+    def add_schedule(self, data):
+        """
+        新增排程並保存
+        :raises ValueError: 資料錯誤
+        :raises IOError: 保存失敗
+        """
+        schedule = self._build_schedule(data)
+        
+        def add():
+            window = self.window
+            added = schedule.copy(id=window.next_schedule_id)
+            window.next_schedule_id += 1
+            window.schedules.append(added)
+            self._commit()
+            return added
+        return self.window._run_in_main_thread(add, self.WRITE_TIMEOUT)
+    
+    def update_schedule(self, schedule_id, data):
+        """
+        以新資料取代排程並保存
+        :return: 更新後的排程，排程不存在時為None
+        """
+        schedule = self._build_schedule(data).copy(id=schedule_id)
+        
+        def update():
+            schedules = self.window.schedules
+            for index, existing in enumerate(schedules):
+                if existing.id == schedule_id:
+                    schedules[index] = schedule
+                    self._commit()
+                    return schedule
+            return None
+        return self.window._run_in_main_thread(update, self.WRITE_TIMEOUT)
+    
+    def delete_schedule(self, schedule_id):
+        """
+        刪除排程並保存
+        :return: 是否找到並刪除
+        """
+        def delete():
+            window = self.window
+            schedules = [s for s in window.schedules if s.id != schedule_id]
+            if len(schedules) == len(window.schedules):
+                return False
+            window.schedules = schedules
+            self._commit()
+            return True
+        return self.window._run_in_main_thread(delete, self.WRITE_TIMEOUT)
+    
+    def play_schedule(self, schedule):
+        """
+        立即播放排程：目前正在播放時排入待播佇列
+        :return: 是否有可播放的檔案
+        """
+        def play():
+            window = self.window
+            files = window._playable_files(schedule.files)
+            if not files:
+                return False
+            window._enqueue_schedule_playback(schedule, files)
+            return True
+        return self.window._run_in_main_thread(play)
+    
+    def stop_playback(self):
+        """停止播放並清空待播佇列"""
+        self.window._run_in_main_thread(self.window.stop_playback)
+
 class MainWindow:
     """主視窗類別"""
     
-    def __init__(self):
-        """初始化主視窗"""
+    def __init__(self, sync=None, http_port=None, http_host='127.0.0.1', http_token=None):
+        """
+        初始化主視窗
+        :param sync: 多台電腦排程同步節點（SyncNode，None表示不同步）
+        :param http_port: HTTP 管理介面埠號，None表示不開啟
+        :param http_host: HTTP 管理介面監聽位址（非本機位址必須設定權杖）
+        :param http_token: HTTP 管理介面的存取權杖（None表示不驗證）
+        """
+        self.sync = sync
+        self._http_options = (http_port, http_host, http_token)
+        self.http = None
         self.root = TkinterDnD.Tk()
         self.root.title("自動廣播系統")
+        self.root.report_callback_exception = self._report_callback_exception
         # 調整預設大小以適應舊螢幕 (Windows 2008 常見 1024x768)
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -575,7 +969,7 @@ class MainWindow:
         
         # 檢測並設定字體（支援舊電腦）
         self.font_family = self._detect_font()
-        print(f"使用字體: {self.font_family}")
+        log.info("使用字體", font=self.font_family)
         
         # 現代化配色方案
         self.colors = {
@@ -625,33 +1019,69 @@ class MainWindow:
                 test_label.config(font=(font_name, 10))
                 # 如果字體存在，Tkinter不會報錯
                 test_label.destroy()
-                print(f"✓ 使用字體: {font_name}")
+                log.debug("字體可用", font=font_name)
                 return font_name
             except:
                 continue
         
         # 如果都不可用，使用系統預設字體
         test_label.destroy()
-        print("⚠ 使用系統預設字體")
+        log.warning("⚠ 使用系統預設字體")
         return 'TkDefaultFont'
     
     def _init_components(self):
         """初始化核心組件（在字體檢測後調用）"""
         # 初始化核心組件
         self.storage = Storage()
+        self.library = AudioLibrary(os.path.join(self.storage.data_dir, 'library'))
+        # 背景檢查排程引用的檔案，觸發播放時查詢快取而非即時存取磁碟
+        self.file_verifier = FileVerifier(on_change=self._on_file_status_changed)
+        # 將隨身碟、網路磁碟上的音訊鏡像到本機，播放時優先使用本機副本
+        self.mirror = MirrorCache(
+            os.path.join(self.storage.data_dir, 'cache', 'mirror'),
+            status_lookup=self.file_verifier.status,
+            on_change=self._on_mirror_changed
+        )
+        # 播放器無法解碼的格式（WMA、AAC、M4A）於背景轉檔，播放時改用轉檔結果
+        self.transcoder = TranscodeCache(
+            os.path.join(self.storage.data_dir, 'cache', 'transcode'),
+            status_lookup=self.file_verifier.status,
+            on_change=self._on_transcode_changed
+        )
         self.player = AudioPlayer(
             on_playback_start=self._on_playback_start,
-            on_playback_end=self._on_playback_end
+            on_playback_end=self._on_playback_end,
+            file_checker=self._is_file_playable,
+            path_resolver=self._resolve_playback_path,
+            on_playback_error=self._on_playback_error
         )
         self.scheduler = Scheduler(on_schedule_trigger=self._on_schedule_trigger)
+        # 排程檔被同步工具或命令列工具修改時，只套用有變化的排程
+        self.schedule_watcher = ScheduleFileWatcher(
+            self.storage.schedule_file,
+            on_change=self._on_schedule_file_changed
+        )
         self.notifier = Notifier()
         self.tray = None
+        # 排程與播放事件（HTTP 管理介面的事件串流訂閱）
+        self.events = EventBus()
+        self.state_version = 0  # 狀態每次變化時遞增，供管理介面判斷快照是否過期
         
         # 資料
         self.schedules = []
+        self._schedule_base = []  # 上次與排程檔同步時的排程快照（判斷本機修改）
+        self._tree_rows = {}  # 列表中各列對應的排程快照（依列ID）
+        self._tree_live = {}  # 列ID -> 目前的排程
+        self._tracking_pending = False
+        self.search_index = None  # 排程搜尋索引（第一次搜尋時建立）
+        self._search_job = None  # 等待中的搜尋（連續輸入時延後）
+        self._tree_referenced = None  # 上次設定給檔案檢查的引用檔案
+        self._tracking_generation = 0  # 背景讀取播放清單的批次（較舊的結果不套用）
+        self._playlist_entries = {}  # 播放清單路徑 -> 展開後的檔案（背景讀取，列表顯示時不存取磁碟）
         self.selected_files = []  # 目前選擇的檔案列表
         self.next_schedule_id = 1
         self.max_selected_files = 50  # 限制最多選擇50個檔案
+        self._drop_cancel = None  # 進行中的拖放驗證
         self.pending_schedules = deque()
         self.current_schedule = None
         
@@ -661,22 +1091,68 @@ class MainWindow:
         # 載入保存的資料
         self.load_schedules()
         
-        # 啟動排程器（確認真的在運行）
+        # 啟動檔案檢查與排程器（確認真的在運行）
+        self.file_verifier.start()
+        self.mirror.start()
+        self.transcoder.start()
+        self.schedule_watcher.start()
+        if self.sync:
+            # 同步取得的新版本交由主執行緒寫入，與畫面上的保存依序執行
+            self.sync.writer = self._apply_synced_schedules
+            self.sync.start()
         self.scheduler.start()
         if self.scheduler.running:
-            print("✓ 排程器已成功啟動，會自動在指定時間播放")
+            log.info("✓ 排程器已成功啟動，會自動在指定時間播放", schedules=len(self.schedules))
         else:
-            print("⚠ 排程器啟動失敗")
+            log.error("⚠ 排程器啟動失敗")
+        
+        # HTTP 管理介面（與無介面模式相同的 API）
+        self._start_http_api()
         
         # 啟動系統託盤
         self.setup_tray()
         
+        # 介面定期更新：視窗隱藏（託盤、最小化）時暫停
+        self.ui_timers = UITimerManager(self.root)
+        self.root.bind('<Map>', self._on_window_map, add='+')
+        self.root.bind('<Unmap>', self._on_window_unmap, add='+')
+        
         # 啟動時間更新
         self.update_time_display()
         
         # 處理視窗關閉事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def _start_http_api(self):
+        """依啟動參數開啟 HTTP 管理介面，無法監聽時只記錄錯誤"""
+        http_port, http_host, http_token = self._http_options
+        if http_port is None:
+            return
+        from core.http_api import HttpControlServer
+        try:
+            self.http = HttpControlServer(GuiHttpController(self), host=http_host, port=http_port, token=http_token)
+            self.http.start()
+        except (OSError, ValueError) as e:
+            log.error("HTTP 管理介面啟動失敗", error=str(e))
+            self.http = None
+            return
+        log.info("✓ HTTP 管理介面已啟動", host=self.http.host, port=self.http.port)
+    
+    def _touch(self):
+        """標記狀態已變化（管理介面的快照隨之更新）"""
+        self.state_version += 1
+    
+    def _queue_changed(self):
+        """播放佇列或待播排程變化：標記狀態並發布佇列事件"""
+        self._touch()
+        current = self.current_schedule
+        self.events.publish(
+            'queue',
+            current_schedule=current.id if current else None,
+            queue_size=self.player.get_queue_size(),
+            pending=[schedule.id for schedule, _ in self.pending_schedules]
+        )
+    
     def create_modern_button(self, parent, text, command, bg_color=None, fg_color='white', font_size=14):
         """創建現代化按鈕"""
         if bg_color is None:
@@ -729,12 +1205,11 @@ class MainWindow:
                 self.root.iconphoto(False, photo)
                 # 保存引用以避免被垃圾回收
                 self._icon_photo = photo
-                print(f"✓ 視窗圖標載入成功: {logo_path}")
+                log.debug("視窗圖標載入成功", path=logo_path)
             else:
-                print(f"⚠ Logo檔案不存在: {logo_path}")
-                print(f"   請確保 RadioOne Logo.png 與程式在同一目錄")
+                log.warning("⚠ Logo檔案不存在，請確保 RadioOne Logo.png 與程式在同一目錄", path=logo_path)
         except Exception as e:
-            print(f"⚠ 設定視窗圖標失敗: {e}")
+            log.warning("⚠ 設定視窗圖標失敗", error=str(e))
     
     def _on_window_resize(self, event=None):
         """處理窗口大小變化，動態調整版權資訊換行寬度，並確保時間顯示完整"""
@@ -751,10 +1226,10 @@ class MainWindow:
             # 防呆機制：如果窗口太窄或太矮，強制恢復最小尺寸
             if window_width < 800:
                 self.root.after(100, lambda: self.root.geometry(f"800x{max(window_height, 550)}"))
-                print(f"⚠ 窗口寬度過小 ({window_width}px)，已強制恢復至最小寬度 800px")
+                log.warning("⚠ 窗口寬度過小，已強制恢復至最小寬度 800px", width=window_width)
             if window_height < 550:
                 self.root.after(100, lambda: self.root.geometry(f"{max(window_width, 800)}x550"))
-                print(f"⚠ 窗口高度過小 ({window_height}px)，已強制恢復至最小高度 550px")
+                log.warning("⚠ 窗口高度過小，已強制恢復至最小高度 550px", height=window_height)
             
             # 更新狀態列提示
             self._update_status_hint()
@@ -1226,17 +1701,48 @@ class MainWindow:
         )
         schedule_title.pack(pady=(0, 5))
         
+        # 搜尋列：名稱、檔名、週幾（週一、平日、週末）、時間或時間範圍（08:00-09:30），空白分隔的條件須全部符合
+        search_row = tk.Frame(schedule_card, bg=self.colors['bg_card'])
+        search_row.pack(fill='x', pady=(0, 5))
+        tk.Label(
+            search_row,
+            text="🔍 搜尋：",
+            font=(self.font_family, 11),
+            bg=self.colors['bg_card'],
+            fg=self.colors['text_primary']
+        ).pack(side='left')
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self._schedule_search())
+        tk.Entry(
+            search_row,
+            textvariable=self.search_var,
+            font=(self.font_family, 11),
+            relief='solid',
+            borderwidth=1,
+            highlightthickness=1
+        ).pack(side='left', fill='x', expand=True)
+        self.search_result_label = tk.Label(
+            search_row,
+            text="",
+            font=(self.font_family, 10),
+            bg=self.colors['bg_card'],
+            fg=self.colors['text_secondary']
+        )
+        self.search_result_label.pack(side='left', padx=(8, 0))
+        
         # 創建Treeview顯示播放排程
         tree_frame = tk.Frame(schedule_card, bg=self.colors['bg_card'])
         tree_frame.pack(fill='both', expand=True, pady=(0, 5))
         
+        # 只實體化可見列的排程列表，點選欄位標題可排序
         columns = ('名稱', '週幾', '時間', '預估完播', '音訊檔案', '檔案數')
-        self.schedule_tree = ttk.Treeview(
+        self.schedule_view = VirtualScheduleView(
             tree_frame,
-            columns=columns,
-            show='headings',
-            height=10
+            columns,
+            row_builder=self._build_schedule_row,
+            sort_key_builder=self._schedule_sort_key
         )
+        self.schedule_tree = self.schedule_view.tree
         
         # 設定Treeview樣式（緊湊但可見）
         style = ttk.Style()
@@ -1257,6 +1763,8 @@ class MainWindow:
         
         # 隱藏預設的#0列（避免重複顯示）
         self.schedule_tree.column('#0', width=0, stretch=False)
+        # 缺少檔案的排程以紅字標示
+        self.schedule_tree.tag_configure('missing', foreground='#C62828')
         
         for col in columns:
             self.schedule_tree.heading(col, text=col)
@@ -1273,11 +1781,8 @@ class MainWindow:
             else:
                 self.schedule_tree.column(col, width=90, minwidth=60, anchor='center')
         
-        scrollbar_tree = ttk.Scrollbar(tree_frame, orient='vertical', command=self.schedule_tree.yview)
-        self.schedule_tree.configure(yscrollcommand=scrollbar_tree.set)
-        
         self.schedule_tree.pack(side='left', fill='both', expand=True)
-        scrollbar_tree.pack(side='right', fill='y')
+        self.schedule_view.scrollbar.pack(side='right', fill='y')
         
         # 綁定雙擊編輯
         self.schedule_tree.bind('<Double-1>', self.edit_schedule)
@@ -1382,9 +1887,9 @@ class MainWindow:
                 )
                 logo_label.pack(side='left', padx=(0, 8))
             else:
-                print(f"⚠ Logo檔案不存在: {logo_path}")
+                log.warning("⚠ Logo檔案不存在", path=logo_path)
         except Exception as e:
-            print(f"⚠ 載入狀態列Logo失敗: {e}")
+            log.warning("⚠ 載入狀態列Logo失敗", error=str(e))
         
         self.status_label = tk.Label(
             status_inner,
@@ -1396,6 +1901,17 @@ class MainWindow:
         )
         self.status_label.pack(side='left', fill='x', expand=True)
         
+        # 取消拖放驗證（驗證進行中才顯示）
+        self.drop_cancel_label = tk.Label(
+            status_inner,
+            text="✕ 取消驗證",
+            bg=self.colors['bg_main'],
+            fg=self.colors['text_secondary'],
+            font=(self.font_family, 10),
+            cursor='hand2'
+        )
+        self.drop_cancel_label.bind('<Button-1>', lambda e: self._cancel_drop_validation())
+        
         # 快捷鍵提示標籤（動態顯示）
         self.status_hint_label = tk.Label(
             status_inner,
@@ -1424,6 +1940,16 @@ class MainWindow:
         )
         self.next_time_label.pack(side='left', fill='x', expand=True)
         
+        # 本機鏡像進度
+        self.mirror_label = tk.Label(
+            status_row2,
+            text="",
+            bg=self.colors['bg_main'],
+            fg=self.colors['text_secondary'],
+            font=(self.font_family, 9)
+        )
+        self.mirror_label.pack(side='left', padx=(10, 0))
+        
         # 重置視窗按鈕（自救機制）
         reset_btn = tk.Button(
             status_row2,
@@ -1465,7 +1991,7 @@ class MainWindow:
             )
             autostart_check.pack(side='right', padx=(10, 0))
         except Exception as e:
-            print(f"無法載入自動啟動模組: {e}")
+            log.warning("無法載入自動啟動模組", error=str(e))
         
         # UI設置完成後，強制更新Canvas以確保內容可見
         self.root.update_idletasks()
@@ -1487,26 +2013,163 @@ class MainWindow:
             )
             self.tray.start()
         except Exception as e:
-            print(f"系統託盤初始化失敗: {e}")
+            log.warning("系統託盤初始化失敗", error=str(e))
     
     def show_window(self):
         """顯示視窗"""
         self.root.deiconify()
         self.root.lift()
         self.root.focus_force()
+        # 可能由託盤執行緒呼叫，交由主執行緒恢復介面更新
+        self.root.after(0, self.ui_timers.set_visible, True)
     
     def on_closing(self):
         """視窗關閉事件"""
         # 最小化到託盤而不是關閉
         self.root.withdraw()
+        self.ui_timers.set_visible(False)
+    
+    def handle_control_command(self, command, argument):
+        """
+        處理再次啟動時轉送的指令（控制通道執行緒）
+        交由主執行緒執行並等待結果；metrics、dump-log 不涉及介面，直接在此執行（主執行緒忙碌或卡住時仍可讀取）
+        """
+        if command in ('metrics', 'dump-log'):
+            try:
+                path = resolve_output_path(argument, self.storage.data_dir)
+            except ValueError as e:
+                return {'ok': False, 'error': str(e)}
+            if command == 'metrics':
+                return metrics_command(path or '')
+            return dump_log_command(path or '')
+        try:
+            return self._run_in_main_thread(lambda: self._run_control_command(command, argument))
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+    
+    def _run_in_main_thread(self, func, timeout=5.0):
+        """
+        於主執行緒執行函數並等待結果（其他執行緒呼叫）
+        逾時時放棄尚未開始的函數，之後不會再執行（呼叫端重試不會重複寫入）；
+        已開始執行的則等待其完成
+        :return: func 的回傳值
+        :raises RuntimeError: 程式正在結束或主視窗沒有回應
+        """
+        done = threading.Event()
+        result = {}
+        state = {'started': False, 'abandoned': False}
+        state_lock = threading.Lock()
+        
+        def run():
+            with state_lock:
+                if state['abandoned']:
+                    return
+                state['started'] = True
+            try:
+                result['value'] = func()
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+        
+        try:
+            self.root.after(0, run)
+        except (tk.TclError, RuntimeError):
+            raise RuntimeError('程式正在結束')
+        if not done.wait(timeout):
+            with state_lock:
+                if not state['started']:
+                    state['abandoned'] = True
+                    raise RuntimeError('主視窗沒有回應')
+            done.wait()
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+    
+    def _apply_synced_schedules(self, schedules):
+        """
+        寫入同步節點取得的新版本（同步執行緒），交由主執行緒處理
+        :return: 是否保存成功
+        """
+        try:
+            return self._run_in_main_thread(lambda: self._replace_schedules(schedules))
+        except RuntimeError as e:
+            log.warning("套用同步的排程版本失敗", error=str(e))
+            return False
+    
+    def _replace_schedules(self, schedules):
+        """以同步版本取代全部排程並保存（主執行緒）"""
+        with self.schedule_watcher.writing():
+            if not self.storage.save_schedules(encode_schedules(schedules)):
+                return False
+        self.schedules = [s.copy() for s in schedules]
+        self._schedule_base = [s.copy() for s in schedules]
+        self.next_schedule_id = max((s.id or 0 for s in self.schedules), default=0) + 1
+        self.update_schedule_tree()
+        self.status_label.config(text="已套用同步的排程版本")
+        return True
+    
+    def _run_control_command(self, command, argument):
+        """執行控制指令（主執行緒）：ping、show、play <排程ID>、stop、reload、status"""
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'show':
+            self.show_window()
+            return {'ok': True}
+        if command == 'play':
+            try:
+                schedule_id = int(argument)
+            except ValueError:
+                return {'ok': False, 'error': '需要排程ID'}
+            for schedule in self.schedules:
+                if schedule.id == schedule_id:
+                    self._on_schedule_trigger(schedule)
+                    return {'ok': True}
+            return {'ok': False, 'error': f'找不到排程 {schedule_id}'}
+        if command == 'stop':
+            self.stop_playback()
+            return {'ok': True}
+        if command == 'reload':
+            # 明確要求重新載入時以排程檔為準，只套用有變化的排程
+            self.load_schedules(prefer='remote')
+            return {'ok': True, 'schedules': len(self.schedules)}
+        if command == 'status':
+            return {'ok': True, 'status': {
+                'schedules': len(self.schedules),
+                'playing': self.player.is_playing,
+                'current_file': self.player.current_file,
+                'queue_size': self.player.get_queue_size(),
+                'pending_schedules': [s.id for s, _ in self.pending_schedules],
+                'sync': self.sync.status() if self.sync else None,
+            }}
+        return {'ok': False, 'error': f'未知的指令: {command}'}
+    
+    def _on_window_map(self, event):
+        """視窗重新顯示：立即同步時間與播放進度"""
+        if event.widget is self.root:
+            self.ui_timers.set_visible(True)
+            self.schedule_watcher.refresh_now()
+    
+    def _on_window_unmap(self, event):
+        """視窗最小化或隱藏：暫停介面更新"""
+        if event.widget is self.root:
+            self.ui_timers.set_visible(False)
     
     def quit_app(self):
         """退出應用"""
         # 保存資料
         self.save_schedules()
         # 清理資源
+        if self.http:
+            self.http.stop()
         self.player.cleanup()
         self.scheduler.stop()
+        self.file_verifier.stop()
+        self.mirror.stop()
+        self.transcoder.stop()
+        self.schedule_watcher.stop()
+        if self.sync:
+            self.sync.stop()
         if self.tray:
             self.tray.stop()
         self.root.quit()
@@ -1531,63 +2194,91 @@ class MainWindow:
             else:
                 self.next_time_label.config(text="")
         except Exception as e:
-            print(f"更新時間顯示錯誤: {e}")
+            log.exception("更新時間顯示錯誤", error=str(e))
         finally:
-            # 使用after而不是遞迴調用，避免堆疊問題
+            # 使用after而不是遞迴調用，避免堆疊問題；視窗隱藏時暫停
             if hasattr(self, 'root') and self.root:
-                self.root.after(1000, self.update_time_display)
+                self.ui_timers.schedule('clock', 1000, self.update_time_display)
     
     def on_drop(self, event):
         """處理檔案拖放（非阻塞驗證）"""
         files = self.root.tk.splitlist(event.data)
-        
-        # 如果檔案數量少（<=10），直接驗證；否則使用背景執行緒
-        if len(files) <= 10:
-            valid_files, invalid_files = validate_dropped_files(files)
-            self._handle_validation_result(valid_files, invalid_files)
-        else:
-            # 大量檔案時使用背景執行緒驗證
-            self.status_label.config(text="正在驗證檔案...")
-            threading.Thread(
-                target=self._validate_files_async,
-                args=(files,),
-                daemon=True
-            ).start()
-    
-    def _validate_files_async(self, files):
-        """在背景執行緒中驗證檔案"""
-        valid_files, invalid_files = validate_dropped_files(files)
-        # 在主執行緒中更新UI
-        self.root.after(0, self._handle_validation_result, valid_files, invalid_files)
-    
-    def _handle_validation_result(self, valid_files, invalid_files):
-        """處理驗證結果"""
-        if invalid_files:
-            error_msg = "以下檔案無法新增：\n"
-            for file_path, reason in invalid_files[:5]:  # 最多顯示5個錯誤
-                error_msg += f"{os.path.basename(file_path)}: {reason}\n"
-            if len(invalid_files) > 5:
-                error_msg += f"...還有 {len(invalid_files) - 5} 個檔案無法新增\n"
-            messagebox.showwarning("檔案驗證失敗", error_msg)
-        
-        # 檢查檔案列表大小限制
-        remaining_slots = self.max_selected_files - len(self.selected_files)
-        if remaining_slots <= 0:
+        # 一律在背景執行緒驗證：少量檔案在網路磁碟上檢查（含判斷是否為資料夾）也可能很慢
+        if files:
+            self._start_drop_validation(files)
+    
+    def _start_drop_validation(self, paths):
+        """
+        在背景執行緒展開資料夾並驗證檔案，結果分批加入列表；
+        檔案列表填滿後即停止掃描，只保留前幾個無效檔案與總數
+        """
+        # 取消上一次尚未完成的驗證
+        if self._drop_cancel is not None:
+            self._drop_cancel.set()
+        if len(self.selected_files) >= self.max_selected_files:
             messagebox.showwarning("提示", f"已達到檔案列表上限（{self.max_selected_files}個），請先移除部分檔案")
-            self.update_file_listbox()
-            self.status_label.config(text="就緒")
             return
-        
-        # 只新增可容納的檔案數量
-        files_to_add = valid_files[:remaining_slots]
-        if len(valid_files) > remaining_slots:
-            messagebox.showinfo("提示", 
-                f"已新增 {remaining_slots} 個檔案（達到上限）。\n"
-                f"還有 {len(valid_files) - remaining_slots} 個檔案未新增。")
-        
-        self.selected_files.extend(files_to_add)
+        cancel_event = threading.Event()
+        self._drop_cancel = cancel_event
+        self._drop_invalid = []
+        self._drop_invalid_count = 0
+        self._drop_checked = 0
+        self._drop_added = 0
+        self.status_label.config(text="正在驗證檔案...")
+        self.drop_cancel_label.pack(side='right', padx=10, before=self.status_hint_label)
+        
+        def worker():
+            try:
+                files = expand_dropped_paths(paths, cancel_event)
+                for valid_files, invalid_files in iter_validation_batches(files, cancel_event=cancel_event):
+                    check_playlist_batch(valid_files, invalid_files, cancel_event)
+                    self.root.after(0, self._add_drop_batch, cancel_event, valid_files, invalid_files)
+                self.root.after(0, self._finish_drop_validation, cancel_event)
+            except (tk.TclError, RuntimeError):
+                # 主視窗已關閉
+                cancel_event.set()
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _add_drop_batch(self, cancel_event, valid_files, invalid_files):
+        """加入一批拖放驗證結果（主執行緒）"""
+        if cancel_event.is_set():
+            return
+        self._drop_checked += len(valid_files) + len(invalid_files)
+        self._drop_invalid_count += len(invalid_files)
+        self._drop_invalid.extend(invalid_files[:5 - len(self._drop_invalid)])
+        room = self.max_selected_files - len(self.selected_files)
+        self.selected_files.extend(valid_files[:room])
+        self._drop_added += min(len(valid_files), room)
+        self.status_label.config(text=f"正在驗證檔案... 已檢查 {self._drop_checked} 個，加入 {self._drop_added} 個")
+        # 達到上限後不再掃描
+        if len(valid_files) >= room:
+            cancel_event.set()
+            self._finish_drop_validation(cancel_event, force=True, full=True)
+    
+    def _cancel_drop_validation(self):
+        """取消進行中的拖放驗證，保留已加入的檔案"""
+        cancel_event = self._drop_cancel
+        if cancel_event is not None:
+            cancel_event.set()
+            self._finish_drop_validation(cancel_event, force=True)
+    
+    def _finish_drop_validation(self, cancel_event, force=False, full=False):
+        """拖放驗證結束：提示無效檔案與數量上限並更新列表"""
+        if (cancel_event.is_set() and not force) or self._drop_cancel is not cancel_event:
+            return
+        self._drop_cancel = None
+        self.drop_cancel_label.pack_forget()
         self.update_file_listbox()
         self.status_label.config(text="就緒")
+        invalid_files = self._drop_invalid
+        if invalid_files:
+            lines = [f"{os.path.basename(path)}: {reason}" for path, reason in invalid_files]
+            if self._drop_invalid_count > len(invalid_files):
+                lines.append(f"...還有 {self._drop_invalid_count - len(invalid_files)} 個檔案無法新增")
+            messagebox.showwarning("檔案驗證失敗", "以下檔案無法新增：\n" + "\n".join(lines))
+        if full:
+            messagebox.showinfo("提示", f"已新增 {self._drop_added} 個檔案（達到上限 {self.max_selected_files} 個），其餘檔案未檢查")
     
     def select_files(self):
         """選擇檔案（非阻塞驗證）"""
@@ -1595,23 +2286,13 @@ class MainWindow:
             title="選擇音訊檔案",
             filetypes=[
                 ("音訊檔案", "*.mp3 *.wav *.wma *.ogg *.flac *.m4a *.aac"),
+                ("播放清單", "*.m3u *.m3u8 *.pls"),
                 ("所有檔案", "*.*")
             ]
         )
         
         if files:
-            # 如果檔案數量少（<=10），直接驗證；否則使用背景執行緒
-            if len(files) <= 10:
-                valid_files, invalid_files = validate_dropped_files(files)
-                self._handle_validation_result(valid_files, invalid_files)
-            else:
-                # 大量檔案時使用背景執行緒驗證
-                self.status_label.config(text="正在驗證檔案...")
-                threading.Thread(
-                    target=self._validate_files_async,
-                    args=(files,),
-                    daemon=True
-                ).start()
+            self._start_drop_validation(files)
     
     def update_file_listbox(self):
         """更新檔案列表顯示"""
@@ -1654,24 +2335,19 @@ class MainWindow:
         try:
             hour = int(self.hour_var.get())
             minute = int(self.minute_var.get())
-            time_str = f"{hour:02d}:{minute:02d}"
+            minute_of_day = parse_time(f"{hour:02d}:{minute:02d}")
         except ValueError:
-            time_str = "15:40"
+            minute_of_day = parse_time("15:40")
         
         name = self.schedule_name_var.get().strip()
         if not name:
             name = "上課提醒"
         
         # 創建臨時排程對象用於預載入彈窗
-        preset_schedule = {
-            'name': name,
-            'days': selected_days,
-            'time': time_str,
-            'files': []
-        }
+        preset_schedule = Schedule(None, name, minute_of_day, days_to_mask(selected_days))
         
         # 打開彈窗（預載入右側設定）
-        dialog = ScheduleDialog(self.root, self.font_family, self.colors, schedule=preset_schedule)
+        dialog = ScheduleDialog(self.root, self.font_family, self.colors, schedule=preset_schedule, library=self.library)
         self.root.wait_window(dialog.dialog)
         
         # 檢查結果
@@ -1679,15 +2355,14 @@ class MainWindow:
             return  # 用戶取消
         
         # 創建播放排程
-        schedule = {
-            'id': self.next_schedule_id,
-            'name': dialog.result['name'],
-            'days': dialog.result['days'],
-            'time': dialog.result['time'],
-            'files': dialog.result['files'],
-            'duration': 0
-        }
-        self._ensure_schedule_duration(schedule, recompute=True)
+        schedule = Schedule(
+            self.next_schedule_id,
+            dialog.result['name'],
+            parse_time(dialog.result['time']),
+            days_to_mask(dialog.result['days']),
+            dialog.result['files']
+        )
+        self._apply_dialog_duration(schedule, dialog.result)
         
         self.next_schedule_id += 1
         
@@ -1700,67 +2375,303 @@ class MainWindow:
         # 自動保存
         self.save_schedules()
         
+        if dialog.result.get('import_to_library'):
+            self._import_schedule_files(schedule.id, schedule.files)
+        
         messagebox.showinfo("成功", "播放排程已新增")
     
     def update_schedule_tree(self):
-        """更新播放排程樹形顯示"""
-        # 清空現有項
-        for item in self.schedule_tree.get_children():
-            self.schedule_tree.delete(item)
-        
-        # 新增所有排程
+        """
+        更新播放排程樹形顯示
+        以排程ID比對上次顯示的內容，只新增、更新、刪除有變化的列；
+        排程器同樣只套用有變化的排程，未變更排程的觸發記錄會保留
+        """
+        self._touch()
+        rows = self._tree_rows
+        previous = self._tree_live
+        live = {}
+        ordered = []
+        changed = []
         for schedule in self.schedules:
-            # 格式化週幾顯示
-            day_names = {
-                'monday': '週一',
-                'tuesday': '週二',
-                'wednesday': '週三',
-                'thursday': '週四',
-                'friday': '週五',
-                'saturday': '週六',
-                'sunday': '週日'
-            }
-            days_display = ','.join([day_names.get(day, day) for day in schedule['days']])
-            
-            # 格式化音訊檔案顯示（顯示前3個檔案名，超過顯示...）
-            files = schedule.get('files', [])
-            if files:
-                file_names = [os.path.basename(f) for f in files[:3]]
-                files_display = '、'.join(file_names)
-                if len(files) > 3:
-                    files_display += f'... (共{len(files)}個)'
+            key = str(schedule.id)
+            if key in live:
+                # ID重複（手動編輯的資料）時以位置區分
+                key = f"{key}#{len(ordered)}"
+            ordered.append(key)
+            live[key] = schedule
+            # 同一物件視為未變更（排程修改時一律以 copy 產生新物件）
+            if previous.get(key) is schedule:
+                continue
+            snapshot = rows.get(key)
+            if snapshot is None or snapshot != schedule:
+                rows[key] = schedule.copy()
+                changed.append(key)
+        
+        removed = [key for key in rows if key not in live]
+        for key in removed:
+            del rows[key]
+        self._tree_live = live
+        # 搜尋索引已建立時逐筆更新
+        if self.search_index is not None:
+            for key in removed:
+                self.search_index.remove(key)
+            for key in changed:
+                self._index_schedule(key)
+        # 列表只重繪可見範圍內有變化的列
+        self.schedule_view.set_rows(ordered, changed, removed)
+        if self.search_var.get().strip():
+            self._apply_schedule_search()
+        self.scheduler.apply_schedules(self.schedules)
+        
+        # 檔案檢查清單於畫面繪製後再更新，避免拖慢第一個畫面
+        if not self._tracking_pending:
+            self._tracking_pending = True
+            self.root.after_idle(self._update_tracked_files)
+    
+    def _update_tracked_files(self):
+        """
+        更新檔案檢查、轉檔與鏡像追蹤的檔案（引用的檔案未變時不重新設定）；
+        播放清單於背景執行緒讀取，完成後才重繪排程列表
+        """
+        self._tracking_pending = False
+        referenced = [f for s in self.schedules for f in s.files]
+        if referenced == self._tree_referenced:
+            return
+        self._tree_referenced = referenced
+        self._tracking_generation += 1
+        generation = self._tracking_generation
+        paths = self.library.resolve_paths(referenced)
+        
+        def worker():
+            entries = {p: read_playlist(p) for p in dict.fromkeys(paths) if is_playlist_file(p)}
+            if generation != self._tracking_generation:
+                return
+            resolved = self._expand_with(paths, entries)
+            # 播放清單本身也交由檔案檢查追蹤，內容修改時重新讀取
+            self.file_verifier.set_paths(resolved + list(entries))
+            self.transcoder.set_paths(resolved)
+            # 音訊庫內的檔案已在本機，不需要鏡像
+            self.mirror.set_paths(f for f in self._expand_with(referenced, entries) if not is_content_ref(f))
+            try:
+                self.root.after(0, self._apply_playlist_entries, generation, entries)
+            except (tk.TclError, RuntimeError):
+                # 主視窗已關閉
+                pass
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _apply_playlist_entries(self, generation, entries):
+        """套用背景讀取的播放清單內容並重繪排程列（主執行緒）"""
+        if generation != self._tracking_generation:
+            return
+        self._playlist_entries = entries
+        self._update_mirror_label()
+        self.schedule_view.invalidate()
+    
+    def _reload_playlists(self):
+        """播放清單被修改：重新讀取（主執行緒）"""
+        self._tree_referenced = None
+        self._update_tracked_files()
+    
+    @staticmethod
+    def _expand_with(paths, entries):
+        """以已讀取的播放清單內容展開路徑（不存取磁碟；尚未讀取的播放清單視為空）"""
+        result = []
+        for path in paths:
+            if is_playlist_file(path):
+                result.extend(entries.get(path, ()))
             else:
-                files_display = '無檔案'
-            
-            duration_seconds = self._ensure_schedule_duration(schedule)
-            end_display = self._compose_end_time_label(schedule.get('time'), duration_seconds)
-            
-            self.schedule_tree.insert('', 'end', values=(
-                schedule['name'],
-                days_display,
-                schedule['time'],
-                end_display,
-                files_display,
-                len(files)
-            ), tags=(schedule['id'],))
-        
-        # 更新排程器
-        self.scheduler.set_schedules(self.schedules)
+                result.append(path)
+        return result
+    
+    def _index_schedule(self, key):
+        """將一筆排程加入搜尋索引"""
+        schedule = self._tree_live[key]
+        file_names = [self.library.display_name(f) for f in schedule.files]
+        self.search_index.update(key, schedule.name, file_names, schedule.minute_of_day, schedule.days_mask)
+    
+    def _schedule_search(self):
+        """搜尋框內容變更：停止輸入 SEARCH_DEBOUNCE_MS 後才查詢，清空時立即顯示全部"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        if not self.search_var.get().strip():
+            self._apply_schedule_search()
+            return
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_schedule_search)
+    
+    def _apply_schedule_search(self):
+        """
+        依搜尋框內容篩選排程列表（索引於第一次搜尋時建立，之後隨排程變更維護；
+        查詢延續上一次時索引只在上次結果中篩選）
+        """
+        self._search_job = None
+        query = self.search_var.get()
+        if not query.strip():
+            self.schedule_view.set_filter(None)
+            self.search_result_label.config(text="")
+            return
+        if self.search_index is None:
+            self.search_index = ScheduleSearchIndex()
+            for key in self._tree_live:
+                self._index_schedule(key)
+        matched = self.search_index.search(query)
+        self.schedule_view.set_filter(matched)
+        self.search_result_label.config(text=f"符合 {len(matched)} 筆")
+    
+    def _build_schedule_row(self, key):
+        """列表需要顯示某列時才組合內容（不修改比對用快照，時長補算後的差異由下次更新偵測）"""
+        return self._schedule_row(self._tree_live[key])
+    
+    def _schedule_sort_key(self, key):
+        """預先計算各欄位的排序鍵（與欄位順序對應）"""
+        schedule = self._tree_live[key]
+        files = schedule.files
+        first_file = self.library.display_name(files[0]).casefold() if files else ''
+        end = (schedule.minute_of_day * 60 + schedule.duration_seconds
+               if schedule.has_duration and schedule.duration_seconds is not None else float('inf'))
+        return (
+            schedule.name.casefold(),
+            tuple(day for day in range(7) if schedule.days_mask >> day & 1),
+            schedule.minute_of_day,
+            end,
+            first_file,
+            len(files),
+        )
+    
+    def _schedule_row(self, schedule):
+        """組合排程列表中一列的顯示值與標籤"""
+        # 格式化週幾顯示
+        days_display = ','.join([DAY_NAMES.get(day, day) for day in schedule.days])
+        
+        # 格式化音訊檔案顯示（顯示前3個檔案名，超過顯示...）
+        files = schedule.files
+        if files:
+            file_names = [self.library.display_name(f) for f in files[:3]]
+            files_display = '、'.join(file_names)
+            if len(files) > 3:
+                files_display += f'... (共{len(files)}個)'
+        else:
+            files_display = '無檔案'
+        
+        duration_seconds = self._ensure_schedule_duration(schedule)
+        end_display = self._compose_end_time_label(schedule.time, duration_seconds)
+        
+        # 依檔案狀態快取標示缺少或無法辨識格式的檔案（不存取磁碟；無法辨識的檔案仍會交給播放器）
+        tags = (schedule.id,)
+        resolved = self._expand_with(self.library.resolve_paths(files), self._playlist_entries)
+        missing_count = sum(
+            1 for f in self.file_verifier.missing(resolved)
+            if not self.mirror.has_copy(f) and not self.transcoder.has_rendition(f)
+        )
+        unrecognized_count = sum(
+            1 for f in self.file_verifier.unrecognized(resolved) if not self.transcoder.has_rendition(f)
+        )
+        if missing_count:
+            files_display = f'⚠ 缺少{missing_count}個檔案：' + files_display
+            tags = (schedule.id, 'missing')
+        elif unrecognized_count:
+            files_display = f'⚠ {unrecognized_count}個檔案無法辨識格式：' + files_display
+            tags = (schedule.id, 'missing')
+        elif len(resolved) > MAX_QUEUE_SIZE:
+            files_display = f'⚠ 共{len(resolved)}個檔案，超過佇列上限只播放前{MAX_QUEUE_SIZE}個：' + files_display
+            tags = (schedule.id, 'missing')
+        
+        values = (
+            schedule.name,
+            days_display,
+            schedule.time,
+            end_display,
+            files_display,
+            len(files)
+        )
+        return values, tags
+    
+    def _on_file_status_changed(self, changed_paths):
+        """檔案狀態變化回調（背景執行緒），轉到主執行緒更新排程列表"""
+        playlists = self._playlist_entries
+        if any(path in playlists for path in changed_paths):
+            self.root.after(0, self._reload_playlists)
+        self.root.after(0, self._refresh_missing_flags)
+    
+    def _refresh_missing_flags(self):
+        """依檔案狀態快取重新標示排程列（不重設排程器）"""
+        self.schedule_view.invalidate()
+    
+    def _is_file_playable(self, file_path):
+        """檔案可播放：來源可用、已有轉檔結果，或已有本機鏡像副本"""
+        return (self.file_verifier.is_available(file_path)
+                or self.transcoder.has_rendition(file_path)
+                or self.mirror.has_copy(file_path))
+    
+    def _resolve_playback_path(self, file_path):
+        """取得實際播放路徑：優先使用轉檔結果，其次為本機鏡像副本"""
+        rendition = self.transcoder.resolve(file_path)
+        if rendition != file_path:
+            return rendition
+        return self.mirror.resolve(file_path)
+    
+    def _expand_files(self, files):
+        """將排程檔案轉為實際路徑：內容ID轉為音訊庫路徑，播放清單展開為其中的檔案"""
+        return expand_playlists(self.library.resolve_paths(files))
+    
+    def _playable_files(self, files):
+        """將排程檔案（可能為內容ID或播放清單）轉為可播放的實際路徑"""
+        return [f for f in self._expand_files(files) if self._is_file_playable(f)]
+    
+    def _import_schedule_files(self, schedule_id, files):
+        """背景匯入排程檔案到音訊庫，完成後以內容ID取代原路徑"""
+        def worker():
+            refs = self.library.import_files(files)
+            self.root.after(0, self._apply_imported_files, schedule_id, files, refs)
+        self.status_label.config(text="正在匯入音訊庫...")
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _apply_imported_files(self, schedule_id, files, refs):
+        """套用匯入結果（排程於匯入期間被修改時不覆蓋）"""
+        for index, schedule in enumerate(self.schedules):
+            if schedule.id == schedule_id and list(schedule.files) == list(files):
+                self.schedules[index] = schedule.copy(files=refs)
+                self.update_schedule_tree()
+                self.save_schedules()
+                break
+        self.status_label.config(text="就緒")
+    
+    def _on_transcode_changed(self):
+        """轉檔完成回調（背景執行緒），重新標示缺少檔案的排程"""
+        self.root.after(0, self._refresh_missing_flags)
+    
+    def _on_mirror_changed(self):
+        """鏡像內容變化回調（背景執行緒）"""
+        self.root.after(0, self._update_mirror_label)
+    
+    def _update_mirror_label(self):
+        """更新狀態列的鏡像進度"""
+        if not hasattr(self, 'mirror_label'):
+            return
+        mirrored, tracked, mirrored_bytes = self.mirror.stats()
+        if tracked:
+            self.mirror_label.config(text=f"本機鏡像：{mirrored}/{tracked}（{format_file_size(mirrored_bytes)}）")
+        else:
+            self.mirror_label.config(text="")
+    
+    def _selected_schedule_id(self):
+        """目前選取排程的ID（選取列捲出畫面後仍有效），未選取時為None"""
+        key = self.schedule_view.selected_key()
+        schedule = self._tree_live.get(key) if key is not None else None
+        return schedule.id if schedule is not None else None
     
     def edit_selected_schedule(self):
         """編輯選取的播放排程（使用彈窗）"""
-        selection = self.schedule_tree.selection()
-        if not selection:
+        schedule_id = self._selected_schedule_id()
+        if schedule_id is None:
             messagebox.showinfo("提示", "請先選擇一個播放排程")
             return
         
-        item = self.schedule_tree.item(selection[0])
-        schedule_id = int(item['tags'][0])
-        
         # 找到對應的排程
         schedule = None
         for s in self.schedules:
-            if s['id'] == schedule_id:
+            if s.id == schedule_id:
                 schedule = s
                 break
         
@@ -1768,29 +2679,30 @@ class MainWindow:
             return
         
         # 打開彈窗（編輯模式）
-        dialog = ScheduleDialog(self.root, self.font_family, self.colors, schedule=schedule)
+        dialog = ScheduleDialog(self.root, self.font_family, self.colors, schedule=schedule, library=self.library)
         self.root.wait_window(dialog.dialog)
         
         # 檢查結果
         if dialog.result is None:
             return  # 用戶取消
         
-        # 刪除舊排程
-        self.delete_schedule_by_id(schedule_id)
-        
         # 創建新排程（保持原ID）
-        new_schedule = {
-            'id': schedule_id,  # 保持原ID
-            'name': dialog.result['name'],
-            'days': dialog.result['days'],
-            'time': dialog.result['time'],
-            'files': dialog.result['files'],
-            'duration': 0
-        }
-        self._ensure_schedule_duration(new_schedule, recompute=True)
+        new_schedule = Schedule(
+            schedule_id,  # 保持原ID
+            dialog.result['name'],
+            parse_time(dialog.result['time']),
+            days_to_mask(dialog.result['days']),
+            dialog.result['files']
+        )
+        self._apply_dialog_duration(new_schedule, dialog.result)
         
-        # 新增到列表
-        self.schedules.append(new_schedule)
+        # 原位置取代（排程未被其他操作移除時），列表只更新這一列
+        for index, s in enumerate(self.schedules):
+            if s.id == schedule_id:
+                self.schedules[index] = new_schedule
+                break
+        else:
+            self.schedules.append(new_schedule)
         
         # 更新顯示和調度器
         self.update_schedule_tree()
@@ -1798,6 +2710,9 @@ class MainWindow:
         # 自動保存
         self.save_schedules()
         
+        if dialog.result.get('import_to_library'):
+            self._import_schedule_files(schedule_id, new_schedule.files)
+        
         messagebox.showinfo("成功", "播放排程已更新")
     
     def edit_schedule(self, event):
@@ -1806,42 +2721,32 @@ class MainWindow:
     
     def delete_selected_schedule(self):
         """刪除選取的播放排程"""
-        selection = self.schedule_tree.selection()
-        if not selection:
+        schedule_id = self._selected_schedule_id()
+        if schedule_id is None:
             messagebox.showinfo("提示", "請先選擇一個播放排程")
             return
         
-        item = self.schedule_tree.item(selection[0])
-        schedule_id = int(item['tags'][0])
-        
         if messagebox.askyesno("確認", "確定要刪除這個播放排程嗎？"):
             self.delete_schedule_by_id(schedule_id)
     
     def delete_schedule_by_id(self, schedule_id):
         """根據ID刪除播放排程"""
-        self.schedules = [s for s in self.schedules if s['id'] != schedule_id]
-        self.scheduler.remove_schedule(schedule_id)
+        self.schedules = [s for s in self.schedules if s.id != schedule_id]
         self.update_schedule_tree()
         self.save_schedules()
     
     def test_selected_schedule(self):
         """測試播放選取的排程"""
-        selection = self.schedule_tree.selection()
-        if not selection:
+        schedule_id = self._selected_schedule_id()
+        if schedule_id is None:
             messagebox.showinfo("提示", "請先選擇一個播放排程")
             return
         
         try:
-            item = self.schedule_tree.item(selection[0])
-            if not item['tags']:
-                messagebox.showerror("錯誤", "無法獲取排程資訊")
-                return
-            schedule_id = int(item['tags'][0])
-            
             # 找到對應的排程
             schedule = None
             for s in self.schedules:
-                if s['id'] == schedule_id:
+                if s.id == schedule_id:
                     schedule = s
                     break
             
@@ -1850,12 +2755,12 @@ class MainWindow:
                 return
             
             # 檢查檔案
-            if not schedule.get('files'):
+            if not schedule.files:
                 messagebox.showwarning("錯誤", "排程中沒有音訊檔案")
                 return
             
             # 測試播放
-            valid_files = [f for f in schedule['files'] if os.path.exists(f)]
+            valid_files = self._playable_files(schedule.files)
             if not valid_files:
                 messagebox.showwarning("錯誤", "排程中的檔案不存在或無法存取")
                 return
@@ -1863,6 +2768,7 @@ class MainWindow:
             self.pending_schedules.clear()
             self.current_schedule = None
             self.player.play_immediately(valid_files)
+            self._queue_changed()
             messagebox.showinfo("提示", "測試播放已開始")
         except (ValueError, IndexError, KeyError) as e:
             messagebox.showerror("錯誤", f"測試播放時發生錯誤：{str(e)}")
@@ -1870,29 +2776,38 @@ class MainWindow:
     def _on_schedule_trigger(self, schedule):
         """播放排程觸發時的回調"""
         try:
-            schedule_name = schedule.get('name', '未知排程')
-            print(f"播放排程觸發: {schedule_name}")
+            schedule_name = schedule.name or '未知排程'
+            log.info("播放排程觸發", schedule_id=schedule.id, name=schedule_name)
+            self.events.publish('trigger', schedule=schedule.id, name=schedule.name, time=schedule.time)
             
             # 通知使用者
             self.notifier.notify_schedule_triggered(schedule_name)
             
             # 開始播放
-            files = schedule.get('files', [])
+            files = schedule.files
             if files:
-                valid_files = [f for f in files if os.path.exists(f)]
+                valid_files = self._playable_files(files)
                 if valid_files:
                     self._enqueue_schedule_playback(schedule, valid_files)
                 else:
+                    log.warning("排程的檔案都不存在，未播放", schedule_id=schedule.id, files=list(files))
+                    self.events.publish('error', schedule=schedule.id, message='沒有可播放的檔案')
                     self.status_label.config(text=f"播放失敗：{schedule_name} - 檔案不存在")
             else:
+                log.warning("排程沒有音訊檔案，未播放", schedule_id=schedule.id)
+                self.events.publish('error', schedule=schedule.id, message='沒有音訊檔案')
                 self.status_label.config(text=f"播放失敗：{schedule_name} - 沒有音訊檔案")
         except Exception as e:
-            print(f"播放排程觸發錯誤: {e}")
+            log.exception("播放排程觸發錯誤", error=str(e))
+            self.events.publish('error', schedule=schedule.id, message=str(e))
             self.status_label.config(text=f"播放錯誤：{str(e)}")
     
     def _on_playback_start(self, file_path):
         """播放開始回調"""
-        file_name = os.path.basename(file_path)
+        self._touch()
+        current = self.current_schedule
+        self.events.publish('start', file=file_path, schedule=current.id if current else None)
+        file_name = self.library.display_name(file_path)
         self.status_label.config(text=f"播放中：{file_name}")
         
         # 更新播放控制區域
@@ -1910,17 +2825,25 @@ class MainWindow:
         if self.tray:
             self.tray.start_blinking()
         
-        # 開始更新進度條
-        self._update_playback_progress()
+        # 開始更新進度條（取代尚未到期的更新，避免重複的更新迴圈）
+        self.root.after(0, self.ui_timers.run_now, 'progress', self._update_playback_progress)
+    
+    def _on_playback_error(self, file_path, message):
+        """播放失敗回調（播放執行緒；之後仍會呼叫播放結束回調）"""
+        self.events.publish('error', file=file_path, message=message)
     
     def _on_playback_end(self):
         """播放結束回調"""
+        self._touch()
+        self.events.publish('end', file=self.player.current_file)
         queue_size = self.player.get_queue_size()
         if queue_size == 0 and not self.player.is_playing:
             if self.pending_schedules:
                 self._start_next_pending_schedule()
             else:
-                self.current_schedule = None
+                if self.current_schedule is not None:
+                    self.current_schedule = None
+                    self._queue_changed()
                 self.status_label.config(text="就緒")
                 if hasattr(self, 'playback_status_label'):
                     self.playback_status_label.config(text="目前無播放")
@@ -1939,34 +2862,67 @@ class MainWindow:
         if self.tray:
             self.tray.stop_blinking()
     
-    def load_schedules(self):
-        """載入播放排程"""
-        data = self.storage.load_schedules()
-        self.schedules = data.get('schedules', [])
-        for schedule in self.schedules:
-            self._ensure_schedule_duration(schedule)
+    def load_schedules(self, prefer=None):
+        """
+        載入播放排程，與尚未寫入的本機修改合併
+        :param prefer: 同一排程兩邊都修改時採用的版本（'local'、'remote'），None表示詢問使用者
+        :return: 合併後是否仍有排程檔中沒有的本機修改
+        """
+        self.schedule_watcher.mark_current()
+        # 資料已由 Storage 遷移至目前版本，時長不需逐筆補算
+        remote = decode_schedules(self.storage.load_schedules())
+        merged, conflicts = merge_schedules(self._schedule_base, self.schedules, remote)
+        if conflicts and (prefer == 'remote' or (prefer is None and messagebox.askyesno(
+                "排程檔已被修改",
+                f"排程檔已被其他程式修改，其中 {len(conflicts)} 個排程與尚未保存的修改衝突。\n\n"
+                "是否以排程檔的內容為準？（選「否」保留目前畫面上的排程）"))):
+            merged, _ = merge_schedules(self._schedule_base, self.schedules, remote, prefer='remote')
+        self._schedule_base = [s.copy() for s in remote]
+        self.schedules = merged
         
         # 更新下一個ID
         if self.schedules:
-            max_id = max(s.get('id', 0) for s in self.schedules)
+            max_id = max(s.id or 0 for s in self.schedules)
             self.next_schedule_id = max_id + 1
         else:
             self.next_schedule_id = 1
         
-        # 更新排程器
-        self.scheduler.set_schedules(self.schedules)
-        
-        # 更新顯示
+        # 更新顯示與排程器（只套用有變化的排程）
         self.update_schedule_tree()
+        return merged != remote
     
     def save_schedules(self):
-        """保存播放排程"""
+        """
+        保存播放排程（排程檔已被外部修改時先合併，不覆蓋外部的變更）
+        :return: 是否保存成功
+        """
+        if self.schedule_watcher.has_changed():
+            self.load_schedules(prefer='local')
         for schedule in self.schedules:
             self._ensure_schedule_duration(schedule)
-        data = {
-            'schedules': self.schedules
-        }
-        self.storage.save_schedules(data)
+        with self.schedule_watcher.writing():
+            saved = self.storage.save_schedules(encode_schedules(self.schedules))
+        if saved:
+            self._schedule_base = [s.copy() for s in self.schedules]
+            if self.sync:
+                if not self.schedules:
+                    # 使用者在畫面上刪除了全部排程，是明確的清空
+                    self.sync.allow_empty_publish()
+                # 主節點盡快發布修改
+                self.sync.sync_now()
+        return saved
+    
+    def _on_schedule_file_changed(self):
+        """排程檔被外部修改（監看執行緒），轉到主執行緒重新載入"""
+        self.root.after(0, self._reload_changed_schedule_file)
+    
+    def _reload_changed_schedule_file(self):
+        """套用排程檔的外部修改，保留的本機修改寫回排程檔"""
+        if not self.schedule_watcher.has_changed():
+            return
+        if self.load_schedules():
+            self.save_schedules()
+        self.status_label.config(text="已套用排程檔的外部修改")
     
     def stop_playback(self):
         """停止播放"""
@@ -1987,23 +2943,29 @@ class MainWindow:
                 self.tray.stop_blinking()
             self.pending_schedules.clear()
             self.current_schedule = None
+            self._queue_changed()
         except Exception as e:
             messagebox.showerror("錯誤", f"停止播放失敗：{str(e)}")
     
     def _calculate_schedule_duration(self, files):
         if not files:
             return None
-        total = get_total_duration(files)
+        total = get_total_duration(self._expand_files(files))
         if total and total > 0:
             return int(total)
         return None
 
     def _ensure_schedule_duration(self, schedule, recompute=False):
-        if recompute or 'duration_seconds' not in schedule:
-            duration_seconds = self._calculate_schedule_duration(schedule.get('files', []))
-            schedule['duration_seconds'] = duration_seconds
-            schedule['duration'] = duration_seconds
-        return schedule.get('duration_seconds')
+        if recompute or not schedule.has_duration:
+            schedule.duration_seconds = self._calculate_schedule_duration(schedule.files)
+        return schedule.duration_seconds
+
+    def _apply_dialog_duration(self, schedule, result):
+        """使用排程對話框已算出的時長，尚未算完時才重新讀取檔案"""
+        if result.get('duration_seconds') is not None:
+            schedule.duration_seconds = result['duration_seconds']
+        else:
+            self._ensure_schedule_duration(schedule, recompute=True)
 
     def _format_duration_text(self, duration_seconds):
         if duration_seconds is None:
@@ -2026,32 +2988,49 @@ class MainWindow:
         duration_seconds = self._ensure_schedule_duration(schedule)
         if self.player.is_playing or self.player.get_queue_size() > 0:
             self.pending_schedules.append((schedule, files))
-            wait_text = f"等待播放：{schedule.get('name', '播放排程')}（待播 {len(self.pending_schedules)}）"
+            self._queue_changed()
+            wait_text = f"等待播放：{schedule.name or '播放排程'}（待播 {len(self.pending_schedules)}）"
             self.status_label.config(text=wait_text)
             if hasattr(self, 'playback_status_label'):
                 self.playback_status_label.config(text=wait_text)
             return
 
         self.current_schedule = schedule
-        self.player.enqueue_files(files)
-        start_text = f"正在播放：{schedule.get('name', '播放排程')}"
+        added = self.player.enqueue_files(files)
+        self._queue_changed()
+        start_text = f"正在播放：{schedule.name or '播放排程'}"
         if duration_seconds:
             start_text += f"（約 {self._format_duration_text(duration_seconds)}）"
+        start_text += self._queue_overflow_text(schedule, files, added)
         self.status_label.config(text=start_text)
         if hasattr(self, 'playback_status_label'):
             self.playback_status_label.config(text=start_text)
 
+    def _queue_overflow_text(self, schedule, files, added):
+        """
+        佇列已滿而未加入的檔案提示
+        :return: 附加在狀態列的文字（全部加入時為空字串）
+        """
+        skipped = len(files) - added
+        if skipped <= 0:
+            return ''
+        log.warning("播放佇列已滿，略過檔案", schedule=schedule.id, skipped=skipped, limit=MAX_QUEUE_SIZE)
+        return f"　⚠ 佇列上限 {MAX_QUEUE_SIZE}，略過 {skipped} 個檔案"
+
     def _start_next_pending_schedule(self):
         if not self.pending_schedules:
             self.current_schedule = None
+            self._queue_changed()
             return
         next_schedule, files = self.pending_schedules.popleft()
         self.current_schedule = next_schedule
-        self.player.enqueue_files(files)
+        added = self.player.enqueue_files(files)
+        self._queue_changed()
         duration_seconds = self._ensure_schedule_duration(next_schedule)
-        start_text = f"正在播放：{next_schedule.get('name', '播放排程')}"
+        start_text = f"正在播放：{next_schedule.name or '播放排程'}"
         if duration_seconds:
             start_text += f"（約 {self._format_duration_text(duration_seconds)}）"
+        start_text += self._queue_overflow_text(next_schedule, files, added)
         self.status_label.config(text=start_text)
         if hasattr(self, 'playback_status_label'):
             self.playback_status_label.config(text=start_text)
@@ -2084,21 +3063,21 @@ class MainWindow:
                     self.progress_time_label.config(text=f"{current_time} / --:--")
                 
                 # 繼續更新（每100ms更新一次）
-                self.root.after(100, self._update_playback_progress)
+                self.ui_timers.schedule('progress', 100, self._update_playback_progress)
             else:
                 # 播放已停止，重置進度條
                 queue_size = self.player.get_queue_size()
                 if queue_size > 0:
                     # 還有佇列，繼續更新
-                    self.root.after(500, self._update_playback_progress)
+                    self.ui_timers.schedule('progress', 500, self._update_playback_progress)
                 else:
                     # 完全停止，重置UI
                     self.progress_bar['value'] = 0
                     self.progress_time_label.config(text="--:-- / --:--")
         except Exception as e:
-            print(f"更新播放進度錯誤: {e}")
+            log.exception("更新播放進度錯誤", error=str(e))
             # 即使出錯也繼續嘗試更新
-            self.root.after(500, self._update_playback_progress)
+            self.ui_timers.schedule('progress', 500, self._update_playback_progress)
     
     def toggle_autostart(self):
         """切換開機自動啟動"""
@@ -2122,6 +3101,10 @@ class MainWindow:
             messagebox.showerror("錯誤", f"設置失敗: {str(e)}")
             self.autostart_var.set(False)
     
+    def _report_callback_exception(self, exc_type, exc, tb):
+        """介面回調的未處理例外：記錄並傾印飛行記錄（Tk 預設只輸出到錯誤輸出）"""
+        report_exception(exc_type, exc, tb, where='tk')
+    
     def run(self):
         """執行主迴圈"""
         self.root.mainloop()
@@ -0,0 +1,250 @@
+"""
+虛擬化排程列表
+Treeview 只保留畫面可見的列（固定的列槽），捲動時依模型重新填入內容；
+排序與篩選使用預先計算、隨排程變更維護的排序鍵索引，數萬筆排程也能立即顯示
+"""
+
+from tkinter import ttk
+
+
+class VirtualScheduleView:
+    """只實體化可見列的排程列表"""
+
+    # 每次滾輪捲動的列數
+    WHEEL_ROWS = 3
+
+    def __init__(self, parent, columns, row_builder, sort_key_builder):
+        """
+        初始化列表
+        :param parent: 父元件
+        :param columns: 欄位名稱
+        :param row_builder: 產生列內容的函數(key) -> (values, tags)，只對可見列呼叫
+        :param sort_key_builder: 產生排序鍵的函數(key) -> 與欄位對應的 tuple；
+            第一次排序時對全部列建立索引，之後只對新增或變更的列呼叫
+        """
+        self.columns = tuple(columns)
+        self.row_builder = row_builder
+        self.sort_key_builder = sort_key_builder
+
+        self.tree = ttk.Treeview(parent, columns=self.columns, show='headings', height=10)
+        self.scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self._on_scrollbar)
+
+        self._base_keys = []  # 模型順序
+        self._view_keys = []  # 排序與篩選後的順序
+        self._sort_index = None  # key -> 排序鍵 tuple（第一次排序時建立，之後隨變更維護）
+        self._row_cache = {}  # key -> (values, tags)
+        self._filter = None
+        self._sort_column = None
+        self._sort_reverse = False
+        self._offset = 0
+        self._slots = []  # Treeview 中實際存在的列
+        self._slot_keys = []
+        self._selected_key = None
+        self._header_height = None
+
+        for index, col in enumerate(self.columns):
+            self.tree.heading(col, text=col, command=lambda i=index: self.sort_by(i))
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_rows(-self.WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_rows(self.WHEEL_ROWS))
+        self.tree.bind('<Up>', lambda e: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda e: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda e: self._move_selection(-max(1, len(self._slots) - 1)))
+        self.tree.bind('<Next>', lambda e: self._move_selection(max(1, len(self._slots) - 1)))
+
+    # ------------------------------------------------------------------ #
+    # 模型
+    # ------------------------------------------------------------------ #
+    def set_rows(self, keys, changed=(), removed=()):
+        """
+        設定列順序並套用變更
+        :param keys: 模型順序的列鍵
+        :param changed: 新增或內容變更的列鍵（重新計算排序鍵，清除列內容快取）
+        :param removed: 已移除的列鍵
+        """
+        index = self._sort_index
+        for key in removed:
+            if index is not None:
+                index.pop(key, None)
+            self._row_cache.pop(key, None)
+            if key == self._selected_key:
+                self._selected_key = None
+        for key in changed:
+            if index is not None:
+                index[key] = self.sort_key_builder(key)
+            self._row_cache.pop(key, None)
+        self._base_keys = list(keys)
+        self._rebuild_view()
+
+    def invalidate(self, keys=None):
+        """清除列內容快取並重繪可見列（例如檔案狀態改變）"""
+        if keys is None:
+            self._row_cache.clear()
+        else:
+            for key in keys:
+                self._row_cache.pop(key, None)
+        self._render(force=True)
+
+    def set_filter(self, keys):
+        """
+        只顯示指定的列
+        :param keys: 列鍵集合，None 表示顯示全部
+        """
+        if keys != self._filter:
+            self._offset = 0
+        self._filter = keys
+        self._rebuild_view()
+
+    def sort_by(self, column_index, reverse=None):
+        """依欄位排序（再次點選同一欄位時反向）"""
+        if reverse is None:
+            reverse = not self._sort_reverse if self._sort_column == column_index else False
+        self._sort_column = column_index
+        self._sort_reverse = reverse
+        for index, col in enumerate(self.columns):
+            arrow = (' ▼' if reverse else ' ▲') if index == column_index else ''
+            self.tree.heading(col, text=col + arrow)
+        self._rebuild_view()
+
+    def _rebuild_view(self):
+        keys = self._base_keys
+        if self._filter is not None:
+            keys = [key for key in keys if key in self._filter]
+        if self._sort_column is not None:
+            if self._sort_index is None:
+                self._sort_index = {key: self.sort_key_builder(key) for key in self._base_keys}
+            column = self._sort_column
+            index = self._sort_index
+            keys = sorted(keys, key=lambda key: index[key][column], reverse=self._sort_reverse)
+        self._view_keys = keys
+        self._render(force=True)
+
+    @property
+    def row_count(self):
+        """篩選後的列數"""
+        return len(self._view_keys)
+
+    def selected_key(self):
+        """目前選取的列鍵（捲出畫面後仍保留）"""
+        return self._selected_key
+
+    # ------------------------------------------------------------------ #
+    # 繪製
+    # ------------------------------------------------------------------ #
+    def _visible_rows(self):
+        """可完整顯示的列數"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return int(self.tree.cget('height'))
+        style = ttk.Style()
+        row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        if self._header_height is None and self._slots:
+            bbox = self.tree.bbox(self._slots[0])
+            if bbox:
+                self._header_height = bbox[1]
+        header = self._header_height if self._header_height is not None else row_height
+        return max(1, (height - header) // row_height)
+
+    def _render(self, force=False):
+        """只填入可見範圍的列"""
+        visible = self._visible_rows()
+        total = len(self._view_keys)
+        self._offset = max(0, min(self._offset, total - visible))
+        keys = self._view_keys[self._offset:self._offset + visible]
+
+        # 列槽數量跟隨可見列數
+        while len(self._slots) < len(keys):
+            self._slots.append(self.tree.insert('', 'end'))
+            self._slot_keys.append(None)
+        while len(self._slots) > len(keys):
+            self.tree.delete(self._slots.pop())
+            self._slot_keys.pop()
+
+        selected_slot = None
+        for slot_index, key in enumerate(keys):
+            slot = self._slots[slot_index]
+            if force or self._slot_keys[slot_index] != key:
+                row = self._row_cache.get(key)
+                if row is None:
+                    row = self.row_builder(key)
+                    self._row_cache[key] = row
+                values, tags = row
+                self.tree.item(slot, values=values, tags=tags)
+                self._slot_keys[slot_index] = key
+            if key == self._selected_key:
+                selected_slot = slot
+
+        current = self.tree.selection()
+        if selected_slot is None:
+            if current:
+                self.tree.selection_remove(*current)
+        elif current != (selected_slot,):
+            self.tree.selection_set(selected_slot)
+            self.tree.focus(selected_slot)
+
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, offset):
+        self._offset = max(0, offset)
+        self._render()
+
+    def _scroll_rows(self, rows):
+        self._scroll_to(self._offset + rows)
+        return 'break'
+
+    def see(self, key):
+        """捲動使指定列可見"""
+        try:
+            position = self._view_keys.index(key)
+        except ValueError:
+            return
+        visible = self._visible_rows()
+        if position < self._offset:
+            self._scroll_to(position)
+        elif position >= self._offset + visible:
+            self._scroll_to(position - visible + 1)
+
+    # ------------------------------------------------------------------ #
+    # 事件
+    # ------------------------------------------------------------------ #
+    def _on_scrollbar(self, action, amount, unit=None):
+        total = len(self._view_keys)
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * total))
+        elif action == 'scroll':
+            step = max(1, len(self._slots) - 1) if unit == 'pages' else 1
+            self._scroll_to(self._offset + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        rows = -self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS
+        return self._scroll_rows(rows)
+
+    def _on_resize(self, event):
+        self._render()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._slots:
+            self._selected_key = self._slot_keys[self._slots.index(selection[0])]
+        elif self._selected_key in self._slot_keys:
+            # 使用者取消可見列的選取；選取列捲出畫面時保留選取
+            self._selected_key = None
+
+    def _move_selection(self, step):
+        if not self._view_keys:
+            return 'break'
+        try:
+            position = self._view_keys.index(self._selected_key) + step
+        except ValueError:
+            position = self._offset
+        position = max(0, min(position, len(self._view_keys) - 1))
+        self._selected_key = self._view_keys[position]
+        self.see(self._selected_key)
+        self._render()
+        return 'break'
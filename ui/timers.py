@@ -0,0 +1,110 @@
+"""
+介面計時器管理
+時間顯示、播放進度等定期更新都透過此處排程：視窗隱藏到託盤時不再喚醒，
+重新顯示時立即補跑一次；並記錄每個計時器的執行次數與CPU時間，方便量測閒置負載，
+計時器實際執行時間比預定時間晚多少（事件迴圈延遲）記錄於效能指標
+"""
+
+import time
+
+from core.metrics import REGISTRY
+
+PUMP_LAG = REGISTRY.histogram('radioone_ui_timer_lag_seconds', '介面計時器實際執行時間比預定時間晚的秒數')
+
+
+class UITimerManager:
+    """依視窗可見狀態暫停的介面計時器"""
+
+    def __init__(self, root):
+        """
+        初始化計時器管理
+        :param root: Tk 根視窗（使用 after / after_cancel）
+        """
+        self.root = root
+        self.visible = True
+        self._jobs = {}  # 名稱 -> (after ID, 回調)
+        self._suspended = {}  # 名稱 -> 隱藏期間暫停的回調
+        self._stats = {}  # 名稱 -> [執行次數, CPU秒數]
+        self._suspended_since = None
+        self._suspended_seconds = 0.0
+
+    def schedule(self, name, delay_ms, callback):
+        """
+        排程計時器（同名計時器只保留最新一個）
+        :param name: 計時器名稱
+        :param delay_ms: 延遲毫秒數
+        :param callback: 回調函數
+        """
+        self.cancel(name)
+        if not self.visible:
+            self._suspended[name] = callback
+            return
+        due = time.monotonic() + delay_ms / 1000
+        job = self.root.after(delay_ms, self._run, name, callback, due)
+        self._jobs[name] = (job, callback)
+
+    def cancel(self, name):
+        """取消計時器"""
+        entry = self._jobs.pop(name, None)
+        if entry is not None:
+            self.root.after_cancel(entry[0])
+        self._suspended.pop(name, None)
+
+    def run_now(self, name, callback):
+        """立即執行計時器（取代尚未到期的同名計時器）"""
+        self.cancel(name)
+        self._run(name, callback)
+
+    def _run(self, name, callback, due=None):
+        self._jobs.pop(name, None)
+        if not self.visible:
+            self._suspended[name] = callback
+            return
+        if due is not None:
+            PUMP_LAG.observe(max(0.0, time.monotonic() - due))
+        started = time.process_time()
+        try:
+            callback()
+        finally:
+            stats = self._stats.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += time.process_time() - started
+
+    def set_visible(self, visible):
+        """
+        設定視窗可見狀態
+        隱藏時取消所有待執行的計時器；顯示時立即執行被暫停的計時器，讓畫面馬上同步
+        """
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if not visible:
+            for name, (job, callback) in list(self._jobs.items()):
+                self.root.after_cancel(job)
+                self._suspended[name] = callback
+            self._jobs.clear()
+            self._suspended_since = time.monotonic()
+            return
+
+        if self._suspended_since is not None:
+            self._suspended_seconds += time.monotonic() - self._suspended_since
+            self._suspended_since = None
+        suspended = self._suspended
+        self._suspended = {}
+        for name, callback in suspended.items():
+            self._run(name, callback)
+
+    def stats(self):
+        """
+        計時器統計
+        :return: {'timers': {名稱: (執行次數, CPU秒數)}, 'pending': 待執行數, 'suspended': 暫停數, 'hidden_seconds': 隱藏累計秒數}
+        """
+        hidden_seconds = self._suspended_seconds
+        if self._suspended_since is not None:
+            hidden_seconds += time.monotonic() - self._suspended_since
+        return {
+            'timers': {name: tuple(values) for name, values in self._stats.items()},
+            'pending': len(self._jobs),
+            'suspended': len(self._suspended),
+            'hidden_seconds': hidden_seconds,
+        }